@@ -0,0 +1,158 @@
+"""
+Batch POMDP Evaluator
+=====================
+
+Evaluate batches of observation functions of one POMDP in a pool of pre-warmed worker processes. Each worker builds
+the instance once (its own Z3 context, `POMDPAdapter` with a lazy `IndexStorage` and the Y-independent constraints
+asserted) and then evaluates observation functions for as many batches as the pool lives: under their
+selector literals (see `Z3Executor.evaluate_pomdp`), or by re-asserting them over the Y-independent constraints for
+nonlinear instances, which Z3's incremental core cannot solve (see `CubeAndConquerSolver`). Results stream back as
+they complete; once the caller has enough of them, the rest of the batch is cancelled (running checks are
+interrupted, queued ones skipped) without losing the warm workers.
+"""
+
+import threading
+import time
+from fractions import Fraction
+from multiprocessing import get_context
+from typing import Optional, Any, Unpack, Iterator, Iterable
+
+from z3 import sat
+
+from MemoisedOracle import _CHECK_SAT_RESULTS
+from Z3SolverResult import Z3SolverResult
+from builders.typedicts import ExtOperationParams
+
+# Interval (in seconds) at which workers look for a cancelled batch
+CANCEL_POLL_INTERVAL = 0.01
+
+# State of a pool worker: its POMDP, solver and the batch under evaluation (built once by `_init_worker`)
+_worker: dict[str, Any] = {}
+
+
+def _init_worker(variant: str, world: str, instance_params: dict[str, Any], threshold: str,
+                 options: ExtOperationParams, cancelled):
+    """Build the POMDP and prepare its solver once per pool worker (failures are reported by the evaluations)."""
+    _worker.update(cancelled=cancelled, batch=None, lock=threading.Lock())
+    try:
+        from Z3Executor import Z3Executor
+        from builders.POMDPAdapter import POMDPAdapter
+        from builders.TPMCFactory import TPMCFactory
+
+        tpmc_instance = TPMCFactory.create(variant, world, **instance_params, **options)
+        incremental = tpmc_instance.determinism and tpmc_instance.bool_encoding
+        pomdp = POMDPAdapter(tpmc_instance, assumptions=incremental, lazy=True)
+        solver = Z3Executor(pomdp.ctx, verbose=False, seed=options.get('seed'))
+        solver.prepare_constraints(pomdp, threshold)
+        _worker.update(pomdp=pomdp, solver=solver, incremental=incremental,
+                       base=None if incremental else solver.solver.assertions(), error=None)
+        threading.Thread(target=_watch_cancellation, daemon=True).start()
+    except Exception as e:
+        _worker.update(error=repr(e))
+
+
+def _watch_cancellation():
+    """Interrupt the running check of the worker once its batch is cancelled."""
+    while True:
+        time.sleep(CANCEL_POLL_INTERVAL)
+        # The batch only changes between checks, so that no check of a later batch is interrupted
+        with _worker['lock']:
+            batch = _worker['batch']
+            if batch is not None and _worker['cancelled'].value >= batch:
+                _worker['pomdp'].ctx.interrupt()
+
+
+def _evaluate(task: tuple[int, int, list[int], int]) -> tuple[int, str, float, Optional[str], Optional[dict],
+                                                            Optional[str]]:
+    """Evaluate one observation function of a batch, as a picklable answer (skipped if the batch is cancelled)."""
+    batch, index, obs_function, timeout_ms = task
+    if _worker['error'] is not None:
+        return index, 'error', 0.0, None, None, _worker['error']
+    if _worker['cancelled'].value >= batch:
+        return index, 'unknown', 0.0, None, None, None
+
+    solver, pomdp = _worker['solver'], _worker['pomdp']
+    with _worker['lock']:
+        _worker['batch'] = batch
+    try:
+        if _worker['incremental']:
+            result = solver.evaluate_pomdp(pomdp, obs_function, timeout_ms)
+        else:
+            solver.solver.reset()
+            solver.solver.add(_worker['base'], *pomdp.collect_bellman_constraints(obs_function))
+            result = solver.solve(timeout_ms)
+            result.obs = pomdp.extract_obs_solution(obs_function)
+    finally:
+        with _worker['lock']:
+            _worker['batch'] = None
+    return (index, str(result.result), result.solve_time,
+            str(result.reward) if result.reward is not None else None, result.obs, None)
+
+
+class BatchPOMDPEvaluator:
+    """
+    Pool of `workers` processes evaluating observation functions of one POMDP, given by its problem definition like
+    `PortfolioSolver`. The pool lives until `close` (or the end of a `with` block).
+    """
+
+    def __init__(self, variant: str, world: str, instance_params: dict[str, Any], threshold: str, workers: int,
+                 **options: Unpack[ExtOperationParams]):
+        self.workers = workers
+        # Workers are not forked from the caller: a check it timed out may still run in a thread that ignores the
+        # interrupt (seen with nlsat on Z3 4.13), and forking a process while such a thread runs can deadlock
+        context = get_context('forkserver')
+        # Last cancelled batch, shared with the workers
+        self.cancelled = context.Value('i', 0)
+        self.batches = 0
+        self.pool = context.Pool(workers, initializer=_init_worker,
+                         initargs=(variant, world, instance_params, threshold, options, self.cancelled))
+
+    def evaluate_pomdp_batch(self, obs_functions: Iterable[list[int]], timeout_ms: int,
+                             enough: Optional[int] = None) -> Iterator[tuple[int, Z3SolverResult]]:
+        """
+        Evaluate a batch of observation functions, yielding (index in the batch, result) pairs as they complete.
+
+        The rest of the batch is cancelled once `enough` SAT results were yielded, or when the caller stops iterating
+        (closing the generator); its evaluations are then never yielded.
+
+        Args:
+            obs_functions: The observation functions to evaluate
+            timeout_ms: Solver timeout in milliseconds, per observation function
+            enough: Number of SAT results after which the batch is cancelled (None to evaluate it all)
+
+        Returns:
+            Iterator over the results (observation function in `obs`, without a Z3 model), in completion order
+        """
+        self.batches += 1
+        batch = self.batches
+        tasks = ((batch, index, [int(obs) for obs in obs_function], timeout_ms)
+                 for index, obs_function in enumerate(obs_functions))
+        satisfied = 0
+        try:
+            for index, status, solve_time, reward, obs, error in self.pool.imap_unordered(_evaluate, tasks):
+                if error is not None:
+                    raise RuntimeError(f"Worker failed to build the POMDP: {error}")
+                result = Z3SolverResult(
+                    solve_time=solve_time,
+                    result=_CHECK_SAT_RESULTS[status],
+                    reward=Fraction(reward) if reward is not None else None,
+                    obs=obs
+                )
+                yield index, result
+                if result.result == sat:
+                    satisfied += 1
+                    if enough is not None and satisfied >= enough:
+                        break
+        finally:
+            # Interrupt the running evaluations of the batch and skip its queued ones
+            self.cancelled.value = batch
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,5 +1,6 @@
 import time
 
+import numpy as np
 from z3 import sat, BoolRef, unknown
 
 from Z3SolverResult import Z3SolverResult
@@ -60,7 +61,7 @@ class ClusterPOPSolver:
         self.solver = solver
         self.tpmc = tpmc
         self.verbose = verbose
-        self.adapter = POMDPAdapter(tpmc)
+        self.adapter = POMDPAdapter(tpmc, assumptions=True, lazy=True)
         self.solver.prepare_constraints(self.adapter, threshold)
 
     def solve(self, timeout_ms: int) -> Z3SolverResult:
@@ -164,7 +165,7 @@ class ClusterPOPSolver:
         Returns:
             tuple[list[int], list[BoolRef]]: A tuple containing the observation function and strategy constraints.
         """
-        observation_function = [-1] * self.tpmc.size
+        observation_function = np.full(self.tpmc.size, -1)
         strategy_constraints = []
         atomic_groups = list(self.tpmc.clusters.keys())
 
@@ -186,7 +187,6 @@ class ClusterPOPSolver:
 
             for atomic_group_idx in block:
                 atomic_group = atomic_groups[atomic_group_idx]
-                for state in self.tpmc.clusters[atomic_group]:
-                    observation_function[state] = b
+                observation_function[self.tpmc.clusters[atomic_group]] = b
 
-        return observation_function, strategy_constraints
+        return observation_function.tolist(), strategy_constraints
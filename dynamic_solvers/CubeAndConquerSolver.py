@@ -0,0 +1,145 @@
+"""
+Cube-and-Conquer Solver
+=======================
+
+Split an OOP instance into cubes over the observation variables of a few splitting states (see
+`OOPSpec.build_cubes`, driven by the atomic groups of the world) and conquer the cubes in a process pool. Each worker
+builds the instance once and solves its cubes as assumption sets on the same solver, under a shared deadline; the
+first SAT cube ends the search, while the instance is UNSAT only once every cube is.
+"""
+
+import time
+from fractions import Fraction
+from multiprocessing import get_context
+from typing import Optional, Any, Unpack
+
+from z3 import sat, unsat, unknown
+
+from PortfolioSolver import _observation_value
+from Z3SolverResult import Z3SolverResult
+from builders.typedicts import ExtOperationParams
+
+# Cubes generated per worker, so that easy cubes leave the workers free for the hard ones
+CUBES_PER_WORKER = 4
+
+# State of a pool worker: its instance, solver and cubes (built once by `_init_worker`)
+_worker: dict[str, Any] = {}
+
+
+def _init_worker(variant: str, world: str, instance_params: dict[str, Any], threshold: str,
+                 options: ExtOperationParams, depth: int, timeout_ms: int):
+    """Build the instance and its cubes once per pool worker (failures are reported by the cubes)."""
+    try:
+        from Z3Executor import Z3Executor
+        from builders.TPMCFactory import TPMCFactory
+
+        tpmc_instance = TPMCFactory.create(variant, world, **instance_params, **options)
+        solver = Z3Executor(tpmc_instance.ctx, verbose=False, seed=options.get('seed'))
+        solver.set_timeout(timeout_ms)
+        solver.prepare_constraints(tpmc_instance, threshold)
+        # Nonlinear instances cannot run in Z3's incremental core (see `Z3Executor.optimize`): cubes are asserted
+        incremental = tpmc_instance.determinism and tpmc_instance.bool_encoding
+        _worker.update(spec=tpmc_instance, solver=solver, cubes=tpmc_instance.build_cubes(depth),
+                       incremental=incremental, base=None if incremental else solver.solver.assertions(), error=None)
+    except Exception as e:
+        _worker.update(error=repr(e))
+
+
+def _conquer(task: tuple[int, float]) -> tuple[int, str, float, Optional[str], Optional[dict[str, int]], Optional[str]]:
+    """Solve one cube of the worker's instance before the (wall-clock) deadline, as a picklable answer."""
+    index, deadline = task
+    if _worker['error'] is not None:
+        return index, 'error', 0.0, None, None, _worker['error']
+    remaining_ms = int((deadline - time.monotonic()) * 1000)
+    if remaining_ms <= 0:
+        return index, str(unknown), 0.0, None, None, None
+
+    solver, cube = _worker['solver'], _worker['cubes'][index]
+    if _worker['incremental']:
+        result = solver.solve(remaining_ms, *cube)
+    else:
+        solver.solver.reset()
+        solver.solver.add(_worker['base'], *cube)
+        result = solver.solve(remaining_ms)
+
+    obs = None
+    if result.model is not None:
+        obs = {decl.name(): _observation_value(result.model[decl])
+               for decl in result.model.decls() if decl.name().startswith('ys')}
+    return (index, str(result.result), result.solve_time,
+            str(result.reward) if result.reward is not None else None, obs, None)
+
+
+class CubeAndConquerSolver:
+    """
+    Cube-and-conquer over one OOP instance, given by its problem definition like `PortfolioSolver`.
+
+    The splitting depth is the smallest one yielding `CUBES_PER_WORKER` cubes per worker (or every atomic group).
+    """
+
+    def __init__(self, variant: str, world: str, instance_params: dict[str, Any], threshold: str, workers: int,
+                 verbose: bool = False, **options: Unpack[ExtOperationParams]):
+        self.variant = variant
+        self.world = world
+        self.instance_params = instance_params
+        self.threshold = threshold
+        self.workers = workers
+        self.verbose = verbose
+        self.options = options
+
+    def split(self) -> tuple[int, int]:
+        """Splitting depth and number of cubes of the instance."""
+        from builders.TPMCFactory import TPMCFactory
+
+        tpmc_instance = TPMCFactory.create(self.variant, self.world, **self.instance_params, **self.options)
+        tpmc_instance.declare_variables()
+        depth, cubes = 0, 1
+        while cubes < self.workers * CUBES_PER_WORKER and depth < len(tpmc_instance.clusters):
+            depth += 1
+            cubes = len(tpmc_instance.build_cubes(depth))
+        return depth, cubes
+
+    def solve(self, timeout_ms: int) -> Z3SolverResult:
+        """
+        Conquer the cubes until the first SAT one, or until every cube is UNSAT.
+
+        Returns:
+            Result of the first SAT cube (observation function in `obs`, without a Z3 model), UNSAT if every cube is,
+            or UNKNOWN. The solve time is the wall-clock time of the pool (including the instance building of each
+            worker), as the CPU time of the parent process does not measure it.
+        """
+        depth, n_cubes = self.split()
+        if self.verbose:
+            print(f"    Splitting depth {depth}: {n_cubes} cubes over {self.workers} workers")
+
+        start = time.monotonic()
+        deadline = start + timeout_ms / 1000.0
+        status, winner = unsat, None
+        # Not forked from this process, which may still run a timed-out check (see `BatchPOMDPEvaluator`)
+        pool = get_context('forkserver').Pool(self.workers, initializer=_init_worker,
+                                              initargs=(self.variant, self.world, self.instance_params,
+                                                        self.threshold, self.options, depth, timeout_ms))
+        try:
+            # Cubes are handed out in order (nearest the goal first), one at a time
+            for index, cube_status, solve_time, reward, obs, error in pool.imap_unordered(
+                    _conquer, ((index, deadline) for index in range(n_cubes))):
+                if self.verbose:
+                    print(f"    Cube {index} -> {cube_status.upper()} ({solve_time:.3f}s){f" ({error})" if error else ""}")
+                if cube_status == str(sat):
+                    status, winner = sat, (reward, obs)
+                    break
+                if cube_status != str(unsat):
+                    status = unknown
+        finally:
+            # Early termination: the remaining cubes are dropped with their workers
+            pool.terminate()
+            pool.join()
+
+        reward, obs = winner if winner is not None else (None, None)
+        return Z3SolverResult(
+            solve_time=time.monotonic() - start,
+            result=status,
+            reward=Fraction(reward) if reward is not None else None,
+            obs=obs,
+            cubes=n_cubes
+        )
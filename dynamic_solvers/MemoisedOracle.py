@@ -0,0 +1,145 @@
+"""
+Memoised POMDP Oracle
+=====================
+
+Memoisation of POMDP evaluations around a Z3 (`Z3Executor.evaluate_pomdp`) or Storm
+(`StormExecutor.evaluate_pomdp_fsc_cli`) oracle, for learning loops that re-sample the same observation functions.
+
+Observation functions are keyed canonically: POP observation classes are relabelled in order of first occurrence
+(renaming the classes does not change the POMDP), SSP observation functions are reduced to their sensor bitsets.
+Entries are bounded by an LRU size and can be persisted to a JSON file across runs.
+"""
+
+import json
+import os
+from collections import OrderedDict
+from dataclasses import replace, asdict
+from fractions import Fraction
+from typing import Optional, Any
+
+from z3 import sat, unsat, unknown
+
+from Z3SolverResult import Z3SolverResult
+from builders.InstanceCache import InstanceCache
+from builders.POMDPAdapter import POMDPAdapter
+from builders.TPMCFactory import OOPVariant
+
+_CHECK_SAT_RESULTS = {str(result): result for result in (sat, unsat, unknown)}
+
+
+class MemoisedOracle:
+    """
+    LRU memo of the evaluations of one POMDP by a Z3 or Storm oracle, exposing the evaluation method of the oracle.
+
+    Results are returned as evaluated (solve time included), with the observation function of the query; Z3 models
+    are not kept. Timeouts are memoised with their timeout, and re-evaluated under a longer one only.
+    """
+    FORMAT_VERSION = 1
+
+    def __init__(self, oracle: Any, pomdp: POMDPAdapter, max_size: int = 4096, path: Optional[str] = None):
+        """
+        Args:
+            oracle: Z3Executor (prepared for the POMDP) or StormExecutor
+            pomdp: The POMDPAdapter instance evaluated
+            max_size: Number of memoised observation functions (least recently used ones are evicted)
+            path: JSON file the memo is loaded from (if present) and saved to
+        """
+        self.oracle = oracle
+        self.pomdp = pomdp
+        self.max_size = max_size
+        self.path = path
+        # Duck-typed, as the learners import the executors under two module paths
+        self.backend = 'z3' if hasattr(oracle, 'evaluate_pomdp') else 'storm'
+        self.entries: OrderedDict[str, tuple[Any, int]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def key(self, obs_function: list[int]) -> str:
+        """Canonical key of an observation function (goal included, as -1)."""
+        if self.pomdp.mode == OOPVariant.SSP:
+            return format(sum(1 << state for state, sensor in enumerate(obs_function) if sensor == 1), 'x')
+        labels: dict[int, int] = {}
+        return ','.join(str(-1 if obs == -1 else labels.setdefault(int(obs), len(labels))) for obs in obs_function)
+
+    def instance_key(self) -> str:
+        """Content address of the evaluated POMDP (and threshold, for Z3), guarding persisted memos."""
+        return f"{self.backend}-{InstanceCache.key(self.pomdp.spec, self.pomdp.threshold)}"
+
+    def evaluate(self, obs_function: list[int], timeout_ms: int) -> Any:
+        """Evaluate an observation function, from the memo if it holds a decisive (or long enough) evaluation."""
+        key = self.key(obs_function)
+        entry = self.entries.get(key)
+        if entry is not None and (not self._timed_out(entry[0]) or timeout_ms <= entry[1]):
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return replace(entry[0], obs=self.pomdp.extract_obs_solution(obs_function))
+
+        self.misses += 1
+        if self.backend == 'z3':
+            result = self.oracle.evaluate_pomdp(self.pomdp, obs_function, timeout_ms)
+            # Models are only valid in the solver's context (and across relabellings of POP classes)
+            self.entries[key] = (replace(result, model=None, reward_frac=None), timeout_ms)
+        else:
+            result = self.oracle.evaluate_pomdp_fsc_cli(self.pomdp, obs_function, timeout_ms)
+            self.entries[key] = (result, timeout_ms)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return result
+
+    def evaluate_pomdp(self, pomdp: POMDPAdapter, obs_function: list[int], timeout_ms: int) -> Z3SolverResult:
+        """Memoised `Z3Executor.evaluate_pomdp`."""
+        assert pomdp is self.pomdp and self.backend == 'z3'
+        result: Z3SolverResult = self.evaluate(obs_function, timeout_ms)
+        return result
+
+    def evaluate_pomdp_fsc_cli(self, pomdp: POMDPAdapter, obs_function: list[int], timeout_ms: int):
+        """Memoised `StormExecutor.evaluate_pomdp_fsc_cli`."""
+        assert pomdp is self.pomdp and self.backend == 'storm'
+        return self.evaluate(obs_function, timeout_ms)
+
+    def _timed_out(self, result: Any) -> bool:
+        return bool(result.result == unknown if self.backend == 'z3' else result.type == 'timeout')
+
+    def save(self) -> None:
+        """Write the memo to its file (atomic write)."""
+        assert self.path is not None, "No file to save the memo to"
+        entries = []
+        for key, (result, timeout_ms) in self.entries.items():
+            if self.backend == 'z3':
+                fields = {'solve_time': result.solve_time, 'result': str(result.result),
+                          'reward': str(result.reward) if result.reward is not None else None}
+            else:
+                fields = {name: value for name, value in asdict(result).items() if name != 'obs'}
+            entries.append([key, timeout_ms, fields])
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'format': self.FORMAT_VERSION, 'instance': self.instance_key(), 'entries': entries}, file)
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> None:
+        """Read the memo from its file, unless it was saved for another POMDP (or format)."""
+        assert self.path is not None, "No file to load the memo from"
+        with open(self.path, encoding='utf-8') as file:
+            data = json.load(file)
+        if data.get('format') != self.FORMAT_VERSION or data.get('instance') != self.instance_key():
+            return
+        if self.backend == 'storm':
+            from StormExecutor import StormResult
+        for key, timeout_ms, fields in data['entries'][-self.max_size:]:
+            # Z3SolverResult or StormResult
+            result: Any
+            if self.backend == 'z3':
+                result = Z3SolverResult(solve_time=fields['solve_time'], result=_CHECK_SAT_RESULTS[fields['result']],
+                                        reward=Fraction(fields['reward']) if fields['reward'] is not None else None)
+            else:
+                result = StormResult(**fields)
+            self.entries[key] = (result, timeout_ms)
+
+    def __getattr__(self, name):
+        """Delegate other attributes (e.g. `convert_storm_z3_result`) to the wrapped oracle."""
+        if name == 'oracle':
+            raise AttributeError(name)
+        return getattr(self.oracle, name)
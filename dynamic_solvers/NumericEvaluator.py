@@ -0,0 +1,262 @@
+"""
+Numeric POMDP Evaluator
+=======================
+
+Evaluate a POMDP under a fixed observation function and a fixed strategy (values of the strategy variables `X`)
+without SMT calls. The strategy induces a Markov chain over the successor table of the world (the table read by
+`World.navigate`); the expected rewards solve the linear system `v = 1 + P v` over its transient states, with
+`v[goal] = 0` and infinite rewards wherever the goal is not reached almost surely.
+
+The system is solved with NumPy: densely for small worlds, by block-tridiagonal elimination along the band of the
+successor table for large ones, or exactly over the rationals to certify a result (a rational reconstruction of the
+floating-point solution, checked against the system, else a sparse Gaussian elimination).
+"""
+
+import math
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Sequence
+
+import numpy as np
+from z3 import ModelRef, is_true, is_bool
+
+from builders.POMDPAdapter import POMDPAdapter
+from builders.TPMCFactory import OOPVariant
+
+# Largest number of transient states solved densely (larger chains are solved by banded elimination)
+DENSE_LIMIT = 2000
+
+
+@dataclass
+class ChainEvaluation:
+    """Expected rewards of the chain induced by an observation function and a strategy."""
+    # Expected reward of reaching the goal from each state (infinite if the goal is not reached almost surely)
+    values: np.ndarray | list[Fraction | float]
+    # Expected reward of the agent dropped uniformly in a non-goal state, as in `build_threshold_constraint`
+    reward: float | Fraction
+    # Solving method: 'dense', 'banded' or 'exact'
+    method: str
+
+
+def strategy_from_model(pomdp: POMDPAdapter, model: ModelRef) -> list[list[Fraction]]:
+    """Values of the strategy variables `X` of a POMDP in a Z3 model (unassigned variables are 0)."""
+    strategy = []
+    for row in pomdp.X:
+        values = [model.eval(x, model_completion=True) for x in row]
+        strategy.append([Fraction(int(is_true(value))) if is_bool(value) else value.as_fraction() for value in values])
+    return strategy
+
+
+class NumericEvaluator:
+    """
+    Evaluator of the observation functions and strategies of one POMDP (see `POMDPAdapter`).
+
+    Strategies are given as one row of action probabilities per strategy variable row of `pomdp.X`: per observation
+    class for POP, per sensor state and a last, default row (sensor off) for SSP.
+    """
+
+    def __init__(self, pomdp: POMDPAdapter, dense_limit: int = DENSE_LIMIT, max_denominator: int = 10 ** 6):
+        self.pomdp = pomdp
+        self.succ = np.asarray(pomdp.succ, dtype=np.int64)
+        self.size, self.n_actions = self.succ.shape
+        self.goal = pomdp.goal
+        self.dense_limit = dense_limit
+        # Largest denominator tried when reconstructing exact values from floating-point ones
+        self.max_denominator = max_denominator
+
+    def strategy_rows(self, obs_function: Sequence[int]) -> np.ndarray:
+        """Row of the strategy followed in each state under an observation function (the goal follows row 0)."""
+        obs = np.asarray(obs_function, dtype=np.int64)
+        assert len(obs) == self.size
+        if self.pomdp.mode == OOPVariant.SSP:
+            # Sensor states follow their own strategy (indexed without the goal), the others the default one
+            state_idx = np.arange(self.size) - (np.arange(self.size) > self.goal)
+            rows = np.where(obs == 1, state_idx, len(self.pomdp.X) - 1)
+        else:
+            rows = obs.copy()
+        rows[self.goal] = 0
+        return rows
+
+    def _transient(self, positive: np.ndarray) -> np.ndarray:
+        """
+        States reaching the goal almost surely, given the actions taken with positive probability: those from which
+        no state unable to reach the goal is reachable (the goal excluded).
+        """
+        def backward_closure(seed: np.ndarray) -> np.ndarray:
+            reached = seed.copy()
+            while True:
+                extended = reached | (positive & reached[self.succ]).any(axis=1)
+                if (extended == reached).all():
+                    return reached
+                reached = extended
+
+        goal = np.zeros(self.size, dtype=bool)
+        goal[self.goal] = True
+        stuck = ~backward_closure(goal)
+        transient = ~backward_closure(stuck)
+        transient[self.goal] = False
+        return transient
+
+    def evaluate(self, obs_function: Sequence[int], strategy: Sequence[Sequence[float | Fraction]],
+                 exact: bool = False) -> ChainEvaluation:
+        """
+        Expected rewards under an observation function and a strategy.
+
+        Args:
+            obs_function: Observation of each state (-1 for the goal), as for `Z3Executor.evaluate_pomdp`
+            strategy: Action probabilities per strategy row (see `strategy_from_model`)
+            exact: Solve over the rationals (the strategy is read as exact fractions)
+
+        Returns:
+            ChainEvaluation with per-state values and the uniform-start reward
+        """
+        rows = self.strategy_rows(obs_function)
+        if exact:
+            probabilities = np.array([[Fraction(p) for p in row] for row in strategy], dtype=object)[rows]
+        else:
+            probabilities = np.asarray(strategy, dtype=np.float64)[rows]
+        positive = probabilities > 0
+        probabilities[self.goal] = 0
+        positive[self.goal] = False
+        transient = self._transient(positive)
+
+        values: np.ndarray | list[Fraction | float]
+        reward: float | Fraction
+        if exact:
+            values, method = self._solve_exact(probabilities, transient), 'exact'
+            rewards = [value for s, value in enumerate(values) if s != self.goal]
+            reward = (math.inf if any(value == math.inf for value in rewards)
+                      else sum(rewards, Fraction(0)) / (self.size - 1))
+        else:
+            values, method = self._solve_float(probabilities, transient)
+            # Infinite values make the reward infinite
+            reward = float(np.delete(values, self.goal).sum()) / (self.size - 1)
+        return ChainEvaluation(values=values, reward=reward, method=method)
+
+    def _solve_float(self, probabilities: np.ndarray, transient: np.ndarray) -> tuple[np.ndarray, str]:
+        if transient.sum() <= self.dense_limit:
+            return self._solve_dense(probabilities, transient), 'dense'
+        return self._solve_banded(probabilities, transient), 'banded'
+
+    def _solve_dense(self, probabilities: np.ndarray, transient: np.ndarray) -> np.ndarray:
+        states = np.flatnonzero(transient)
+        position = np.full(self.size, -1, dtype=np.int64)
+        position[states] = np.arange(len(states))
+        # (I - P) restricted to the transient states: successors are transient or the goal (whose value is 0)
+        system = np.eye(len(states))
+        successors = position[self.succ[states]]
+        inner = successors >= 0
+        np.add.at(system, (np.nonzero(inner)[0], successors[inner]), -probabilities[states][inner])
+
+        values = np.full(self.size, np.inf)
+        values[self.goal] = 0.0
+        values[states] = np.linalg.solve(system, np.ones(len(states)))
+        return values
+
+    def _solve_banded(self, probabilities: np.ndarray, transient: np.ndarray) -> np.ndarray:
+        """
+        Block-tridiagonal elimination of (I - P) v = 1 along the band of the successor table: with blocks as wide as
+        the band (e.g. the width of a grid), O(n b^2) instead of the O(n^3) of a dense solve.
+        """
+        states = np.flatnonzero(transient)
+        m = len(states)
+        position = np.full(self.size, -1, dtype=np.int64)
+        position[states] = np.arange(m)
+        successors = position[self.succ[states]]
+        inner = successors >= 0
+        rows, columns = np.nonzero(inner)[0], successors[inner]
+        width = max(1, int(np.abs(rows - columns).max(initial=0)))
+        blocks = -(-m // width)
+
+        # Diagonal, lower and upper blocks of (I - P), padded with identity rows up to a multiple of the width
+        diagonal = np.tile(np.eye(width), (blocks, 1, 1))
+        lower = np.zeros((blocks, width, width))
+        upper = np.zeros((blocks, width, width))
+        coefficients = probabilities[states][inner]
+        offsets = columns // width - rows // width
+        for offset, matrix in ((0, diagonal), (-1, lower), (1, upper)):
+            selected = offsets == offset
+            np.add.at(matrix, (rows[selected] // width, rows[selected] % width, columns[selected] % width),
+                      -coefficients[selected])
+        rhs = np.zeros((blocks, width))
+        rhs.reshape(-1)[:m] = 1.0
+
+        # Forward elimination of the lower blocks, then back substitution
+        for k in range(1, blocks):
+            factor = np.linalg.solve(diagonal[k - 1].T, lower[k].T).T
+            diagonal[k] -= factor @ upper[k - 1]
+            rhs[k] -= factor @ rhs[k - 1]
+        x = np.zeros((blocks, width))
+        x[-1] = np.linalg.solve(diagonal[-1], rhs[-1])
+        for k in range(blocks - 2, -1, -1):
+            x[k] = np.linalg.solve(diagonal[k], rhs[k] - upper[k] @ x[k + 1])
+
+        values = np.full(self.size, np.inf)
+        values[self.goal] = 0.0
+        values[states] = x.reshape(-1)[:m]
+        return values
+
+    def _solve_exact(self, probabilities: np.ndarray, transient: np.ndarray) -> list[Fraction | float]:
+        """
+        Solve (I - P) v = 1 over the rationals. The floating-point solution is rounded to nearby fractions first: as
+        the system has a unique solution, fractions satisfying it exactly are the solution. Otherwise (e.g. values
+        with large denominators), the system is eliminated over the rationals.
+        """
+        states = np.flatnonzero(transient).tolist()
+        try:
+            floats, _ = self._solve_float(probabilities.astype(np.float64), transient)
+        except np.linalg.LinAlgError:
+            floats = None
+        if floats is not None and np.isfinite(floats[states]).all():
+            values: list[Fraction | float] = [math.inf] * self.size
+            values[self.goal] = Fraction(0)
+            for state in states:
+                values[state] = Fraction(floats[state]).limit_denominator(self.max_denominator)
+            if all(values[state] - sum((probabilities[state, a] * values[next_state]
+                                        for a, next_state in enumerate(self.succ[state].tolist())
+                                        if probabilities[state, a] != 0), Fraction(0)) == 1 for state in states):
+                return values
+        return self._eliminate(probabilities, transient)
+
+    def _eliminate(self, probabilities: np.ndarray, transient: np.ndarray) -> list[Fraction | float]:
+        """Sparse Gaussian elimination of (I - P) v = 1 over the rationals (no pivoting needed for M-matrices)."""
+        states = np.flatnonzero(transient).tolist()
+        rows: dict[int, dict[int, Fraction]] = {}
+        # Rows holding a nonzero coefficient in each column (kept up to date under fill-in)
+        users: dict[int, set[int]] = {state: set() for state in states}
+        rhs = {state: Fraction(1) for state in states}
+        for state in states:
+            row = {state: Fraction(1)}
+            for a, next_state in enumerate(self.succ[state].tolist()):
+                if transient[next_state] and probabilities[state, a] != 0:
+                    row[next_state] = row.get(next_state, Fraction(0)) - probabilities[state, a]
+            rows[state] = {column: value for column, value in row.items() if value != 0}
+            for column in rows[state]:
+                users[column].add(state)
+
+        for state in states:
+            row = rows[state]
+            pivot = row.pop(state)
+            for column in row:
+                row[column] /= pivot
+                users[column].discard(state)
+            rhs[state] /= pivot
+            for other in users.pop(state) - {state}:
+                factor = rows[other].pop(state)
+                for column, value in row.items():
+                    updated = rows[other].get(column, Fraction(0)) - factor * value
+                    if updated:
+                        rows[other][column] = updated
+                        users[column].add(other)
+                    else:
+                        rows[other].pop(column, None)
+                        users[column].discard(other)
+                rhs[other] -= factor * rhs[state]
+
+        values: list[Fraction | float] = [math.inf] * self.size
+        values[self.goal] = Fraction(0)
+        # The remaining coefficients of each row refer to states eliminated after it
+        for state in reversed(states):
+            values[state] = rhs[state] - sum((value * values[column] for column, value in rows[state].items()),
+                                             Fraction(0))
+        return values
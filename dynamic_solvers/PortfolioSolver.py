@@ -0,0 +1,167 @@
+"""
+Parallel Solver Portfolio
+=========================
+
+Race several configurations (encodings, constraint orders, Bellman formats, precisions, profiles) of the same
+OOP instance in separate processes. The first decisive (SAT/UNSAT) answer wins and the other racers are terminated,
+so the latency of a solve is the minimum over the configurations rather than that of a fixed default.
+Racing one configuration under several random seeds (`seed_configurations`) cuts the heavy tail of its runtimes.
+"""
+
+import queue
+import time
+from fractions import Fraction
+from multiprocessing import Queue, get_context
+from typing import Optional, Any, Unpack
+
+from z3 import sat, unsat, unknown, is_true, is_false, is_rational_value, ExprRef
+
+from Z3SolverResult import Z3SolverResult
+from builders.typedicts import ExtOperationParams
+
+# Named configurations, in order of preference (the first `n` are raced for a portfolio of size `n`)
+CONFIGURATIONS: dict[str, ExtOperationParams] = {
+    'default': {},
+    'real-encoding': {'bool_encoding': False},
+    'strict': {'precision': 'strict'},
+    'lra-simplex': {'profile': 'lra-simplex'},
+    'adapted-bellman': {'bellman_format': 'adapted'},
+    'budget-repair': {'budget_repair': True},
+    'bellman-first': {'order_constraints': [1, 0, 2, 3]},
+    'common-bellman': {'bellman_format': 'common'},
+}
+
+
+def applicable_configurations(variant: str, size: Optional[int] = None) -> dict[str, ExtOperationParams]:
+    """The first `size` (all if None) configurations applicable to an OOP variant."""
+    names = [name for name in CONFIGURATIONS
+             # Budget repair only relaxes the budget constraint of SSP instances
+             if not (name == 'budget-repair' and variant.lower() != 'ssp')]
+    return {name: CONFIGURATIONS[name] for name in names[:size]}
+
+
+def seed_configurations(size: int, base_seed: int = 0) -> dict[str, ExtOperationParams]:
+    """Seed race: `size` copies of the common configuration under the random seeds `base_seed`, `base_seed + 1`, ..."""
+    return {f'seed-{seed}': {'seed': seed} for seed in range(base_seed, base_seed + size)}
+
+
+def _observation_value(value: ExprRef) -> int:
+    """Picklable value of an observation variable in a model (booleans as 0/1)."""
+    if is_true(value) or is_false(value):
+        return int(is_true(value))
+    if is_rational_value(value):
+        return int(value.as_fraction())
+    return int(value.as_long())
+
+
+def _portfolio_worker(name: str, variant: str, world: str, instance_params: dict[str, Any], threshold: str,
+                      options: ExtOperationParams, timeout_ms: int, result_queue: Queue):
+    """Solve one configuration of the instance in its own process, publishing a picklable answer to the queue."""
+    try:
+        # Import here to ensure fresh imports in a new process
+        from Z3Executor import Z3Executor
+        from builders.TPMCFactory import TPMCFactory
+        from builders.enums import SolverProfile
+
+        tpmc_instance = TPMCFactory.create(variant, world, **instance_params, **options)
+        profile = SolverProfile.from_string(options.get('profile') or 'default')
+        if not Z3Executor.profile_fits(profile, tpmc_instance):
+            profile = SolverProfile.DEFAULT
+
+        solver = Z3Executor(tpmc_instance.ctx, verbose=False, profile=profile, seed=options.get('seed'))
+        solver.set_timeout(timeout_ms)
+        solver.prepare_constraints(tpmc_instance, threshold)
+        if tpmc_instance.budget_repair:
+            result = solver.solve_2_shot_repair(tpmc_instance, timeout_ms)
+        else:
+            result = solver.solve(timeout_ms)
+
+        # Z3 objects cannot cross processes: only the observation function of the model is shipped
+        obs = None
+        if result.model is not None:
+            obs = {decl.name(): _observation_value(result.model[decl])
+                   for decl in result.model.decls() if decl.name().startswith('ys')}
+        result_queue.put((name, str(result.result), result.solve_time,
+                          str(result.reward) if result.reward is not None else None, obs, None))
+        solver.cleanup()
+    except Exception as e:
+        result_queue.put((name, 'error', None, None, None, repr(e)))
+
+
+class PortfolioSolver:
+    """
+    Portfolio of configurations of one OOP instance, raced in separate processes.
+
+    The instance is given by its problem definition (variant, world, dimensions, goal, budget, determinism), from
+    which every racer builds its own tpMC through `TPMCFactory` under its configuration, merged over the common
+    operational options.
+    """
+
+    def __init__(self, variant: str, world: str, instance_params: dict[str, Any], threshold: str,
+                 configurations: dict[str, ExtOperationParams], verbose: bool = False,
+                 **options: Unpack[ExtOperationParams]):
+        self.variant = variant
+        self.world = world
+        self.instance_params = instance_params
+        self.threshold = threshold
+        self.configurations = configurations
+        self.verbose = verbose
+        self.options = options
+        # Extra wall-clock time granted to the racers beyond the solver timeout (instance building, start-up)
+        self.grace_s = 10.0
+
+    def solve(self, timeout_ms: int) -> Z3SolverResult:
+        """
+        Race the configurations until the first SAT/UNSAT answer, terminating the other racers.
+
+        Returns:
+            Result of the winning configuration (observation function in `obs`, without a Z3 model), or UNKNOWN
+            once every racer gave up or the timeout expired
+        """
+        # Racers are not forked from this process, which may still run a timed-out check (see `BatchPOMDPEvaluator`)
+        context = get_context('forkserver')
+        result_queue: Queue = context.Queue()
+        processes = {
+            name: context.Process(target=_portfolio_worker, daemon=True,
+                                  args=(name, self.variant, self.world, self.instance_params, self.threshold,
+                                        {**self.options, **configuration}, timeout_ms, result_queue))
+            for name, configuration in self.configurations.items()
+        }
+
+        deadline = time.monotonic() + timeout_ms / 1000.0 + self.grace_s
+        # Raw answers of the racers, by name (see `_portfolio_worker`)
+        answers: dict[str, tuple[Any, ...]] = {}
+        winner = None
+        try:
+            for process in processes.values():
+                process.start()
+            while len(answers) < len(processes) and winner is None:
+                try:
+                    answer = result_queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                name, status, *_, error = answer
+                answers[name] = answer
+                if self.verbose:
+                    print(f"    Portfolio racer `{name}` -> {status.upper()}{f" ({error})" if error else ""}")
+                if status in (str(sat), str(unsat)):
+                    winner = answer
+        finally:
+            # Terminate the losers (and any racer past the deadline)
+            for process in processes.values():
+                if process.is_alive():
+                    process.terminate()
+            for process in processes.values():
+                process.join()
+
+        if winner is None:
+            return Z3SolverResult(solve_time=timeout_ms / 1000.0, result=unknown)
+
+        name, status, solve_time, reward, obs, _ = winner
+        return Z3SolverResult(
+            solve_time=solve_time,
+            result=sat if status == str(sat) else unsat,
+            reward=Fraction(reward) if reward is not None else None,
+            obs=obs,
+            portfolio_winner=name
+        )
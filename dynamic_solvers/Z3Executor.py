@@ -1,37 +1,99 @@
 import gc
 import time
+from copy import deepcopy
+from fractions import Fraction
+from itertools import batched
+from math import floor
+from typing import Optional, Iterable
 
-from z3 import (set_option, Solver, Context,
-                unsat, sat, unknown, BoolRef)
+from z3 import (set_option, set_param, get_param, Solver, Optimize, Context, Bool, Implies, ModelRef, Then,
+                unsat, sat, unknown, BoolRef, is_rational_value)
 
 from Z3SolverResult import Z3SolverResult
+from builders.InstanceCache import InstanceCache
 from builders.OOPSpec import OOPSpec
 from builders.POMDPAdapter import POMDPAdapter
+from builders.enums import SolverBackend, SolverProfile, RewardEncoding, ObservationEncoding
+
+# Tactic pipeline (None keeps Z3's default solver) and solver parameters of each solver profile
+SOLVER_PROFILES: dict[SolverProfile, tuple[Optional[tuple[str, ...]], dict[str, object]]] = {
+    SolverProfile.DEFAULT: (None, {}),
+    SolverProfile.LRA_SIMPLEX: (('simplify', 'propagate-values', 'solve-eqs', 'smt'),
+                                {'smt.arith.solver': 2}),
+    SolverProfile.SAT_BITBLAST: (('simplify', 'propagate-values', 'card2bv', 'bit-blast', 'sat'), {}),
+    # `card2bv` rewrites the PbEq constraints of boolean encodings, which nlsat does not accept
+    SolverProfile.NLSAT: (('simplify', 'propagate-values', 'card2bv', 'qfnra-nlsat'), {}),
+    SolverProfile.PB_SOLVER: (None, {'smt.pb.learn_complements': True, 'smt.pb.conflict_frequency': 100}),
+}
 
 
 class Z3Executor:
-    solver: Solver
+    solver: Solver | Optimize
     verbose: bool
+    # Constraints handed to the solver per `add` call while streaming from the builders
+    CHUNK_SIZE = 4096
 
-    def __init__(self, ctx: Context, verbose: bool):
+    def __init__(self, ctx: Context, verbose: bool, backend: SolverBackend = SolverBackend.SOLVER,
+                 profile: SolverProfile = SolverProfile.DEFAULT, seed: Optional[int] = None):
         self.verbose = verbose
-        self.solver = Solver(ctx=ctx)
+        self.backend = backend
+        self.profile = profile
+        tactics, params = SOLVER_PROFILES[profile]
+        if backend is SolverBackend.OPTIMIZE:
+            assert tactics is None, f"Profile {profile.name} builds a tactic solver, not available to Optimize"
+            self.solver = Optimize(ctx=ctx)
+        else:
+            self.solver = Then(*tactics, ctx=ctx).solver() if tactics is not None else Solver(ctx=ctx)
+        for name, value in params.items():
+            self.solver.set(name, value)
+        self.seed = seed
+        # Global parameters overridden by this executor, with their previous values (restored by `cleanup`)
+        self._global_params: dict[str, str] = {}
+        if seed is not None:
+            if not isinstance(self.solver, Optimize):
+                # Seed the randomised heuristics (phase selection, restarts, case splits) of the solver
+                self.solver.set('random_seed', seed)
+            # Solver-level names of the core seeds differ across Z3 versions (and `z3.Optimize` takes none): seed the
+            # SMT and SAT cores through the global parameters, which every version reads when creating them
+            for name in ('smt.random_seed', 'sat.random_seed'):
+                self._global_params[name] = get_param(name)
+                set_param(name, seed)
         self.exp_rew_formula = None
+        # Optimize backend: handle of the reward objective, and the improving models of the running check
+        self.objective = None
+        self.incumbents: list[tuple[float, Fraction]] = []
+        self.incumbent_model: Optional[ModelRef] = None
+        self._check_start = 0.0
         # Set global Z3 options (call once per solver instance)
         set_option(max_args=1000000, max_lines=100000000)
 
+    @staticmethod
+    def profile_fits(profile: SolverProfile, spec: OOPSpec) -> bool:
+        """Whether the logical fragment of an instance is within the reach of a solver profile."""
+        if profile is SolverProfile.LRA_SIMPLEX:
+            # Linear only for deterministic strategies with the boolean encoding (no products of variables)
+            return bool(spec.determinism and spec.bool_encoding)
+        if profile is SolverProfile.SAT_BITBLAST:
+            # Bit-blasting needs every variable boolean or bit-vector
+            return (spec.reward_encoding is RewardEncoding.BITVEC
+                    and spec.observation_encoding is not ObservationEncoding.INT)
+        if profile is SolverProfile.NLSAT:
+            return (spec.reward_encoding is RewardEncoding.REAL
+                    and spec.observation_encoding is ObservationEncoding.ONE_HOT)
+        return True
+
     def set_timeout(self, timeout_ms: int):
         """Set solver-specific timeout."""
         self.solver.set("timeout", timeout_ms)
         return
 
-    def wrap_timeout_check(self, timeout_ms: int):
+    def wrap_timeout_check(self, timeout_ms: int, *assumptions: BoolRef):
         import threading
         result = []
 
         def check_wrapper():
             try:
-                result.append(self.solver.check())
+                result.append(self.solver.check(*assumptions))
             except:
                 result.append(unknown)
 
@@ -42,7 +104,8 @@ class Z3Executor:
         if thread.is_alive():
             # Signal Z3 to interrupt its computation
             try:
-                self.solver.interrupt()
+                # `z3.Optimize` has no interrupt of its own - interrupt its context instead
+                self.solver.interrupt() if isinstance(self.solver, Solver) else self.solver.ctx.interrupt()
                 thread.join(timeout=5.0)  # Give Z3 time to cleanup gracefully
             except:
                 del thread
@@ -51,29 +114,64 @@ class Z3Executor:
 
         return result[0] if len(result) > 0 else unknown
 
-    def prepare_constraints(self, spec: OOPSpec | POMDPAdapter, threshold: str):
+    def prepare_constraints(self, spec: OOPSpec | POMDPAdapter, threshold: Optional[str],
+                            cache: Optional[InstanceCache] = None):
         """
         Prepare static constraints for either tpMC synthesis or POMDP evaluation.
 
         Args:
             spec: Either an OOPSpec (tpMC) or POMDPAdapter (POMDP)
-            threshold: Threshold constraint string (e.g., "<= 10")
+            threshold: Threshold constraint string (e.g., "<= 10"), or None for an unbounded reward (tpMC mode only)
+            cache: On-disk cache of tpMC constraint sets, loaded on a hit and filled on a miss (tpMC mode only)
         """
+        cached = None
+        base_constraints: Iterable[BoolRef]
         if isinstance(spec, POMDPAdapter):
             # POMDP mode: only add observation-independent constraints
             # Bellman equations will be added per observation function via add_pomdp_observation()
+            assert threshold is not None, "POMDP evaluation requires a threshold"
             base_constraints = spec.build_y_independent_constraints(threshold)
         else:
             # tpMC mode: add all constraints (including observation synthesis)
+            if self.backend is SolverBackend.OPTIMIZE and spec.determinism and not spec.bool_encoding:
+                # Z3 cannot minimise over products of 0/1 real rates and rewards: linearise them
+                spec.linear_rates = True
             spec.declare_variables()
-            base_constraints = spec.collect_constraints(threshold)
+            cached = cache.load(spec, threshold) if cache is not None else None
+            if cached is not None:
+                base_constraints = cached
+                # Only the reward evaluator is rebuilt (over the declared variables) on a cache hit
+                spec.build_threshold_constraint(threshold)
+            else:
+                base_constraints = spec.collect_constraints(threshold)
+
+        # Stream constraints in bounded chunks (the builders never materialise the full constraint list)
+        for chunk in batched(base_constraints, self.CHUNK_SIZE):
+            self.solver.add(*chunk)
+        # The reward evaluator is set once the threshold constraint has been streamed
         self.exp_rew_formula = spec.exp_rew_evaluator
-        self.solver.add(base_constraints)
+
+        if cache is not None and cached is None and not isinstance(spec, POMDPAdapter):
+            cache.store(spec, threshold, self.solver.sexpr())
+
+        if self.backend is SolverBackend.OPTIMIZE and not isinstance(spec, POMDPAdapter):
+            # Minimise the expected reward (the threshold, if any, is kept as a constraint)
+            self.objective = self.solver.minimize(self.exp_rew_formula)
+            self.solver.set_on_model(self._record_incumbent)
+
+    def _record_incumbent(self, model: ModelRef):
+        """Optimize callback on every improving model (only valid during the callback, hence copied)."""
+        reward = model.eval(self.exp_rew_formula).as_fraction()
+        self.incumbents.append((time.process_time() - self._check_start, reward))
+        self.incumbent_model = deepcopy(model)
+        if self.verbose:
+            print(f" 📈  Incumbent reward {reward} after {self.incumbents[-1][0]:.3f}s")
 
     def evaluate_pomdp(self, pomdp: POMDPAdapter, obs_function: list[int], timeout_ms: int,
                        extra_constraints: None | list[BoolRef] = None) -> Z3SolverResult:
         """
-        Evaluate a POMDP with a specific observation function using push/pop.
+        Evaluate a POMDP with a specific observation function using push/pop, or under the selector literals of the
+        observation function in assumption mode (`POMDPAdapter(..., assumptions=True)`), keeping learned lemmas.
 
         This is more efficient than creating a new solver for each observation function.
 
@@ -86,9 +184,13 @@ class Z3Executor:
         Returns:
             ResultOOP with solve time, result, reward, and model
         """
+        assert len(obs_function) == pomdp.size
+        if pomdp.assumptions:
+            return self._evaluate_under_selectors(pomdp, obs_function, pomdp.collect_selectors(obs_function),
+                                                  timeout_ms, extra_constraints)
+
         # Push a new scope
         self.solver.push()
-        assert len(obs_function) == pomdp.size
 
         try:
             # Add Bellman constraints for this observation function
@@ -106,6 +208,53 @@ class Z3Executor:
             # Pop the scope (removes observation-specific constraints)
             self.solver.pop()
 
+    def reevaluate_pomdp(self, pomdp: POMDPAdapter, base: list[int], delta: dict[int, int], timeout_ms: int,
+                         extra_constraints: None | list[BoolRef] = None) -> Z3SolverResult:
+        """
+        Evaluate a POMDP with the observation function `base` changed on a few states, given as `delta`.
+
+        In assumption mode only the selector literals of the changed states are rebuilt (see
+        `POMDPAdapter.collect_delta_selectors`); otherwise the changed observation function is evaluated in full.
+
+        Args:
+            pomdp: The POMDPAdapter instance (must have had prepare_constraints called)
+            base: An observation function, usually one evaluated before
+            delta: New observation of each changed state
+            timeout_ms: Solver timeout in milliseconds
+            extra_constraints: Any other relevant constraint(s) to pass to the solver
+
+        Returns:
+            ResultOOP with solve time, result, reward, and model
+        """
+        assert len(base) == pomdp.size
+        if pomdp.assumptions:
+            obs_function, selectors = pomdp.collect_delta_selectors(base, delta)
+            return self._evaluate_under_selectors(pomdp, obs_function, selectors, timeout_ms, extra_constraints)
+
+        obs_function = list(base)
+        for state, obs in delta.items():
+            obs_function[state] = obs
+        return self.evaluate_pomdp(pomdp, obs_function, timeout_ms, extra_constraints)
+
+    def _evaluate_under_selectors(self, pomdp: POMDPAdapter, obs_function: list[int], selectors: list[BoolRef],
+                                  timeout_ms: int, extra_constraints: None | list[BoolRef]) -> Z3SolverResult:
+        """Check the selector literals of an observation function as assumptions (assumption mode)."""
+        # Groups guarded on first use (lazy storage) are asserted for good, outside of any scope
+        pending = pomdp.collect_pending_constraints()
+        if pending:
+            self.solver.add(pending)
+        # Only the extra constraints (if any) need a scope of their own
+        if extra_constraints:
+            self.solver.push()
+            self.solver.add(extra_constraints)
+        try:
+            result = self.solve(timeout_ms, *selectors)
+            result.obs = pomdp.extract_obs_solution(obs_function)
+            return result
+        finally:
+            if extra_constraints:
+                self.solver.pop()
+
     def solve_2_shot_repair(self, tpmc: OOPSpec, timeout_ms: int) -> Z3SolverResult:
         # First shot without budget constraint
         result = self.solve(timeout_ms)
@@ -121,7 +270,138 @@ class Z3Executor:
             self.solver.pop()
         return result
 
-    def solve(self, timeout_ms: int) -> Z3SolverResult:
+    def optimize(self, spec: OOPSpec, timeout_ms: int, precision: Fraction,
+                 cache: Optional[InstanceCache] = None) -> Z3SolverResult:
+        """
+        Approximate the optimal expected reward of a tpMC instance by bisection over the threshold.
+
+        All constraints but the threshold are asserted once; every probed bound `<= mid` is guarded by a fresh
+        assumption literal, so the lemmas learned by earlier probes are kept across the search. A model tightens
+        the upper bound to its own reward, a refutation raises the lower bound to the probed threshold, and the
+        fully observable reward is the initial lower bound. The timeout covers the whole search.
+
+        Deterministic strategies have integral expected rewards per state, so their optimum is a multiple of
+        1/(size-1): the bounds and probes are rounded to that grid, and the search ends on the exact optimum
+        (also with relaxed Bellman inequalities, whose models only over-approximate the reward of their strategy).
+
+        Args:
+            spec: The tpMC instance (variables not yet declared)
+            timeout_ms: Solver timeout for all probes together, in milliseconds
+            precision: Maximal gap between the bounds of the optimal reward
+            cache: On-disk cache of the (threshold-free) constraint set
+
+        Returns:
+            Result of the best model found, with the lower bound of the optimal reward
+        """
+        assert self.backend is SolverBackend.SOLVER, "Threshold bisection requires the solver backend"
+        self.prepare_constraints(spec, None, cache)
+        # States that cannot reach the goal (distance -1) contribute no lower bound
+        lower = Fraction(int(spec.goal_distances().clip(min=0).sum()), spec.size - 1)
+
+        # Checks under assumptions run in Z3's incremental core, which lacks the nonlinear arithmetic procedure
+        # needed by randomised (or real-encoded) strategies: those probes re-check the base assertions from scratch
+        incremental = spec.determinism and spec.bool_encoding
+        base = None if incremental else self.solver.assertions()
+
+        step = Fraction(1, spec.size - 1) if spec.determinism else None
+
+        def round_down(reward: Fraction) -> Fraction:
+            return floor(reward / step) * step if step is not None else reward
+
+        best = self.solve(timeout_ms)
+        if best.result != sat:
+            # No strategy to start the bisection from
+            return best
+        solve_time = best.solve_time
+        assert isinstance(best.reward, Fraction), "The models of the solver backend have exact rewards"
+        upper = round_down(best.reward)
+        probe = 0
+        while upper - lower > precision and solve_time * 1000 < timeout_ms:
+            mid = round_down((lower + upper) / 2)
+            probe += 1
+            bound = spec.build_threshold_constraint(f"<= {mid.numerator}/{mid.denominator}")
+            if incremental:
+                guard = Bool(f'opt{probe}', spec.ctx)
+                self.solver.add(Implies(guard, bound, spec.ctx))
+                result = self.solve(int(timeout_ms - solve_time * 1000), guard)
+            else:
+                self.solver.reset()
+                self.solver.add(base, bound)
+                result = self.solve(int(timeout_ms - solve_time * 1000))
+            solve_time += result.solve_time
+            if result.result == sat:
+                assert isinstance(result.reward, Fraction)
+                best, upper = result, round_down(result.reward)
+            elif result.result == unsat:
+                lower = mid + step if step is not None else mid
+            else:
+                break
+
+        if self.verbose:
+            print(f" 🎯  Optimal reward in [{lower}, {upper}] after {probe} bisection probes")
+        best.solve_time = solve_time
+        # Reward of the best strategy, which the model value (an invariant) may over-approximate
+        best.reward = upper
+        best.reward_lower_bound = lower
+        return best
+
+    def sweep_budget(self, spec: OOPSpec, threshold: str, timeout_ms: int,
+                     cache: Optional[InstanceCache] = None) -> Z3SolverResult:
+        """
+        Search the smallest budget meeting the threshold, on one incremental solver.
+
+        The instance is declared once for its (maximal) budget with `budget_sweep` set, so that every smaller
+        budget is selected by the assumption literals `spec.budget_assumptions(b)`. More observations never hurt
+        the optimal reward, hence the budget axis is bisected: a SAT probe lowers the upper end, an UNSAT one raises
+        the lower end. The timeout covers the whole search.
+
+        Args:
+            spec: The tpMC instance, created with `budget_sweep=True` (variables not yet declared)
+            threshold: Threshold constraint string (e.g., "<= 10")
+            timeout_ms: Solver timeout for all probes together, in milliseconds
+            cache: On-disk cache of the constraint set
+
+        Returns:
+            Result of the smallest sufficient budget, or the (UNSAT/UNKNOWN) result of the maximal budget
+        """
+        assert spec.budget_sweep, "Budget sweep requires an instance created with `budget_sweep=True`"
+        assert self.backend is SolverBackend.SOLVER, "Budget sweep requires the solver backend"
+        self.prepare_constraints(spec, threshold, cache)
+
+        # Nonlinear instances cannot run in Z3's incremental core (see `optimize`): probes assert their selectors
+        incremental = spec.determinism and spec.bool_encoding
+        base = None if incremental else self.solver.assertions()
+
+        def probe(budget: int) -> Z3SolverResult:
+            remaining_ms = int(timeout_ms - solve_time * 1000)
+            if incremental:
+                return self.solve(remaining_ms, *spec.budget_assumptions(budget))
+            self.solver.reset()
+            self.solver.add(base, *spec.budget_assumptions(budget))
+            return self.solve(remaining_ms)
+
+        solve_time = 0.0
+        best = probe(spec.budget)
+        solve_time += best.solve_time
+        lower, upper = spec.min_budget, spec.budget
+        while best.result == sat and lower < upper and solve_time * 1000 < timeout_ms:
+            mid = (lower + upper) // 2
+            result = probe(mid)
+            solve_time += result.solve_time
+            if result.result == sat:
+                best, upper = result, mid
+            elif result.result == unsat:
+                lower = mid + 1
+            else:
+                break
+
+        if self.verbose and best.result == sat:
+            print(f" 💰  Smallest sufficient budget in [{lower}, {upper}]")
+        best.solve_time = solve_time
+        best.budget = upper if best.result == sat else None
+        return best
+
+    def solve(self, timeout_ms: int, *assumptions: BoolRef) -> Z3SolverResult:
 
         if self.verbose:
             print(" ⚡  Solving...")
@@ -129,7 +409,9 @@ class Z3Executor:
 
         # Solving phase timing for benchmarks (CPU time)
         cpu_start = time.process_time()
-        result = self.wrap_timeout_check(timeout_ms)
+        self._check_start = cpu_start
+        self.incumbents, self.incumbent_model = [], None
+        result = self.wrap_timeout_check(timeout_ms, *assumptions)
         cpu_end = time.process_time()
         solve_time = cpu_end - cpu_start
 
@@ -149,12 +431,27 @@ class Z3Executor:
             if self.verbose:
                 print(' ❔  Unknown!')
 
+        lower_bound = None
+        if self.objective is not None:
+            if result == sat:
+                # The model of a completed optimisation is optimal
+                lower_bound = reward
+            elif result == unknown and self.incumbent_model is not None:
+                # Cut short by the timeout: report the best incumbent and the bound proven so far
+                model = self.incumbent_model
+                reward_frac = model.eval(self.exp_rew_formula)
+                reward = reward_frac.as_fraction()
+                lower = self.objective.lower()
+                lower_bound = lower.as_fraction() if is_rational_value(lower) else None
+
         return Z3SolverResult(
             solve_time=solve_time,
             result=result,
             reward=reward,
             reward_frac=reward_frac,
-            model=model
+            model=model,
+            reward_lower_bound=lower_bound,
+            incumbents=list(self.incumbents) if self.objective is not None else None
         )
 
     def cleanup(self):
@@ -162,6 +459,13 @@ class Z3Executor:
         if self.solver is not None:
             del self.solver
             self.solver = None
+        # Later executors of the process must not inherit the seed
+        for name, value in self._global_params.items():
+            set_param(name, value)
+        self._global_params = {}
+        # The objective handle keeps its `z3.Optimize` alive
+        self.objective = None
+        self.incumbent_model = None
         gc.collect()
 
     def push(self):
@@ -5,6 +5,7 @@ Z3 Solving Result Data
 Solving metrics & SMT model/reward for location tpMCs and POMDPs in the OOP framework.
 """
 
+from fractions import Fraction
 from typing import Optional
 from dataclasses import dataclass
 
@@ -19,7 +20,17 @@ class Z3SolverResult:
     # memory_used: int  # bytes
     result: CheckSatResult
     model: Optional[ModelRef] = None
-    reward: Optional[float] = None
+    reward: Optional[Fraction | float] = None
     reward_frac: Optional[ArithRef] = None
     obs: Optional[dict[str, int]] = None
+    # Lower bound of the optimal reward (threshold optimisation only; the reward is the upper bound)
+    reward_lower_bound: Optional[Fraction] = None
+    # Smallest sufficient budget (budget sweep only)
+    budget: Optional[int] = None
+    # Anytime incumbents as (CPU seconds into the check, reward) pairs (Optimize backend only)
+    incumbents: Optional[list[tuple[float, Fraction]]] = None
+    # Name of the configuration answering first (portfolio only)
+    portfolio_winner: Optional[str] = None
+    # Number of cubes the instance was split into (cube-and-conquer only)
+    cubes: Optional[int] = None
     # constraint_count: int = 0
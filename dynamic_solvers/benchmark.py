@@ -6,6 +6,7 @@ Leverages existing dynamic_solvers classes for robust execution.
 import argparse
 import csv
 import gc
+import itertools
 import multiprocessing
 import os
 import sys
@@ -32,6 +33,7 @@ class BenchmarkConfig(argparse.Namespace):
     length: int | None = None
     width: int | None = None
     height: int | None = None
+    adjacency: str | None = None
     deterministic: bool = False
     timeout: int = TIMEOUT
 
@@ -43,8 +45,15 @@ def _instance_worker(config: BenchmarkConfig, result_queue: Queue, hyperparams:
      """
     try:
         # Import here to ensure fresh imports in a new process
+        from fractions import Fraction
         from Z3Executor import Z3Executor
+        from builders.InstanceCache import InstanceCache
         from builders.TPMCFactory import TPMCFactory
+        from builders.enums import SolverBackend, SolverProfile
+
+        if hyperparams.get('reward_encoding', 'real') != 'real' and (not config.deterministic or not hyperparams.get('bool_encoding', True)):
+            # Integral rewards only fit deterministic strategies - randomised rows of the config keep real rewards
+            hyperparams = {**hyperparams, 'reward_encoding': 'real'}
 
         # Create TPMC instance based on configuration & operational hyperparameters
         # Factory handles string-to-enum conversion at the API boundary
@@ -53,6 +62,7 @@ def _instance_worker(config: BenchmarkConfig, result_queue: Queue, hyperparams:
             length=config.length,
             width=config.width,
             height=config.height,
+            adjacency=config.adjacency,
             goal=config.goal,
             budget=config.budget,
             determinism=config.deterministic,
@@ -60,15 +70,49 @@ def _instance_worker(config: BenchmarkConfig, result_queue: Queue, hyperparams:
         )
 
         # Create a solver and configure it
-        solver = Z3Executor(tpmc_instance.ctx, verbose=False)
+        profile = SolverProfile.from_string(hyperparams.get('profile') or 'default')
+        if not Z3Executor.profile_fits(profile, tpmc_instance):
+            # Rows outside the fragment of the profile (e.g. randomised rows for `lra-simplex`) keep the default one
+            profile = SolverProfile.DEFAULT
+        solver = Z3Executor(tpmc_instance.ctx, verbose=False,
+                            backend=SolverBackend.from_string(hyperparams.get('backend') or 'solver'),
+                            profile=profile, seed=hyperparams.get('seed'))
         solver.set_timeout(config.timeout)
+        cache = InstanceCache(hyperparams['cache_dir']) if hyperparams.get('cache_dir') else None
 
         if hyperparams["cluster"] and config.variant.lower() == 'pop':
             from ClusterPOPSolver import ClusterPOPSolver
             cluster_solver = ClusterPOPSolver(solver, tpmc_instance, verbose=True, threshold=config.threshold)
             result = cluster_solver.solve(timeout_ms=config.timeout)
+        elif hyperparams.get('portfolio') is not None or hyperparams.get('seed_race'):
+            # The worker is not a daemon, so the racers can be spawned from within it
+            from PortfolioSolver import PortfolioSolver, applicable_configurations, seed_configurations
+            instance_params = dict(length=config.length, width=config.width, height=config.height,
+                                   adjacency=config.adjacency, goal=config.goal, budget=config.budget,
+                                   determinism=config.deterministic)
+            configurations = (applicable_configurations(config.variant, hyperparams['portfolio'] or None)
+                              if hyperparams.get('portfolio') is not None
+                              else seed_configurations(hyperparams['seed_race'], hyperparams.get('seed') or 0))
+            portfolio = PortfolioSolver(config.variant, config.world, instance_params, config.threshold,
+                                        configurations, **hyperparams)
+            result = portfolio.solve(config.timeout)
+        elif hyperparams.get('cube_and_conquer'):
+            from CubeAndConquerSolver import CubeAndConquerSolver
+            instance_params = dict(length=config.length, width=config.width, height=config.height,
+                                   adjacency=config.adjacency, goal=config.goal, budget=config.budget,
+                                   determinism=config.deterministic)
+            cube_solver = CubeAndConquerSolver(config.variant, config.world, instance_params, config.threshold,
+                                               hyperparams['cube_and_conquer'], **hyperparams)
+            result = cube_solver.solve(config.timeout)
+        elif hyperparams.get('optimize'):
+            # Threshold of the configuration is ignored: the optimal reward is bisected instead
+            result = solver.optimize(tpmc_instance, config.timeout, Fraction(hyperparams['optimize']), cache)
+        elif hyperparams.get('budget_sweep'):
+            result = solver.sweep_budget(tpmc_instance, config.threshold, config.timeout, cache)
         else:
-            solver.prepare_constraints(tpmc_instance, config.threshold)
+            # The optimize backend minimises the reward of the configuration rather than checking its threshold
+            threshold = None if solver.backend is SolverBackend.OPTIMIZE else config.threshold
+            solver.prepare_constraints(tpmc_instance, threshold, cache)
             if hyperparams.get('budget_repair', False):
                 result = solver.solve_2_shot_repair(tpmc_instance, config.timeout)
             else:
@@ -85,10 +129,14 @@ def _instance_worker(config: BenchmarkConfig, result_queue: Queue, hyperparams:
             'variant': config.variant,
             'model': create_model_description(config),
             'threshold': config.threshold,
-            'budget': config.budget,
+            # Budget sweeps report the smallest sufficient budget (the configured one is the maximum)
+            'budget': result.budget if result.budget is not None else config.budget,
             'time': result.solve_time if result.solve_time + 2 < config.timeout / 1000.0 else -1.0,
             'reward': reward_str,
             'status': result_status,
+            'profile': profile.name.lower().replace('_', '-'),
+            'winner': result.portfolio_winner,
+            'seed': hyperparams.get('seed'),
             'error': None
         }
 
@@ -103,6 +151,7 @@ def _instance_worker(config: BenchmarkConfig, result_queue: Queue, hyperparams:
             'time': None,
             'reward': "N/A",
             'status': "ERROR",
+            'seed': hyperparams.get('seed'),
             'error': e
         })
 
@@ -115,6 +164,8 @@ def create_model_description(config: BenchmarkConfig) -> str:
         return f"G({config.width}x{config.height})"
     elif config.world == 'maze':
         return f"M({config.width}x{config.height})"
+    elif config.world == 'graph':
+        return f"Gr({os.path.basename(config.adjacency or '?')})"
     return f"{config.world.upper()}(?)"
 
 
@@ -220,6 +271,7 @@ def load_configurations_from_csv_file(csv_file: str) -> List[BenchmarkConfig]:
                     length=int(row['length']) if row.get('length', '').strip() else None,
                     width=int(row['width']) if row.get('width', '').strip() else None,
                     height=int(row['height']) if row.get('height', '').strip() else None,
+                    adjacency=row['adjacency'].strip() if (row.get('adjacency') or '').strip() else None,
                     deterministic=row.get('deterministic', '').strip().lower() in ['true', '1', 'yes'],
                     timeout=int(row.get('timeout', str(TIMEOUT))),
                 )
@@ -238,6 +290,8 @@ class BenchmarkRunner:
                  trials: int = 1, **hyperparams: Unpack[ExtOperationParams]):
         self.output_csv = output_csv
         self.results: List[Dict[str, Any]] = []
+        # Individual trials of seeded runs (per-seed runtimes, before aggregation)
+        self.seed_results: List[Dict[str, Any]] = []
         self.verbose = benchmark_verbose
         self.docker_env = is_docker_environment()
         self.trials = trials
@@ -259,15 +313,16 @@ class BenchmarkRunner:
 
         return all_configs
 
-    def execute_isolated_trial(self, config: BenchmarkConfig) -> Dict[str, Any]:
-        """Run a single trial of a problem instance in an isolated process."""
+    def execute_isolated_trial(self, config: BenchmarkConfig, seed: int | None = None) -> Dict[str, Any]:
+        """Run a single trial of a problem instance in an isolated process (under a random seed, if any)."""
         model_desc = create_model_description(config)
 
         # Create queue for result communication from processes
         result_queue : Queue[dict] = Queue()
 
         # Solve instance in a separate process, passing operational params
-        process = Process(target=_instance_worker, args=(config, result_queue, self.op_hyperparams))
+        hyperparams = self.op_hyperparams if seed is None else {**self.op_hyperparams, 'seed': seed}
+        process = Process(target=_instance_worker, args=(config, result_queue, hyperparams))
         process.start()
         process.join()  # Wait for completion
 
@@ -308,8 +363,12 @@ class BenchmarkRunner:
 
                 halo.text = f"Running trial ({trial + 1}/{self.trials}) ... {instance_text}"
 
-            trial_result = self.execute_isolated_trial(config)
+            # Seeded runs give every trial its own seed, so that the trials sample the runtime distribution
+            base_seed = self.op_hyperparams.get('seed')
+            trial_result = self.execute_isolated_trial(config, None if base_seed is None else base_seed + trial)
             trial_results.append(trial_result)
+        if self.op_hyperparams.get('seed') is not None:
+            self.seed_results.extend(trial_results)
 
         # Aggregate results if multiple trials
         if self.trials > 1:
@@ -382,7 +441,8 @@ class BenchmarkRunner:
             writer = csv.writer(file)
 
             # Write headers
-            writer.writerow(['Variant', 'Model', 'Threshold', 'Budget', 'Time (s)', 'Reward', 'Status', 'Error'])
+            writer.writerow(['Variant', 'Model', 'Threshold', 'Budget', 'Time (s)', 'Reward', 'Status', 'Profile',
+                             'Winner', 'Error'])
 
             # Write results
             for result in self.results:
@@ -394,6 +454,31 @@ class BenchmarkRunner:
                     f"{result['time']:.6f}" if result['time'] and result['time'] > 0 else "t.o.",
                     result['reward'] if result['reward'] is not None else "N/A",
                     result['status'],
+                    result.get('profile', self.op_hyperparams.get('profile') or 'default'),
+                    result.get('winner') or "",
+                    result['error'] or ""
+                ])
+
+        if self.op_hyperparams.get('seed') is not None:
+            self.save_seed_results_to_csv()
+
+    def save_seed_results_to_csv(self) -> None:
+        """Save the per-seed trials of seeded runs next to the results CSV, to quantify the runtime tail."""
+        root, ext = os.path.splitext(self.output_csv)
+        with open(f"{root}-seeds{ext or '.csv'}", 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['Variant', 'Model', 'Threshold', 'Budget', 'Seed', 'Time (s)', 'Reward', 'Status',
+                             'Error'])
+            for result in self.seed_results:
+                writer.writerow([
+                    result['variant'].upper(),
+                    result['model'],
+                    result['threshold'],
+                    result['budget'],
+                    result.get('seed'),
+                    f"{result['time']:.6f}" if result['time'] and result['time'] > 0 else "t.o.",
+                    result['reward'] if result['reward'] is not None else "N/A",
+                    result['status'],
                     result['error'] or ""
                 ])
 
@@ -419,11 +504,66 @@ def main():
     parser.add_argument('--precision', '-p', type=str, choices=['strict', 'relaxed'], default='relaxed',
         help='Constraint precision mode: "strict" (equality == for optimal solutions), "relaxed" (inequality >= for Bellman, <= for budget, finding invariants)'
     )
+    parser.add_argument('--exactly-one', '-eo', type=str, nargs='+', default=['default'],
+        choices=['default', 'pairwise', 'pbeq', 'sequential', 'commander', 'bimander'],
+        help='Exactly-one encoding(s) of the boolean observation/strategy rows. Several encodings are benchmarked '
+             'one after the other, writing one output CSV per encoding (suffixed with the encoding name)'
+    )
+    parser.add_argument('--observation-encoding', '-oe', type=str, nargs='+', default=['one-hot'],
+        choices=['one-hot', 'int', 'bitvec'],
+        help='Encoding(s) of the observation class of each POP state: "one-hot" booleans, or a single "int"/"bitvec" '
+             'class index. Several encodings are benchmarked one after the other (see --exactly-one)'
+    )
+    parser.add_argument('--reward-encoding', '-rw', type=str, choices=['real', 'int', 'bitvec'], default='real',
+        help='Sort of the expected reward variables: "real" (LRA), "int" (LIA) or "bitvec" (saturating bit-vectors), '
+             'integral sorts applied to deterministic configurations only'
+    )
     parser.add_argument('--real-encoding', '-re', action='store_true', help='Encoding of TPMC parameters as real variables (slow performance)')
     parser.add_argument('--budget-repair', '-br', action='store_true', help='Budget repair mode for SSP (first solve with no budget constraint, then repair the solution to fit the budget)')
+    parser.add_argument('--budget-sweep', '-bs', action='store_true',
+        help='Search the smallest budget (up to the configured one) meeting the threshold, on one incremental solver'
+    )
     parser.add_argument('--order-constraints', '-order', type=str,
         help='Comma-separated order of assertion of HL constraint groups for OOP instances. Should be a permutation of 0,1,2,3'
     )
+    parser.add_argument('--symmetry-breaking', '-sb', action='store_true',
+        help='Add lex-leader constraints breaking the symmetries (reflections/rotations) of the world around the goal'
+    )
+    parser.add_argument('--class-symmetry-breaking', '-csb', action='store_true',
+        help='Order the interchangeable observation classes by the first state observing them. Only applicable for POP variant.'
+    )
+    parser.add_argument('--cache-dir', type=str,
+        help='Directory of the on-disk cache of built tpMC instances (compressed SMT-LIB2), shared by trials and runs'
+    )
+    parser.add_argument('--optimize', type=str, nargs='?', const='1/1000', metavar='PRECISION',
+        help='Bisect the optimal reward of each configuration up to a rational precision (default: 1/1000), '
+             'ignoring the configured thresholds'
+    )
+    parser.add_argument('--backend', type=str, choices=['solver', 'optimize'], default='solver',
+        help='Z3 engine: "solver" (feasibility against the configured thresholds) or "optimize" (minimise the '
+             'expected reward, reporting the best incumbent on timeout)'
+    )
+    parser.add_argument('--profile', type=str, default='default',
+        choices=['default', 'lra-simplex', 'sat-bitblast', 'nlsat', 'pb-solver'],
+        help='Z3 tactic pipeline and parameters per fragment (recorded per row in the results CSV); rows outside the '
+             'fragment of the profile fall back to "default"'
+    )
+    parser.add_argument('--portfolio', type=int, nargs='?', const=0, metavar='N',
+        help='Race the first N configurations (all if omitted) of each instance in separate processes, keeping the '
+             'first SAT/UNSAT answer (the winning configuration is recorded per row in the results CSV)'
+    )
+    parser.add_argument('--seed', type=int,
+        help='Random seed of the Z3 heuristics. Trial t of each instance runs under seed SEED + t, and the per-seed '
+             'trials are saved to "<output>-seeds.csv" to quantify the runtime tail'
+    )
+    parser.add_argument('--seed-race', type=int, nargs='?', const=os.cpu_count(), metavar='K',
+        help='Race K random seeds (from --seed, default 0) of each instance in separate processes, keeping the first '
+             'SAT/UNSAT answer (default: one per core)'
+    )
+    parser.add_argument('--cube-and-conquer', '-cc', type=int, nargs='?', const=os.cpu_count(), metavar='WORKERS',
+        help='Split each instance into cubes over the observations of one state per atomic group and solve them in a '
+             'pool of WORKERS processes (default: one per core), with early termination on the first SAT cube'
+    )
     parser.add_argument('--cluster', action='store_true',
         help='Use a clustering algorithm to attempt to solve all POMDPs for a POP instance. Only applicable for POP variant.'
     )
@@ -441,11 +581,25 @@ def main():
         print(f"\nHyperparameters:\n"
               f"   Bellman format       -> {args.bellman_format}\n"
               f"   Optimality Precision -> {args.precision}\n"
+              f"   Exactly-One Encoding -> {", ".join(args.exactly_one)}\n"
+              f"   Observation Encoding -> {", ".join(args.observation_encoding)}\n"
+              f"   Reward Encoding      -> {args.reward_encoding}\n"
               f"   Encoding             -> {"Real" if args.real_encoding else "Boolean"}\n"
               f"   Budget Repair        -> {"✅" if args.budget_repair else "❌"}\n"
+              f"   Budget Sweep         -> {"✅" if args.budget_sweep else "❌"}\n"
               f"   Trials no.           -> {args.trials}\n"
               f"   Verbose output       -> {"✅" if args.verbose else "❌"}\n"
-              f"   Ordering             -> {args.order_constraints if args.order_constraints else "default"}")
+              f"   Ordering             -> {args.order_constraints if args.order_constraints else "default"}\n"
+              f"   Symmetry Breaking    -> {"✅" if args.symmetry_breaking else "❌"}\n"
+              f"   Class Symmetry       -> {"✅" if args.class_symmetry_breaking else "❌"}\n"
+              f"   Instance Cache       -> {args.cache_dir if args.cache_dir else "❌"}\n"
+              f"   Optimize Threshold   -> {f"precision {args.optimize}" if args.optimize else "❌"}\n"
+              f"   Backend              -> {args.backend}\n"
+              f"   Solver Profile       -> {args.profile}\n"
+              f"   Portfolio            -> {(args.portfolio or "all") if args.portfolio is not None else "❌"}\n"
+              f"   Cube-and-conquer     -> {f"{args.cube_and_conquer} workers" if args.cube_and_conquer else "❌"}\n"
+              f"   Random Seed          -> {args.seed if args.seed is not None else "default"}\n"
+              f"   Seed Race            -> {f"{args.seed_race} seeds" if args.seed_race else "❌"}")
 
         # Check that all config files exist
         for config_file in args.config_csv:
@@ -453,6 +607,28 @@ def main():
                 print(f"❌ Configuration file not found: {config_file}")
                 sys.exit(1)
 
+        if args.backend == 'optimize' and (args.cluster or args.optimize or args.budget_sweep):
+            print("❌ --backend optimize cannot be combined with --cluster, --optimize or --budget-sweep")
+            sys.exit(1)
+        if args.backend == 'optimize' and args.profile in ['lra-simplex', 'sat-bitblast', 'nlsat']:
+            print(f"❌ --profile {args.profile} builds a tactic pipeline, not available to --backend optimize")
+            sys.exit(1)
+        if args.portfolio is not None and (args.cluster or args.optimize or args.budget_sweep
+                                           or args.backend == 'optimize'):
+            print("❌ --portfolio cannot be combined with --cluster, --optimize, --budget-sweep or --backend optimize")
+            sys.exit(1)
+        if args.cube_and_conquer and (args.cluster or args.optimize or args.budget_sweep or args.budget_repair
+                                      or args.backend == 'optimize' or args.portfolio is not None):
+            print("❌ --cube-and-conquer cannot be combined with --cluster, --optimize, --budget-sweep, "
+                  "--budget-repair, --backend optimize or --portfolio")
+            sys.exit(1)
+
+        if args.seed_race and (args.cluster or args.optimize or args.budget_sweep or args.backend == 'optimize'
+                               or args.portfolio is not None or args.cube_and_conquer):
+            print("❌ --seed-race cannot be combined with --cluster, --optimize, --budget-sweep, --backend optimize, "
+                  "--portfolio or --cube-and-conquer")
+            sys.exit(1)
+
         # Parse order of constraints if provided
         order_constraints = args.order_constraints
         try:
@@ -464,30 +640,53 @@ def main():
             print(f"❌ Invalid order_constraints format: {order_constraints}. Must be a comma-separated permutation of 0,1,2,3.")
             sys.exit(1)
 
-        # Run benchmarks
-        runner = BenchmarkRunner(
-            args.output, args.verbose, args.trials,
-            verbose=False,
-            bellman_format=args.bellman_format,
-            precision=args.precision,
-            bool_encoding=not args.real_encoding,
-            budget_repair=args.budget_repair,
-            order_constraints=order_constraints,
-            cluster=args.cluster,
-        )
+        # Run benchmarks (once per combination of compared encodings, each into its own output CSV)
+        compared = [args.exactly_one, args.observation_encoding]
+        for encoding, obs_encoding in itertools.product(*compared):
+            output_csv = args.output
+            suffix = [name for name, values in zip((encoding, obs_encoding), compared) if len(values) > 1]
+            if suffix:
+                root, ext = os.path.splitext(args.output)
+                output_csv = f"{root}-{"-".join(suffix)}{ext or '.csv'}"
+                print(f"\n🧮 Exactly-one encoding: {encoding} | Observation encoding: {obs_encoding}")
+
+            runner = BenchmarkRunner(
+                output_csv, args.verbose, args.trials,
+                verbose=False,
+                bellman_format=args.bellman_format,
+                precision=args.precision,
+                exactly_one=encoding,
+                observation_encoding=obs_encoding,
+                reward_encoding=args.reward_encoding,
+                bool_encoding=not args.real_encoding,
+                budget_repair=args.budget_repair,
+                budget_sweep=args.budget_sweep,
+                order_constraints=order_constraints,
+                symmetry_breaking=args.symmetry_breaking,
+                class_symmetry_breaking=args.class_symmetry_breaking,
+                cluster=args.cluster,
+                cache_dir=args.cache_dir,
+                optimize=args.optimize,
+                backend=args.backend,
+                profile=args.profile,
+                portfolio=args.portfolio,
+                cube_and_conquer=args.cube_and_conquer,
+                seed=args.seed,
+                seed_race=args.seed_race,
+            )
 
-        try:
-            configs = runner.load_configurations(args.config_csv)
+            try:
+                configs = runner.load_configurations(args.config_csv)
 
-            if not configs:
-                print("❌ No valid configurations found")
-                sys.exit(1)
+                if not configs:
+                    print("❌ No valid configurations found")
+                    sys.exit(1)
 
-            runner.run_benchmark(configs)
-            runner.save_results_to_csv()
+                runner.run_benchmark(configs)
+                runner.save_results_to_csv()
 
-        finally:
-            runner.cleanup()
+            finally:
+                runner.cleanup()
 
     except KeyboardInterrupt:
         print("\n⚠️  Interrupted by user")
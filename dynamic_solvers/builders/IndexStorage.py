@@ -1,51 +1,110 @@
-from typing import Callable, List
-from z3 import z3
+from collections import OrderedDict
+from typing import Callable, List, Iterator, Optional
+from z3 import z3, Bool, Implies, And
 
 
 class IndexStorage:
     """
     Storage for pre-computed Bellman equation constraints.
     This allows efficient constraint collection when the observation function Y changes.
+
+    Groups of constraints are stored per (state, observation) pair in an array indexed by
+    `state * observations + obs`. In lazy mode, a group is only built on first use, and the store can be bounded by
+    an LRU size (evicted groups are rebuilt when used again); hits and misses are counted in both modes.
     """
 
-    def __init__(self, goal: int, builder: Callable[[int, int], dict[int, List[z3.BoolRef]]]):
+    def __init__(self, goal: int, builder: Callable[[int, int, int], List[z3.BoolRef]], observations: int,
+                 lazy: bool = False, max_groups: Optional[int] = None):
         """
         Initialize the storage.
 
         Args:
             goal: The goal state index
-            builder: Function that builds Bellman equations for a state
-                     Returns dict mapping observation -> list of constraints
+            builder: Function that builds the Bellman equations of a state under an observation
+                     Takes (state, state index without the goal, observation), returns a list of constraints
+            observations: Number of observation values (observations are 0, ..., observations - 1)
+            lazy: Build the groups on first use instead of pre-computing them all
+            max_groups: Number of groups kept in lazy mode (least recently used ones are evicted), None if unbounded
         """
+        assert max_groups is None or lazy, "Only lazy storages can be bounded"
         self.builder = builder
         self.goal = goal
-        self.storage: dict[int, dict[int, List[z3.BoolRef]] | z3.BoolRef] = {}
+        self.observations = observations
+        self.lazy = lazy
+        self.max_groups = max_groups
+        self.goal_constraint: z3.BoolRef | bool | None = None
+        self.groups: list[Optional[List[z3.BoolRef]]] = []
+        # Recency of the built groups (bounded storages only)
+        self._recent: OrderedDict[int, None] = OrderedDict()
+        # Groups asserted behind their selector literal, and the guarded groups not handed out yet (assumption mode)
+        self._guarded = bytearray()
+        self._pending: List[z3.BoolRef] = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
         self._is_precomputed = False
 
     def precompute(self, size: int, goal_rew: tuple[int, z3.BoolRef | bool]) -> None:
         """
-        Pre-compute Bellman equations for all states and all possible observations.
+        Pre-compute Bellman equations for all states and all possible observations (in lazy mode, only allocate the
+        store).
 
         Args:
             size: The number of states in the world
             goal_rew: Tuple of (goal_state, goal_constraint)
         """
         goal, exp_rew = goal_rew
+        # Goal state has a simple constraint: ExpRew[goal] == 0
+        self.goal_constraint = exp_rew
+        self.groups = [None] * (size * self.observations)
+        self._guarded = bytearray(size * self.observations)
+        if not self.lazy:
+            for state in range(size):
+                if state == goal:
+                    continue
+                for obs in range(self.observations):
+                    self.groups[state * self.observations + obs] = self._build(state, obs)
+        self._is_precomputed = True
 
-        for state in range(size):
-            if state == goal:
-                # Goal state has a simple constraint: ExpRew[goal] == 0
-                self.storage[goal] = exp_rew
-                continue
+    def _build(self, state: int, obs: int) -> List[z3.BoolRef]:
+        # Decrement the state index after processing the goal state
+        state_idx = state - 1 if state > self.goal else state
+        return self.builder(state, state_idx, obs)
+
+    def _index(self, state: int, obs: int) -> int:
+        if not 0 <= obs < self.observations:
+            raise KeyError(f"No Bellman equations of state {state} under observation {obs}")
+        return state * self.observations + obs
+
+    def group(self, state: int, obs: int) -> List[z3.BoolRef]:
+        """Bellman equations of a (non-goal) state under an observation, built on first use in lazy mode."""
+        index = self._index(state, obs)
+        constraints = self.groups[index]
+        if constraints is not None:
+            self.hits += 1
+            if self.max_groups is not None:
+                self._recent.move_to_end(index)
+            return constraints
+
+        self.misses += 1
+        constraints = self.groups[index] = self._build(state, obs)
+        if self.max_groups is not None:
+            self._recent[index] = None
+            if len(self._recent) > self.max_groups:
+                evicted, _ = self._recent.popitem(last=False)
+                self.groups[evicted] = None
+                self.evictions += 1
+        return constraints
 
-            # Decrement the state index after processing the goal state
-            state_idx = state - 1 if state > goal else state
+    def hit_rate(self) -> float:
+        """Share of group lookups answered from the store (pre-computed groups are hits)."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
 
-            # Builder returns dict[obs -> List[BoolRef]]
-            # Store all possible observation-conditional constraints for this state
-            self.storage[state] = self.builder(state, state_idx)
-
-        self._is_precomputed = True
+    def stats(self) -> dict[str, int | float]:
+        """Counters of the store: groups held, hits, misses (builds), evictions and hit rate."""
+        return {'groups': sum(constraints is not None for constraints in self.groups), 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions, 'hit_rate': self.hit_rate()}
 
     def collect(self, obs_function: list[int]) -> List[z3.BoolRef]:
         """
@@ -67,14 +126,62 @@ class IndexStorage:
 
             if obs == -1 and state == self.goal:
                 # Goal state constraint
-                constraints.append(self.storage[state])
+                constraints.append(self.goal_constraint)
             else:
                 # Non-goal state: retrieve constraints focusing on observations
-                state_constraints = self.storage[state][obs]
-
-                # Handle both single constraint and list of constraints
-                if isinstance(state_constraints, list):
-                    constraints.extend(state_constraints)
-                else:
-                    constraints.append(state_constraints)
+                constraints.extend(self.group(state, obs))
         return constraints
+
+    @staticmethod
+    def selector(state: int, obs: int, ctx: z3.Context) -> z3.BoolRef:
+        """Selector literal guarding the Bellman group of `state` under observation `obs`."""
+        return Bool(f'bs{state}o{obs}', ctx)
+
+    def guarded_constraints(self, ctx: z3.Context) -> Iterator[z3.BoolRef]:
+        """
+        Every pre-computed Bellman group, each guarded by its selector literal (the goal constraint is unguarded).
+        Asserted once, the groups of any observation function are then activated by `selectors(obs_function)`.
+        In lazy mode, only the goal constraint: the groups are guarded on first use (see `pending_constraints`).
+        """
+        if not self._is_precomputed:
+            raise RuntimeError("Must call precompute() before guarded_constraints()")
+
+        yield self.goal_constraint
+        if self.lazy:
+            return
+        for index, constraints in enumerate(self.groups):
+            if constraints is not None:
+                self._guarded[index] = 1
+                state, obs = divmod(index, self.observations)
+                yield Implies(self.selector(state, obs, ctx), And(*constraints, ctx), ctx)
+
+    def _guard(self, state: int, obs: int, ctx: z3.Context) -> z3.BoolRef:
+        """Selector literal of a group, guarding the group first if it was never asserted (lazy mode)."""
+        index = self._index(state, obs)
+        if self._guarded[index]:
+            # Already asserted: the group is reused from the solver
+            self.hits += 1
+        else:
+            self._guarded[index] = 1
+            self._pending.append(Implies(self.selector(state, obs, ctx), And(*self.group(state, obs), ctx), ctx))
+        return self.selector(state, obs, ctx)
+
+    def pending_constraints(self) -> List[z3.BoolRef]:
+        """Guarded groups built for the selectors handed out since the last call, to assert before checking them."""
+        pending, self._pending = self._pending, []
+        return pending
+
+    def selectors(self, obs_function: list[int], ctx: z3.Context) -> List[z3.BoolRef]:
+        """Selector literals activating the Bellman groups of an observation function (see `collect`)."""
+        return [self._guard(state, obs, ctx) for state, obs in enumerate(obs_function) if state != self.goal]
+
+    def patch_selectors(self, selectors: List[z3.BoolRef], delta: dict[int, int], ctx: z3.Context) -> None:
+        """
+        Replace, in place, the selector literals of the states changed by `delta` (state -> new observation) in the
+        selectors of an observation function (see `selectors`), visiting the changed states only.
+        """
+        for state, obs in delta.items():
+            if state == self.goal:
+                raise ValueError(f"The observation of the goal state {state} cannot change")
+            # The goal has no selector: later states are shifted by one
+            selectors[state - 1 if state > self.goal else state] = self._guard(state, obs, ctx)
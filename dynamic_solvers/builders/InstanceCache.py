@@ -0,0 +1,76 @@
+import gzip
+import hashlib
+import json
+import os
+from typing import Optional
+
+from z3 import z3, parse_smt2_string, get_full_version
+
+from builders.OOPSpec import OOPSpec
+
+
+class InstanceCache:
+    """
+    On-disk cache of built tpMC instances as gzip-compressed SMT-LIB2 files.
+
+    Entries are content-addressed by the parameters that determine the constraint set: the variant, the world
+    (its successor table, covering the type and dimensions), goal, budget, threshold and every operational
+    option of the encoding. On a hit, the constraint set is parsed back instead of being rebuilt.
+    """
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def key(cls, spec: OOPSpec, threshold: Optional[str]) -> str:
+        """Content address of the constraint set of an instance for a threshold."""
+        params = {
+            'format': cls.FORMAT_VERSION,
+            'z3': get_full_version(),
+            'variant': spec.variant().name,
+            'world': spec.puzzle_type.name,
+            'succ': list(spec.succ.shape),
+            'goal': spec.goal,
+            'budget': spec.budget,
+            'threshold': threshold.replace(' ', '') if threshold is not None else None,
+            'determinism': spec.determinism,
+            'bool_encoding': spec.bool_encoding,
+            'bellman_format': spec.bellman_format.name,
+            'precision': spec.precision.name,
+            'exactly_one': spec.exactly_one.name,
+            'reward_encoding': spec.reward_encoding.name,
+            'observation_encoding': spec.observation_encoding.name,
+            'budget_repair': spec.budget_repair,
+            'budget_sweep': spec.budget_sweep,
+            'order_constraints': spec.order_constraints,
+            'symmetry_breaking': spec.symmetry_breaking,
+            'class_symmetry_breaking': spec.class_symmetry_breaking,
+            'linear_rates': spec.linear_rates,
+        }
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode())
+        digest.update(spec.succ.astype('<i8').tobytes())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.smt2.gz")
+
+    def load(self, spec: OOPSpec, threshold: Optional[str]) -> Optional[z3.AstVector]:
+        """
+        Parse the cached constraint set of an instance into its context, if present.
+        The variables of the instance must be declared, so that the parsed constants resolve to them by name.
+        """
+        path = self.path(self.key(spec, threshold))
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            return parse_smt2_string(file.read(), ctx=spec.ctx)
+
+    def store(self, spec: OOPSpec, threshold: Optional[str], smt2: str) -> None:
+        """Store the SMT-LIB2 constraint set of an instance (atomic write, safe across benchmark workers)."""
+        path = self.path(self.key(spec, threshold))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as file:
+            file.write(smt2)
+        os.replace(tmp_path, path)
@@ -0,0 +1,28 @@
+from rich.console import Console
+
+
+class LazyConsole:
+    """
+    Builder log sink that only reaches a (recording) `rich` console when verbose output is enabled.
+
+    A quiet `rich.Console` still renders every printed object before discarding it, which stringifies whole
+    lists of Z3 constraints. Non-verbose logs return before touching the objects, so building constraints does
+    no formatting work. Messages that are costly to assemble should be guarded with `enabled`.
+    """
+
+    def __init__(self, verbose: bool):
+        self._console = Console(record=True) if verbose else None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether verbose output is enabled."""
+        return self._console is not None
+
+    def print(self, *objects, **kwargs) -> None:
+        """Print and record the objects (see `rich.Console.print`), no-op unless verbose."""
+        if self._console is not None:
+            self._console.print(*objects, **kwargs)
+
+    def export_text(self, clear: bool = True) -> str:
+        """Text recorded so far (empty unless verbose)."""
+        return self._console.export_text(clear=clear) if self._console is not None else ""
@@ -1,12 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Callable
+from typing import List, Optional, Callable, Iterable, Iterator
 
-from rich.console import Console
-from z3 import (Context, z3, Real, Q, Or, Sum, And, Not, Implies)
+from z3 import (Context, z3, Real, Int, BitVec, BitVecVal, Q, Or, Sum, And, Not, Implies, If, ToReal, BV2Int,
+                ZeroExt, UGE, ULE, ULT)
 
+from builders.LazyConsole import LazyConsole
 from builders.worlds import World
-from builders.enums import BellmanFormat, Precision
-from utils import parse_threshold
+from builders.cardinality import exactly_one
+from builders.enums import BellmanFormat, Precision, ExactlyOneEncoding, RewardEncoding, ObservationEncoding
+from utils import parse_threshold, lex_leq, bv_sum
 
 
 class OOPSpec(World, ABC):
@@ -19,24 +21,45 @@ class OOPSpec(World, ABC):
                  bool_encoding: bool = True,
                  bellman_format: BellmanFormat | None = None,
                  precision: Precision | None = None,
+                 exactly_one: ExactlyOneEncoding | None = None,
+                 reward_encoding: RewardEncoding | None = None,
+                 observation_encoding: ObservationEncoding | None = None,
                  budget_repair: bool = False,
-                 order_constraints: Optional[List[int]] = None):
+                 budget_sweep: bool = False,
+                 order_constraints: Optional[List[int]] = None,
+                 symmetry_breaking: bool = False,
+                 class_symmetry_breaking: bool = False):
         self.ctx = ctx or Context()  # Use provided context or create fresh one
         self.budget = budget
         self.goal = goal
         self.determinism = determinism
         self.bool_encoding = bool_encoding
         self.budget_repair = budget_repair
+        self.budget_sweep = budget_sweep
         self.verbose = verbose
         self.bellman_format = bellman_format or BellmanFormat.DEFAULT
         self.precision = precision or Precision.RELAXED
+        self.exactly_one = exactly_one or ExactlyOneEncoding.DEFAULT
+        self.reward_encoding = reward_encoding or RewardEncoding.REAL
+        self.observation_encoding = observation_encoding or ObservationEncoding.ONE_HOT
         self.order_constraints = order_constraints
+        self.symmetry_breaking = symmetry_breaking
+        self.class_symmetry_breaking = class_symmetry_breaking
+        # Deterministic strategies encoded as reals select the reward of the action taken by if-then-else terms
+        # rather than multiplying it by the 0/1 rates: linear Bellman equations (set by the Optimize backend, whose
+        # objective Z3 cannot minimise over the products)
+        self.linear_rates = False
+
+        if self.reward_encoding is not RewardEncoding.REAL and not (self.bool_encoding and self.determinism):
+            # Only the Bellman equations of deterministic strategies (1 + ExpRew[next]) have integral solutions
+            raise ValueError(f"{self.reward_encoding.name.capitalize()} reward encoding requires deterministic "
+                             f"strategies with the boolean encoding")
 
         self.exp_rew_evaluator = None
 
         self.is_obs_selected = self._init_extract_obs_function()
 
-        self.console = Console(quiet=not verbose, record=True)
+        self.console = LazyConsole(verbose)
 
     @abstractmethod
     def declare_variables(self):
@@ -61,7 +84,12 @@ class OOPSpec(World, ABC):
     def declare_expected_rewards(self) -> List[z3.ArithRef]:
         # Expected cost/reward of reaching the goal from each corresponding state.
         self.console.print("\n# Expected cost/reward of reaching the goal from each corresponding state.")
-        expected_rewards = [Real(f'pi{s}', self.ctx) for s in range(self.size)]
+        # Deterministic strategies take integral path lengths to the goal (LIA or bit-vectors instead of LRA)
+        if self.reward_encoding is RewardEncoding.BITVEC:
+            expected_rewards = [BitVec(f'pi{s}', self.reward_width, self.ctx) for s in range(self.size)]
+        else:
+            initializer = Int if self.reward_encoding is RewardEncoding.INT else Real
+            expected_rewards = [initializer(f'pi{s}', self.ctx) for s in range(self.size)]
         # self.console.print(f"[ pi<x>, x ∈ ℕ, 0 <= x < {self.goal} ]")
         self.console.print(expected_rewards)
         return expected_rewards
@@ -71,12 +99,15 @@ class OOPSpec(World, ABC):
         Build basic POMDP constraints - a POMDP instance cannot perform better than the fully observable variant.
         """
         self.console.print('\n# A POMDP instance cannot perform better than the fully observable variant')
-        constraints = [self.ExpRew[s] >= self.dist(s, self.goal) for s in range(self.size)]
+        if self.reward_encoding is RewardEncoding.BITVEC:
+            constraints = [UGE(self.ExpRew[s], self.dist(s, self.goal)) for s in range(self.size)]
+        else:
+            constraints = [self.ExpRew[s] >= self.dist(s, self.goal) for s in range(self.size)]
 
         self.console.print(constraints)
         return constraints
 
-    def build_bellman_equations(self) -> List[z3.BoolRef]:
+    def build_bellman_equations(self) -> Iterator[z3.BoolRef]:
         # Bellman equations for expected rewards in each world's state
         self.console.print("\n# Bellman equations for expected rewards in each world's state")
         if self.bool_encoding:
@@ -90,18 +121,48 @@ class OOPSpec(World, ABC):
         else:
             bellman_generator = self._compute_state_bellman_real
             self.console.print("\n# Strategy and observation variables encoded as reals.")
-        equations = []
-        for s in range(self.size):
-            if s == self.goal:
-                equations.append(self.ExpRew[s] == 0)
-                continue
 
-            # Decrement the state index after processing the goal state
-            idx = s - 1 if s > self.goal else s
-            equations.extend(bellman_generator(s, idx))
+        def equations() -> Iterator[z3.BoolRef]:
+            for s in range(self.size):
+                if s == self.goal:
+                    yield self.ExpRew[s] == 0
+                    continue
+
+                # Decrement the state index after processing the goal state
+                idx = s - 1 if s > self.goal else s
+                yield from bellman_generator(s, idx)
+
+        yield from self.stream_logged(equations())
 
-        self.console.print(equations)
-        return equations
+    def stream_logged(self, constraints: Iterable[z3.BoolRef]) -> Iterator[z3.BoolRef]:
+        """Stream constraints to the consumer, materialising them (for the log) only when verbose."""
+        if self.console.enabled:
+            constraints = list(constraints)
+            self.console.print(constraints)
+        yield from constraints
+
+    @property
+    def reward_width(self) -> int:
+        """Bit-width of bit-vector rewards: finite path lengths (below `size`) and the all-ones sentinel."""
+        return self.size.bit_length()
+
+    @property
+    def reward_sentinel(self) -> int:
+        """Saturated bit-vector reward standing for an unbounded expected reward (the goal is never reached)."""
+        return (1 << self.reward_width) - 1
+
+    def build_step_relation(self, state: int, next_state: int) -> z3.BoolRef:
+        """
+        Bellman relation of a deterministic step from `state` to `next_state`, i.e. `ExpRew[state] (>=|==) 1 + ExpRew[next]`.
+        Bit-vector rewards use unsigned comparisons and an increment saturating at the sentinel (no wrap-around).
+        """
+        is_relaxed = (self.precision is Precision.RELAXED)
+        if self.reward_encoding is RewardEncoding.BITVEC:
+            next_rew = self.ExpRew[next_state]
+            step = If(next_rew == self.reward_sentinel, next_rew, next_rew + 1, self.ctx)
+            return UGE(self.ExpRew[state], step) if is_relaxed else self.ExpRew[state] == step
+        return (self.ExpRew[state] >= 1 + self.ExpRew[next_state] if is_relaxed
+                else self.ExpRew[state] == 1 + self.ExpRew[next_state])
 
     @abstractmethod
     def _compute_state_bellman_bool_det(self, state: int, state_idx: int) -> List[z3.BoolRef]:
@@ -114,11 +175,13 @@ class OOPSpec(World, ABC):
     def _compute_state_bellman_real(self, state: int, state_idx: int) -> List[bool]:
         # Build action terms for each direction using a transition function
         terms = self.initialize_terms()
-        for a in range(len(self.actions)):
-            action_term = self.build_action_term(a, state_idx)
-            next_state = self.navigate(state, a)
+        for a, next_state in enumerate(self.succ[state].tolist()):
             destination_rew = self.build_destination_rew(next_state)
-            terms.append(action_term * destination_rew)
+            if self.determinism and self.linear_rates:
+                # 0/1 rates and observations: select the reward of the action taken, linear unlike the products
+                terms.append(If(self.build_action_condition(a, state_idx), destination_rew, 0, self.ctx))
+            else:
+                terms.append(self.build_action_term(a, state_idx) * destination_rew)
 
         # Bellman constraint formulation: relaxed (>= inequality for invariance) or strict (== equality)
         if self.precision is Precision.RELAXED:
@@ -157,20 +220,63 @@ class OOPSpec(World, ABC):
     def build_action_term(self, action_idx: int, state_idx: int) -> z3.ArithRef:
         raise NotImplementedError()
 
-    def build_threshold_constraint(self, threshold: str) -> bool:
+    @abstractmethod
+    def build_action_condition(self, action_idx: int, state_idx: int) -> z3.BoolRef:
+        """Whether the action is taken from the state, for deterministic strategies encoded as reals (rates 0 or 1)."""
+        raise NotImplementedError()
+
+    def build_reward_evaluator(self) -> z3.ArithRef:
+        """Expected reward of the agent dropped uniformly in the world (to be evaluated in models)."""
+        rewards = [self.ExpRew[s] for s in range(self.size) if s != self.goal]
+        if self.reward_encoding is RewardEncoding.BITVEC:
+            return ToReal(BV2Int(bv_sum(rewards))) * Q(1, self.size - 1, self.ctx)
+        if self.reward_encoding is RewardEncoding.INT:
+            return ToReal(Sum(rewards)) * Q(1, self.size - 1, self.ctx)
+        return Sum(rewards) * Q(1, self.size - 1, self.ctx)
+
+    def build_threshold_constraint(self, threshold: Optional[str]) -> bool:
         # Agent dropped in the world under uniform distribution
         # Check if the minimal expected cost is below some threshold
         self.console.print(f"\n# Agent dropped uniformly in the world"
               f"\n# Objective: check if the minimal expected cost is below some threshold `{threshold}`")
 
         # Generate the sum of expected reward variables for non-target states (uniform distribution)
-        sumExpRew = Sum([self.ExpRew[s] for s in range(self.size) if s != self.goal])
-        terms, sign = parse_threshold(threshold)
-
-        self.exp_rew_evaluator = sumExpRew * Q(1, self.size - 1, self.ctx)
+        rewards = [self.ExpRew[s] for s in range(self.size) if s != self.goal]
+        self.exp_rew_evaluator = self.build_reward_evaluator()
+
+        if threshold is None:
+            # Unbounded objective (threshold optimisation asserts the bounds separately); saturated
+            # bit-vector rewards stand for unreachable goals and are still ruled out
+            if self.reward_encoding is RewardEncoding.BITVEC:
+                constraint = And(*[reward != self.reward_sentinel for reward in rewards], self.ctx)
+            else:
+                constraint = True
+            self.console.print(constraint)
+            return constraint
 
-        thr = Q(terms[0], terms[1], self.ctx) if len(terms) > 1 else terms[0]
-        constraint = sign(sumExpRew * Q(1, self.size - 1, self.ctx), thr)
+        terms, sign = parse_threshold(threshold)
+        numerator, denominator = (terms[0], terms[1]) if len(terms) > 1 else (terms[0], 1)
+
+        if self.reward_encoding is RewardEncoding.BITVEC:
+            # Overflow-free adder tree, scaled by the threshold denominator and compared against (size - 1) * threshold
+            sumExpRew = bv_sum(rewards)
+            bound = numerator * (self.size - 1)
+            width = max(sumExpRew.size() + denominator.bit_length(), bound.bit_length()) + 1
+            scaled = ZeroExt(width - sumExpRew.size(), sumExpRew) * BitVecVal(denominator, width, self.ctx)
+            # Unsigned comparison with the sign of the threshold (`<=` holds on equal operands, `<` does not)
+            less = ULE if sign(0, 0) else ULT
+            # Saturated (unbounded) rewards never meet the threshold
+            finite = [reward != self.reward_sentinel for reward in rewards]
+            constraint = And(*finite, less(scaled, BitVecVal(bound, width, self.ctx)), self.ctx)
+        elif self.reward_encoding is RewardEncoding.INT:
+            # Integral rewards: scale both sides by (size - 1) and the threshold denominator (no rationals)
+            sumExpRew = Sum(rewards)
+            constraint = sign(sumExpRew * denominator if denominator > 1 else sumExpRew,
+                              numerator * (self.size - 1))
+        else:
+            sumExpRew = Sum(rewards)
+            thr = Q(terms[0], terms[1], self.ctx) if len(terms) > 1 else terms[0]
+            constraint = sign(sumExpRew * Q(1, self.size - 1, self.ctx), thr)
 
         self.console.print(constraint)
         return constraint
@@ -185,6 +291,14 @@ class OOPSpec(World, ABC):
     def _build_boolean_strategy_constraints(self) -> List[z3.BoolRef]:
         self.console.print("\n# Deterministic strategies (one-hot encoding or degenerate categorical distribution)."
                            "\n# Proper boolean encoding activated for strategy variables.")
+        if self.exactly_one is not ExactlyOneEncoding.DEFAULT:
+            # Exactly 1 action enabled per observation strategy, under the selected encoding
+            constraints = [constraint
+                           for o, strategy in enumerate(self.X)
+                           for constraint in exactly_one(strategy, self.exactly_one, f'eox{o}', self.ctx)]
+            self.console.print(constraints)
+            return constraints
+
         # At least 1 action is enabled from each observation
         constraints = [Or(*[self.X[o][a] for a in range(len(self.actions))], self.ctx)
                        for o in range(len(self.X))
@@ -238,14 +352,74 @@ class OOPSpec(World, ABC):
     def build_observation_constraints(self) -> List[z3.BoolRef]:
         raise NotImplementedError()
 
+    def build_symmetry_breaking_constraints(self) -> List[z3.BoolRef]:
+        """
+        Lex-leader constraints over the observation variables, one per non-trivial automorphism of the world.
+
+        Solutions are closed under the automorphisms fixing the goal (states, observations and actions are
+        permuted alike), so only the lexicographically greatest observation function of each orbit is kept.
+        The greatest (rather than least) leader agrees with the first-come ordering of the POP observation
+        classes, so both symmetry breakings can be combined.
+        """
+        if not self.symmetry_breaking:
+            return []
+
+        self.console.print("\n# Symmetry breaking - lex-leader observation functions under the world automorphisms")
+        constraints = []
+        for g, (perm, _) in enumerate(self.automorphisms()[1:]):
+            # Fixed states compare a variable against itself, the goal state included
+            moved = [s for s in range(self.size) if perm[s] != s]
+            constraints.extend(lex_leq([y for s in moved for y in self._observation_vars(int(perm[s]))],
+                                       [y for s in moved for y in self._observation_vars(s)],
+                                       f'sb{g + 1}_', self.ctx))
+
+        self.console.print(constraints)
+        return constraints
+
+    def _observation_vars(self, state: int) -> List[z3.ExprRef]:
+        """Observation variables of a non-goal state (one-hot observation row for POP, sensor for SSP)."""
+        obs = self.Y[state - 1 if state > self.goal else state]
+        return obs if isinstance(obs, list) else [obs]
+
     @abstractmethod
-    def collect_constraints(self, threshold: str) -> List[z3.BoolRef]:
+    def collect_constraints(self, threshold: Optional[str]) -> Iterator[z3.BoolRef]:
+        """
+        Stream all constraints of the instance (lazily built, to be consumed once).
+        Without a threshold the expected reward is left unbounded (see `Z3Executor.optimize`).
+        """
         raise NotImplementedError()
 
     @abstractmethod
     def repair_constraints(self) -> List[z3.BoolRef]:
         raise NotImplementedError()
 
+    @property
+    @abstractmethod
+    def min_budget(self) -> int:
+        """Smallest meaningful budget of the variant (lower end of a budget sweep)."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def build_budget_selectors(self) -> List[z3.BoolRef]:
+        """
+        Budget sweep: constraints guarded by selector literals, such that assuming `budget_assumptions(b)` restricts
+        the instance (declared for the maximal budget) to budget `b` without retracting any assertion.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def budget_assumptions(self, budget: int) -> List[z3.BoolRef]:
+        """Selector literals activating budget `budget` (at most the declared budget) in a budget sweep."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def build_cubes(self, depth: int) -> List[List[z3.BoolRef]]:
+        """
+        Cube-and-conquer: cubes over the observation variables of `depth` splitting states (at most one per atomic
+        group of `clusters`), i.e. conjunctions of literals to be assumed, that together cover every solution.
+        """
+        raise NotImplementedError()
+
     def _init_extract_obs_function(self) -> Callable[[dict, str], bool]:
         if self.bool_encoding:
             return lambda model, name: model.get(name, False)
@@ -17,19 +17,28 @@ class POMDPAdapter:
     Clear semantic: "POMDP is a tpMC with Y fixed"
 
     This adapter enables efficient evaluation of multiple observation functions by:
-    1. Pre-computing Bellman equations for all possible observations
+    1. Pre-computing Bellman equations for all possible observations (or building them on first use, in lazy mode)
     2. Caching Y-independent constraints
     3. Quickly collecting relevant constraints for any given Y
+
+    In assumption mode, the Bellman equations of every (state, observation) pair are asserted once behind selector
+    literals, and each Y is checked under its selectors: the solver keeps the lemmas learned across evaluations
+    rather than discarding them with a popped scope.
     """
 
-    def __init__(self, tpmc_spec: SSPSpec | POPSpec):
+    def __init__(self, tpmc_spec: SSPSpec | POPSpec, assumptions: bool = False, lazy: bool = False,
+                 max_groups: int | None = None):
         """
         Create a POMDP evaluator by wrapping a tpMC specification and enforcing the observation function.
 
         Args:
             tpmc_spec: An initialized POPSpec or SSPSpec instance (with variables declared)
+            assumptions: Evaluate observation functions as assumptions over selector-guarded Bellman equations
+            lazy: Build the Bellman equations of a (state, observation) pair on first use instead of pre-computing them
+            max_groups: Number of (state, observation) groups kept in lazy mode (see `IndexStorage`), None if unbounded
         """
         self._spec = tpmc_spec
+        self.assumptions = assumptions
         self._spec.Y = []
         self.mode = OOPVariant.SSP if isinstance(tpmc_spec, SSPSpec) else OOPVariant.POP
         if self._spec.determinism:
@@ -45,93 +54,68 @@ class POMDPAdapter:
         else:
             self._spec.X = self._spec.declare_strategy_mapping()
 
-        # Pre-compute all possible Bellman equations
-        self.storage = IndexStorage(self.goal, builder)
+        # Pre-compute all possible Bellman equations (or only allocate their store, in lazy mode)
+        self.storage = IndexStorage(self.goal, builder, 2 if self.mode == OOPVariant.SSP else self.budget, lazy,
+                                    max_groups)
         self.storage.precompute(self._spec.size, (self.goal, self.ExpRew[self.goal] == 0))
 
         # Cache Y-independent constraints (computed once, reused for all Y)
         self.obs_independent_constraints = None
+        self.threshold: str | None = None
+        # Selector literals of the last base and changed observation functions (see `collect_delta_selectors`)
+        self._selector_cache: list[tuple[list[int], List[BoolRef]]] = []
 
-    def _compute_state_bellman_det(self, state: int, state_idx: int) -> dict[int, List[z3.BoolRef]]:
+    def _compute_state_bellman_det(self, state: int, state_idx: int, obs: int) -> List[z3.BoolRef]:
         """
-        Build Bellman equations for a given state for all possible observations (deterministic strategies).
-
-        Pre-computes constraints for each possible observation value.
+        Build Bellman equations for a given state under a given observation (deterministic strategies).
 
         Args:
             state: The actual state no. in the world
             state_idx: The index in the non-goal state list (accounting for goal removal)
+            obs: The observation class (POP) or sensor value (SSP) of the state
 
         Returns:
-            Dict mapping observation value -> list of Bellman equation constraints
+            List of Bellman equation constraints
         """
-        is_relaxed = (self._spec.precision is Precision.RELAXED)
-
-        equations = {}
+        successors = self._spec.succ[state].tolist()
         if self.mode == OOPVariant.SSP:
-            iterator = [0, 1]
+            strat_idx = state_idx if obs == 1 else -1
         else:
-            iterator = range(self.budget)
-
-        for obs in iterator:
-            if self.mode == OOPVariant.SSP:
-                strat_idx = state_idx if obs == 1 else -1
-            else:
-                strat_idx = obs
-
-            # Collect all action implications for this observation
-            obs_constraints = []
-            for a in range(len(self._spec.actions)):
-                next_state = self._spec.navigate(state, a)
-                reward_relation = (self.ExpRew[state] >= 1 + self.ExpRew[next_state] if is_relaxed
-                                  else self.ExpRew[state] == 1 + self.ExpRew[next_state])
-                obs_constraints.append(
-                    Implies(self.X[strat_idx][a], reward_relation, self._spec.ctx)
-                )
+            strat_idx = obs
 
-            equations[obs] = obs_constraints
+        # Collect all action implications for this observation
+        return [Implies(self.X[strat_idx][a], self._spec.build_step_relation(state, next_state), self._spec.ctx)
+                for a, next_state in enumerate(successors)]
 
-        return equations
-
-    def _compute_state_bellman_rand(self, state: int, state_idx: int) -> dict[int, List[z3.BoolRef]]:
+    def _compute_state_bellman_rand(self, state: int, state_idx: int, obs: int) -> List[z3.BoolRef]:
         """
-        Build Bellman equations for a given state for all possible observations (randomized strategies).
-
-        Pre-computes constraints for each possible observation value.
+        Build Bellman equations for a given state under a given observation (randomized strategies).
 
         Args:
             state: The actual state no. in the world
             state_idx: The index in the non-goal state list (accounting for goal removal)
+            obs: The observation class (POP) or sensor value (SSP) of the state
 
         Returns:
-            Dict mapping observation value -> list of Bellman equation constraints
+            List of Bellman equation constraints
         """
         is_relaxed = (self._spec.precision is Precision.RELAXED)
-
-        equations = {}
+        successors = self._spec.succ[state].tolist()
+        # Determine which strategy to use based on observation
         if self.mode == OOPVariant.SSP:
-            iterator = [0, 1]
+            strat_idx = state_idx if obs == 1 else -1
         else:
-            iterator = range(self.budget)
-
-        for obs in iterator:
-            # Determine which strategy to use based on observation
-            if self.mode == OOPVariant.SSP:
-                strat_idx = state_idx if obs == 1 else -1
-            else:
-                strat_idx = obs
-
-            # Build weighted sum of expected rewards over actions
-            weighted_rewards = Sum([
-                self.X[strat_idx][a] * self.ExpRew[self._spec.navigate(state, a)]
-                for a in range(len(self._spec.actions))
-            ])
+            strat_idx = obs
 
-            # For randomized strategies, there's typically one constraint per observation
-            equations[obs] = ([self.ExpRew[state] >= 1 + weighted_rewards] if is_relaxed
-                                else [self.ExpRew[state] == 1 + weighted_rewards])
+        # Build weighted sum of expected rewards over actions
+        weighted_rewards = Sum([
+            self.X[strat_idx][a] * self.ExpRew[successors[a]]
+            for a in range(len(self._spec.actions))
+        ])
 
-        return equations
+        # For randomized strategies, there's typically one constraint per observation
+        return ([self.ExpRew[state] >= 1 + weighted_rewards] if is_relaxed
+                else [self.ExpRew[state] == 1 + weighted_rewards])
 
     def build_y_independent_constraints(self, threshold: str) -> List[z3.BoolRef]:
         """
@@ -146,11 +130,15 @@ class POMDPAdapter:
             List of Y-independent constraints
         """
         if self.obs_independent_constraints is None:
+            self.threshold = threshold
             self.obs_independent_constraints = [
                 *self._spec.build_fully_observable_constraints(),
                 self._spec.build_threshold_constraint(threshold),
                 *self._spec.build_strategy_constraints(),
             ]
+            if self.assumptions:
+                # Bellman equations of all observation functions, guarded by selector literals
+                self.obs_independent_constraints.extend(self.storage.guarded_constraints(self._spec.ctx))
         return self.obs_independent_constraints
 
     def collect_bellman_constraints(self, obs_function: list[int] | None = None) -> List[z3.BoolRef]:
@@ -172,22 +160,59 @@ class POMDPAdapter:
                                  "\n ____________________________________________________________________")
         return bellman_equations
 
+    def collect_selectors(self, obs_function: list[int]) -> List[BoolRef]:
+        """Selector literals activating the Bellman equations of an observation function (assumption mode)."""
+        return self.storage.selectors(obs_function, self._spec.ctx)
+
+    def collect_pending_constraints(self) -> List[BoolRef]:
+        """Guarded Bellman equations built for the selectors collected since the last call (lazy assumption mode)."""
+        return self.storage.pending_constraints()
+
+    def collect_delta_selectors(self, base: list[int], delta: dict[int, int]) -> tuple[list[int], List[BoolRef]]:
+        """
+        Observation function and selector literals of `base` changed on the states of `delta` (assumption mode).
+
+        The selectors of the last base and of the last changed observation function are kept, so that re-evaluating
+        neighbours of one base (or a chain of accepted moves) only builds the selectors of the changed states; any
+        other base is collected in full first.
+
+        Args:
+            base: Observation function the change applies to
+            delta: New observation of each changed state
+
+        Returns:
+            The changed observation function and its selector literals
+        """
+        cached = next((selectors for obs_function, selectors in self._selector_cache if obs_function == base), None)
+        if cached is None:
+            cached = self.collect_selectors(base)
+        obs_function, selectors = list(base), list(cached)
+        self.storage.patch_selectors(selectors, delta, self._spec.ctx)
+        for state, obs in delta.items():
+            obs_function[state] = obs
+        self._selector_cache = [(list(base), cached), (obs_function, selectors)]
+        return list(obs_function), selectors
+
     def infer_ssp_strategy_constraints(self, obs_function: list[int]) -> list[BoolRef]:
         strategy_constraints = []
+        atomic_groups = list(self._spec.clusters.keys())
         for state, sensor_on in enumerate(obs_function):
             if sensor_on != 1:
                 continue
-            for direction in self._spec.clusters:
-                if state in self._spec.clusters[direction]:
-                    idx = state if state < self._spec.goal else state - 1
-                    for a, action in enumerate(self._spec.actions):
-                        if action not in direction.actions:
-                            strategy_constraints.append(self._spec.X[idx][a] == (False if self._spec.determinism else 0))
-                        elif {action} == direction.actions:
-                            strategy_constraints.append(self._spec.X[idx][a] == (True if self._spec.determinism else 1))
-                    break
+            direction = atomic_groups[self._spec.atomic_labels[state]]
+            idx = state if state < self._spec.goal else state - 1
+            for a, action in enumerate(self._spec.actions):
+                if action not in direction.actions:
+                    strategy_constraints.append(self._spec.X[idx][a] == (False if self._spec.determinism else 0))
+                elif {action} == direction.actions:
+                    strategy_constraints.append(self._spec.X[idx][a] == (True if self._spec.determinism else 1))
         return strategy_constraints
 
+    @property
+    def spec(self) -> SSPSpec | POPSpec:
+        """The wrapped tpMC specification."""
+        return self._spec
+
     # Delegate attribute access to wrapped spec for convenience
     def __getattr__(self, name):
         """Delegate attribute/method access to the wrapped tpMC spec."""
@@ -3,7 +3,7 @@ from typing import Unpack
 import builders.pop as pop
 import builders.ssp as ssp
 from builders.OOPSpec import OOPSpec
-from builders.enums import OOPVariant, PuzzleType, BellmanFormat, Precision
+from builders.enums import OOPVariant, PuzzleType, BellmanFormat, Precision, ExactlyOneEncoding, RewardEncoding, ObservationEncoding
 from builders.ssp.SSPSpec import SSPSpec
 from builders.pop.POPSpec import POPSpec
 from builders.typedicts import DimensionKWArgs, OperationKWArgs, TPMCParams
@@ -26,7 +26,7 @@ class TPMCFactory:
 
         Args:
             oop_variant (str): Selected OOP variant ('ssp', 'pop')
-            puzzle_type (str): Selected puzzle type ('line', 'grid', 'maze')
+            puzzle_type (str): Selected puzzle type ('line', 'grid', 'maze', 'graph')
             **kwargs (Unpacked[TPMCParams]): Additional parameters declared by TypedDict `TPMCParams`
 
         Keyword Args:
@@ -40,14 +40,25 @@ class TPMCFactory:
                 width (int): Width of the world (Grid/Maze).
                 height (int): Height of the world (Grid) or Depth of the world (Maze).
                 depth (int): Depth of the world (Maze) [internally mapped from `height`].
+                adjacency (str | tuple): CSR adjacency of the world (Graph), `.npz` path or arrays.
 
             Operational Parameters:
                 ctx (Optional[Context]): Z3 context to use (default: None, creates fresh context).
                 verbose (bool): Enable verbose output (default: False).
                 bellman_format (str): Format for Bellman equations ('default', 'common', 'adapted')
                 precision (str): Constraint precision for optimality ('strict', 'relaxed')
+                exactly_one (str): Encoding of the one-hot observation/strategy rows
+                    ('default', 'pairwise', 'pbeq', 'sequential', 'commander', 'bimander')
+                reward_encoding (str): Sort of the expected reward variables ('real', 'int', 'bitvec'),
+                    integral sorts only for deterministic strategies with the boolean encoding
+                observation_encoding (str): Encoding of the observation class of each POP state
+                    ('one-hot', 'int', 'bitvec'), ignored by SSP instances
                 bool_encoding (bool): Use boolean encoding instead of real encoding
                 order_constraints (List[int]): Order of constraint assertion
+                symmetry_breaking (bool): Break the symmetries of the world fixing the goal with lex-leader
+                    constraints over the observation variables (default: False)
+                class_symmetry_breaking (bool): Order the interchangeable observation classes of POP instances
+                    by the first state observing them (default: False)
 
         Returns:
             OOPSpec : configured instance specification for OOP
@@ -65,11 +76,13 @@ class TPMCFactory:
                 PuzzleType.LINE: pop.LineTPMC,
                 PuzzleType.GRID: pop.GridTPMC,
                 PuzzleType.MAZE: pop.MazeTPMC,
+                PuzzleType.GRAPH: pop.GraphTPMC,
             },
             OOPVariant.SSP: {
                 PuzzleType.LINE: ssp.LineTPMC,
                 PuzzleType.GRID: ssp.GridTPMC,
                 PuzzleType.MAZE: ssp.MazeTPMC,
+                PuzzleType.GRAPH: ssp.GraphTPMC,
             },
         }
         return constructors[oop_variant][puzzle_type](
@@ -103,6 +116,15 @@ class TPMCFactory:
         if 'precision' in kwargs and kwargs['precision'] is not None:
             res['precision'] = Precision.from_string(str(kwargs['precision']))
 
+        if 'exactly_one' in kwargs and kwargs['exactly_one'] is not None:
+            res['exactly_one'] = ExactlyOneEncoding.from_string(str(kwargs['exactly_one']))
+
+        if 'reward_encoding' in kwargs and kwargs['reward_encoding'] is not None:
+            res['reward_encoding'] = RewardEncoding.from_string(str(kwargs['reward_encoding']))
+
+        if 'observation_encoding' in kwargs and kwargs['observation_encoding'] is not None:
+            res['observation_encoding'] = ObservationEncoding.from_string(str(kwargs['observation_encoding']))
+
         return res
 
     @staticmethod
@@ -120,6 +142,8 @@ class TPMCFactory:
             return {'length': kwargs['length']}
         elif puzzle_type == PuzzleType.GRID:
             return {'width': kwargs['width'], 'height': kwargs['height']}
+        elif puzzle_type == PuzzleType.GRAPH:
+            return {'adjacency': kwargs['adjacency']}
         else:  # PuzzleType.MAZE
             # Maze uses 'depth' internally instead of 'height'
             return {'width': kwargs['width'], 'depth': kwargs['height']}
@@ -0,0 +1,111 @@
+"""Exactly-one encodings for the one-hot Boolean rows of the tpMC encodings (observations and strategies).
+
+Every encoding returns the constraints forcing exactly one literal of a row to hold. Encodings introducing
+auxiliary variables name them after the row (`name`), so that several rows can share a Z3 context.
+"""
+
+from math import ceil, log2, sqrt
+from typing import List
+
+from z3 import z3, Bool, Context, Or, And, Not, Implies, PbEq
+
+from builders.enums import ExactlyOneEncoding
+
+
+def exactly_one(literals: List[z3.BoolRef], encoding: ExactlyOneEncoding, name: str,
+                ctx: Context) -> List[z3.BoolRef]:
+    """
+    Exactly-one constraint over Boolean literals.
+
+    Args:
+        literals: The one-hot row of Boolean variables.
+        encoding: Encoding of the at-most-one part (`DEFAULT` is treated as `PAIRWISE`).
+        name: Unique name of the row, used as prefix of the auxiliary variables.
+        ctx: Z3 context of the literals.
+
+    Returns:
+        List of constraints (clauses, or a single pseudo-Boolean equality for `PBEQ`)
+    """
+    if encoding is ExactlyOneEncoding.PBEQ:
+        return [PbEq([(lit, 1) for lit in literals], 1, ctx)]
+
+    # At least one literal holds (shared by all clausal encodings)
+    constraints = [Or(*literals, ctx)]
+    if encoding is ExactlyOneEncoding.SEQUENTIAL:
+        constraints.extend(at_most_one_sequential(literals, name, ctx))
+    elif encoding is ExactlyOneEncoding.COMMANDER:
+        constraints.extend(at_most_one_commander(literals, name, ctx))
+    elif encoding is ExactlyOneEncoding.BIMANDER:
+        constraints.extend(at_most_one_bimander(literals, name, ctx))
+    else:
+        constraints.extend(at_most_one_pairwise(literals, ctx))
+    return constraints
+
+
+def at_most_one_pairwise(literals: List[z3.BoolRef], ctx: Context) -> List[z3.BoolRef]:
+    """Each marked literal refutes all others - quadratic in the row length."""
+    return [
+        Implies(lit, And(*[Not(other, ctx) for j, other in enumerate(literals) if j != i], ctx), ctx)
+        for i, lit in enumerate(literals)
+    ]
+
+
+def at_most_one_sequential(literals: List[z3.BoolRef], name: str, ctx: Context) -> List[z3.BoolRef]:
+    """Sequential counter (Sinz, 2005): auxiliary `s_i` marks that some literal up to `i` holds - 3n clauses."""
+    n = len(literals)
+    if n <= 1:
+        return []
+
+    seen = [Bool(f'{name}_s{i}', ctx) for i in range(n - 1)]
+    constraints = [Implies(literals[0], seen[0], ctx)]
+    for i in range(1, n - 1):
+        constraints.extend([
+            Implies(literals[i], seen[i], ctx),
+            Implies(seen[i - 1], seen[i], ctx),
+            Implies(literals[i], Not(seen[i - 1], ctx), ctx),
+        ])
+    constraints.append(Implies(literals[-1], Not(seen[-1], ctx), ctx))
+    return constraints
+
+
+def at_most_one_commander(literals: List[z3.BoolRef], name: str, ctx: Context,
+                          group_size: int = 3) -> List[z3.BoolRef]:
+    """
+    Commander encoding (Klieber & Kwon, 2007): pairwise at-most-one within small groups, each group led by a
+    commander variable, with the commanders constrained recursively.
+    """
+    if len(literals) <= group_size + 1:
+        return at_most_one_pairwise(literals, ctx)
+
+    groups = [literals[i:i + group_size] for i in range(0, len(literals), group_size)]
+    commanders = [Bool(f'{name}_c{k}', ctx) for k in range(len(groups))]
+
+    constraints = []
+    for commander, group in zip(commanders, groups):
+        constraints.extend(at_most_one_pairwise(group, ctx))
+        # The commander holds iff some literal of its group holds
+        constraints.append(Implies(commander, Or(*group, ctx), ctx))
+        constraints.extend(Implies(lit, commander, ctx) for lit in group)
+
+    constraints.extend(at_most_one_commander(commanders, f'{name}_c', ctx, group_size))
+    return constraints
+
+
+def at_most_one_bimander(literals: List[z3.BoolRef], name: str, ctx: Context) -> List[z3.BoolRef]:
+    """
+    Bimander encoding (Hölldobler & Nguyen, 2013): pairwise at-most-one within about sqrt(n) groups, and each
+    group index is spelled in binary with shared auxiliary bits, so that literals of two groups clash.
+    """
+    n = len(literals)
+    group_size = max(1, ceil(sqrt(n)))
+    groups = [literals[i:i + group_size] for i in range(0, n, group_size)]
+    if len(groups) <= 1:
+        return at_most_one_pairwise(literals, ctx)
+
+    bits = [Bool(f'{name}_b{j}', ctx) for j in range(ceil(log2(len(groups))))]
+    constraints = []
+    for k, group in enumerate(groups):
+        constraints.extend(at_most_one_pairwise(group, ctx))
+        code = [bit if k >> j & 1 else Not(bit, ctx) for j, bit in enumerate(bits)]
+        constraints.extend(Implies(lit, And(*code, ctx), ctx) for lit in group)
+    return constraints
@@ -33,14 +33,15 @@ class PuzzleType(Enum):
     """World/puzzle type variants."""
     LINE = auto(),
     GRID = auto(),
-    MAZE = auto()
+    MAZE = auto(),
+    GRAPH = auto()
 
     @classmethod
     def from_string(cls, s: str) -> 'PuzzleType':
         """Convert string argument to PuzzleType enum.
 
         Args:
-            s: String representation ('line', 'grid', 'maze')
+            s: String representation ('line', 'grid', 'maze', 'graph')
 
         Returns:
             Corresponding PuzzleType enum value
@@ -51,7 +52,8 @@ class PuzzleType(Enum):
         mapping = {
             'line': cls.LINE,
             'grid': cls.GRID,
-            'maze': cls.MAZE
+            'maze': cls.MAZE,
+            'graph': cls.GRAPH
         }
         s_lower = s.lower().strip()
         if s_lower not in mapping:
@@ -115,3 +117,161 @@ class Precision(Enum):
         if s_lower not in mapping:
             raise ValueError(f"Invalid precision: {s}. Must be one of {list(mapping.keys())}")
         return mapping[s_lower]
+
+
+class ExactlyOneEncoding(Enum):
+    """Encoding of the exactly-one constraints over one-hot Boolean rows (observations, strategies)."""
+    DEFAULT = auto()     # Variant-specific default (pairwise, with an extra PbEq for POP observations)
+    PAIRWISE = auto()    # At-least-one clause with pairwise mutual exclusion (quadratic)
+    PBEQ = auto()        # Pseudo-Boolean equality only
+    SEQUENTIAL = auto()  # Sequential counter with auxiliary prefix variables (linear)
+    COMMANDER = auto()   # Commander variables over small groups (linear)
+    BIMANDER = auto()    # Binary-coded group commanders (linear)
+
+    @classmethod
+    def from_string(cls, s: str) -> 'ExactlyOneEncoding':
+        """Convert string to ExactlyOneEncoding enum.
+
+        Args:
+            s: String representation ('default', 'pairwise', 'pbeq', 'sequential', 'commander', 'bimander')
+
+        Returns:
+            Corresponding ExactlyOneEncoding enum value
+
+        Raises:
+            ValueError: If string doesn't match any encoding
+        """
+        mapping = {
+            'default': cls.DEFAULT,
+            'pairwise': cls.PAIRWISE,
+            'pbeq': cls.PBEQ,
+            'sequential': cls.SEQUENTIAL,
+            'commander': cls.COMMANDER,
+            'bimander': cls.BIMANDER
+        }
+        s_lower = s.lower().strip()
+        if s_lower not in mapping:
+            raise ValueError(f"Invalid exactly_one encoding: {s}. Must be one of {list(mapping.keys())}")
+        return mapping[s_lower]
+
+
+class RewardEncoding(Enum):
+    """Sort of the expected reward variables."""
+    REAL = auto()  # Rational rewards (LRA), required by randomised strategies
+    INT = auto()   # Integral rewards (LIA) for deterministic strategies with the boolean encoding
+    BITVEC = auto()  # Saturating bit-vector rewards (QF_BV, bit-blasted) for deterministic strategies
+
+    @classmethod
+    def from_string(cls, s: str) -> 'RewardEncoding':
+        """Convert string to RewardEncoding enum.
+
+        Args:
+            s: String representation ('real', 'int', 'bitvec')
+
+        Returns:
+            Corresponding RewardEncoding enum value
+
+        Raises:
+            ValueError: If string doesn't match any encoding
+        """
+        mapping = {
+            'real': cls.REAL,
+            'int': cls.INT,
+            'bitvec': cls.BITVEC
+        }
+        s_lower = s.lower().strip()
+        if s_lower not in mapping:
+            raise ValueError(f"Invalid reward_encoding: {s}. Must be one of {list(mapping.keys())}")
+        return mapping[s_lower]
+
+
+class ObservationEncoding(Enum):
+    """Encoding of the observation class of each non-goal state (POP only)."""
+    ONE_HOT = auto()  # One Boolean/binary variable per class, with exactly-one constraints
+    INT = auto()      # A single integer class index in [0, B)
+    BITVEC = auto()   # A single ceil(log2 B)-bit class index below B
+
+    @classmethod
+    def from_string(cls, s: str) -> 'ObservationEncoding':
+        """Convert string to ObservationEncoding enum.
+
+        Args:
+            s: String representation ('one-hot', 'int', 'bitvec')
+
+        Returns:
+            Corresponding ObservationEncoding enum value
+
+        Raises:
+            ValueError: If string doesn't match any encoding
+        """
+        mapping = {
+            'one-hot': cls.ONE_HOT,
+            'int': cls.INT,
+            'bitvec': cls.BITVEC
+        }
+        s_lower = s.lower().strip()
+        if s_lower not in mapping:
+            raise ValueError(f"Invalid observation_encoding: {s}. Must be one of {list(mapping.keys())}")
+        return mapping[s_lower]
+
+
+class SolverBackend(Enum):
+    """Z3 engine of the executor."""
+    SOLVER = auto()    # Feasibility (SAT/UNSAT) against the threshold
+    OPTIMIZE = auto()  # `z3.Optimize` minimising the expected reward, reporting the anytime incumbents
+
+    @classmethod
+    def from_string(cls, s: str) -> 'SolverBackend':
+        """Convert string to SolverBackend enum.
+
+        Args:
+            s: String representation ('solver', 'optimize')
+
+        Returns:
+            Corresponding SolverBackend enum value
+
+        Raises:
+            ValueError: If string doesn't match any backend
+        """
+        mapping = {
+            'solver': cls.SOLVER,
+            'optimize': cls.OPTIMIZE
+        }
+        s_lower = s.lower().strip()
+        if s_lower not in mapping:
+            raise ValueError(f"Invalid backend: {s}. Must be one of {list(mapping.keys())}")
+        return mapping[s_lower]
+
+
+class SolverProfile(Enum):
+    """Tactic pipeline and parameter set of the Z3 solver, tailored to the logical fragment of an instance."""
+    DEFAULT = auto()       # Z3's default solver (strategy picked from the asserted logic)
+    LRA_SIMPLEX = auto()   # Linear real arithmetic + booleans (deterministic strategies): preprocessing + SMT simplex
+    SAT_BITBLAST = auto()  # Pure boolean/bit-vector instances (bit-vector rewards): bit-blasting to the SAT core
+    NLSAT = auto()         # Nonlinear real arithmetic (randomised strategies): nlsat decision procedure
+    PB_SOLVER = auto()     # Pseudo-boolean heavy instances (PbEq budgets/one-hot rows): tuned PB theory in SMT
+
+    @classmethod
+    def from_string(cls, s: str) -> 'SolverProfile':
+        """Convert string to SolverProfile enum.
+
+        Args:
+            s: String representation ('default', 'lra-simplex', 'sat-bitblast', 'nlsat', 'pb-solver')
+
+        Returns:
+            Corresponding SolverProfile enum value
+
+        Raises:
+            ValueError: If string doesn't match any profile
+        """
+        mapping = {
+            'default': cls.DEFAULT,
+            'lra-simplex': cls.LRA_SIMPLEX,
+            'sat-bitblast': cls.SAT_BITBLAST,
+            'nlsat': cls.NLSAT,
+            'pb-solver': cls.PB_SOLVER
+        }
+        s_lower = s.lower().strip()
+        if s_lower not in mapping:
+            raise ValueError(f"Invalid profile: {s}. Must be one of {list(mapping.keys())}")
+        return mapping[s_lower]
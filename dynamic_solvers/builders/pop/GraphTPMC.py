@@ -0,0 +1,67 @@
+from typing import Unpack
+
+import numpy as np
+
+from builders.pop.POPSpec import POPSpec
+from builders.worlds import GraphWorld, load_csr_adjacency
+from builders.typedicts import OperationKWArgs
+from utils import get_observation_marker
+
+
+class GraphTPMC(GraphWorld, POPSpec):
+    def __init__(self, budget: int, goal: int, adjacency: str | tuple[np.ndarray, ...],
+                 determinism: bool = False, **kwargs: Unpack[OperationKWArgs]):
+        """Create a Graph POP instance.
+
+        Args:
+            budget: Budget constraint (number of observation classes allowed).
+            goal: Goal state index.
+            adjacency: Path to a `.npz` CSR adjacency, or a tuple (indptr, indices[, action_ids[, actions]]).
+                See GraphWorld for details.
+            determinism: Use deterministic strategies (default: False).
+            **kwargs: Additional parameters (ctx, verbose, bellman_format).
+                See OOPSpec.__init__ for details.
+        """
+        if isinstance(adjacency, str):
+            adjacency = load_csr_adjacency(adjacency)
+        GraphWorld.__init__(self, *adjacency[:2], goal, *adjacency[2:])
+        POPSpec.__init__(self, budget, goal, determinism, **kwargs)
+
+    def draw_model(self, model: dict, goal_state: int, budget: int, use_color: bool = True,
+                   row_length: int = 20) -> str:
+        """Draw graph world states in rows of `row_length` with observation classes marked in the POP setting."""
+        lines = []
+        lines.append(f"Graph World ({self.size} states) (POP):")
+        lines.append("")
+
+        # Calculate width needed for state numbers
+        max_state = self.size - 1
+        num_width = len(str(max_state))
+        cell_width = num_width + 3  # 1 leading space + num_width + 2 trailing spaces
+
+        for row_start in range(0, self.size, row_length):
+            state_line = ""
+            obs_line = ""
+
+            for state in range(row_start, min(row_start + row_length, self.size)):
+                state_line += f" {state:{num_width}}  "
+                padding = (cell_width - 1) // 2
+                if state == goal_state:
+                    obs_line += " " * padding + "✓" + " " * (cell_width - padding - 1)
+                else:
+                    # Find which observation class this state belongs to
+                    obs_class = self.observation_class(model, state)
+                    symbol = get_observation_marker(obs_class, use_color)
+                    obs_line += " " * padding + symbol + " " * (cell_width - padding - 1)
+
+            lines.append(state_line)
+            lines.append(obs_line)
+            lines.append("")
+
+        # Build legend
+        legend = "Legend: ✓=goal"
+        for o in range(1, budget + 1):
+            legend += f", {get_observation_marker(o, use_color)}=obs {o}"
+        lines.append(legend)
+
+        return "\n".join(lines)
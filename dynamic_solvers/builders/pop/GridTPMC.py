@@ -49,11 +49,7 @@ class GridTPMC(Grid, POPSpec):
                 else:
                     state_line += f" {state:{num_width}}  "
                     # Find which observation class this state belongs to
-                    obs_class = 0
-                    for o in range(1, budget + 1):
-                        if self.is_obs_selected(model, f'ys{state}o{o}'):
-                            obs_class = o
-                            break
+                    obs_class = self.observation_class(model, state)
                     symbol = get_observation_marker(obs_class, use_color)
                     # Center the symbol in the cell (ANSI colors don't affect width)
                     padding = (cell_width - 1) // 2
@@ -85,4 +81,4 @@ if __name__ == "__main__":
         tpMC = GridTPMC(budget, goal, size, size, determinism=det == 1)
 
         tpMC.declare_variables()
-        tpMC.collect_constraints(threshold)
+        list(tpMC.collect_constraints(threshold))
@@ -45,11 +45,7 @@ class MazeTPMC(Maze, POPSpec):
             else:
                 top_state_line += f" {state:{num_width}}  "
                 # Find which observation class this state belongs to
-                obs_class = 0
-                for o in range(1, budget + 1):
-                    if self.is_obs_selected(model, f'ys{state}o{o}'):
-                        obs_class = o
-                        break
+                obs_class = self.observation_class(model, state)
                 symbol = get_observation_marker(obs_class, use_color, binary=False)
                 # Center the symbol in the cell (ANSI colors don't affect width)
                 padding = (cell_width - 1) // 2
@@ -92,11 +88,7 @@ class MazeTPMC(Maze, POPSpec):
                 else:
                     row_state_line += f" {state:{num_width}}  "
                     # Find which observation class this state belongs to
-                    obs_class = 0
-                    for o in range(1, budget + 1):
-                        if self.is_obs_selected(model, f'ys{state}o{o}'):
-                            obs_class = o
-                            break
+                    obs_class = self.observation_class(model, state)
                     symbol = get_observation_marker(obs_class, use_color)
                     # Center the symbol in the cell (ANSI colors don't affect width)
                     padding = (cell_width - 1) // 2
@@ -132,4 +124,4 @@ if __name__ == "__main__":
         tpMC = MazeTPMC(budget, goal, width, depth, determinism=det == 1)
 
         tpMC.declare_variables()
-        tpMC.collect_constraints(threshold)
+        list(tpMC.collect_constraints(threshold))
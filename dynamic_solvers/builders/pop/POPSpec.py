@@ -1,12 +1,14 @@
 from abc import ABC
-from itertools import chain
-from typing import List, override
+from itertools import chain, product
+from typing import List, Iterator, Optional, override
 
-from z3 import z3, Or, Sum, Implies, And, Not, PbEq
+import numpy as np
+from z3 import z3, Or, Sum, Implies, And, Not, PbEq, Bool, Int, BitVec, If, ULT
 
 from builders.OOPSpec import OOPSpec
-from builders.enums import Precision, OOPVariant
-from utils import init_var_type
+from builders.cardinality import exactly_one
+from builders.enums import Precision, OOPVariant, ExactlyOneEncoding, ObservationEncoding
+from utils import init_var_type, restricted_growth_strings
 
 
 class POPSpec(OOPSpec, ABC):
@@ -18,7 +20,19 @@ class POPSpec(OOPSpec, ABC):
         self.Y = self.declare_observation_function(observable_states)
         self.X = self.declare_strategy_mapping()
 
-    def declare_observation_function(self, observable_states: List[int]) -> List[List[z3.ArithRef]]:
+    def declare_observation_function(self, observable_states: List[int]) -> List[List[z3.ArithRef]] | List[z3.ExprRef]:
+        if self.observation_encoding is not ObservationEncoding.ONE_HOT:
+            # Index of the observation class of each state (e.g. `ys0 = 1` means that in state 0, observable 2 is observed)
+            self.console.print("\n# Choice of observations as class indices (e.g. `ys0 = 1` means that in state 0, observable 2 is observed)")
+            if self.observation_encoding is ObservationEncoding.BITVEC:
+                width = max(1, (self.budget - 1).bit_length())
+                state_to_observation = [BitVec(f'ys{s}', width, self.ctx) for s in observable_states]
+            else:
+                state_to_observation = [Int(f'ys{s}', self.ctx) for s in observable_states]
+
+            self.console.print(state_to_observation)
+            return state_to_observation
+
         # Choice of observations on the states (e.g. `ys0o1 = 1` means that in state 0, observable 1 is observed)
         self.console.print("\n# Choice of observations (e.g. `ys0o1 = 1` means that in state 0, observable 1 is observed)")
 
@@ -45,15 +59,34 @@ class POPSpec(OOPSpec, ABC):
         self.console.print(observation_to_action)
         return observation_to_action
 
+    def observes(self, state_idx: int, o: int) -> z3.BoolRef:
+        """Whether the non-goal state with index `state_idx` observes the class `o` (0-based), in any encoding."""
+        obs = self.Y[state_idx]
+        if self.observation_encoding is not ObservationEncoding.ONE_HOT:
+            return obs == o
+        return obs[o] if z3.is_bool(obs[o]) else obs[o] == 1
+
+    def observation_class(self, model: dict, state: int) -> int:
+        """Observation class (1-based) of `state` in a model of the observation variables, 0 if none is observed."""
+        if self.observation_encoding is not ObservationEncoding.ONE_HOT:
+            index = model.get(f'ys{state}')
+            if index is None:
+                return 0
+            return (index.as_long() if z3.is_expr(index) else int(index)) + 1
+
+        for o in range(1, self.budget + 1):
+            if self.is_obs_selected(model, f'ys{state}o{o}'):
+                return o
+        return 0
+
     @override
     def _compute_state_bellman_bool_det(self, state: int, state_idx: int) -> List[z3.BoolRef]:
-        is_relaxed = (self.precision is Precision.RELAXED)
+        successors = self.succ[state].tolist()
         return [
             Implies(
-                And(self.Y[state_idx][o], self.X[o][a], self.ctx),
+                And(self.observes(state_idx, o), self.X[o][a], self.ctx),
                 # Bellman relaxation (≥ Invariance): identify an invariant upper bound on expected rewards (original ==)
-                self.ExpRew[state] >= 1 + self.ExpRew[self.navigate(state, a)] if is_relaxed
-                else self.ExpRew[state] == 1 + self.ExpRew[self.navigate(state, a)],
+                self.build_step_relation(state, successors[a]),
                 self.ctx)
             for o in range(self.budget)
             for a in range(len(self.actions))
@@ -62,93 +95,188 @@ class POPSpec(OOPSpec, ABC):
     @override
     def _compute_state_bellman_bool_rand(self, state: int, state_idx: int) -> List[z3.BoolRef]:
         is_relaxed = (self.precision is Precision.RELAXED)
+        successors = self.succ[state].tolist()
 
         return [
             Implies(
-                self.Y[state_idx][o],
+                self.observes(state_idx, o),
                 # Bellman relaxation (≥ Invariance): identify an invariant upper bound on expected rewards (original ==)
-                self.ExpRew[state] >= 1 + Sum([self.ExpRew[self.navigate(state, a)] * self.X[o][a]
+                self.ExpRew[state] >= 1 + Sum([self.ExpRew[successors[a]] * self.X[o][a]
                                                 for a in range(len(self.actions))]) if is_relaxed
-                else self.ExpRew[state] == 1 + Sum([self.ExpRew[self.navigate(state, a)] * self.X[o][a]
+                else self.ExpRew[state] == 1 + Sum([self.ExpRew[successors[a]] * self.X[o][a]
                                                     for a in range(len(self.actions))]),
                 self.ctx)
             for o in range(self.budget)
         ]
 
     def build_action_term(self, action_idx: int, state_idx: int):
+        if self.observation_encoding is not ObservationEncoding.ONE_HOT:
+            return Sum([If(self.observes(state_idx, o), self.X[o][action_idx], 0, self.ctx)
+                        for o in range(self.budget)])
         return Sum([self.Y[state_idx][o] * self.X[o][action_idx]
                     for o in range(self.budget)])
 
-    def build_observation_constraints(self) -> List[z3.BoolRef]:
+    def build_action_condition(self, action_idx: int, state_idx: int) -> z3.BoolRef:
+        return Or([And(self.observes(state_idx, o), self.X[o][action_idx] == 1, self.ctx)
+                   for o in range(self.budget)], self.ctx)
+
+    def build_observation_constraints(self) -> Iterator[z3.BoolRef]:
         # Observation function constraints - every state should be mapped to some observable class
         self.console.print("\n# Observation function constraints - every state should be mapped to a single/concrete observable class (total function)")
-        constraints = []
+        # Constraint groups are streamed lazily (the pairwise exclusions grow with |S|·B²)
+        groups = []
 
-        if self.bool_encoding:
+        if self.observation_encoding is ObservationEncoding.INT:
+            # Every state is assigned a single class index in [0, B) - no exactly-one constraints needed
+            groups.append(bound for obs in self.Y for bound in [obs >= 0, obs < self.budget])
+        elif self.observation_encoding is ObservationEncoding.BITVEC:
+            # Unsigned class indices only need an upper bound when B is not a power of two
+            groups.append(ULT(obs, self.budget) for obs in self.Y
+                          if self.budget < 2 ** obs.size())
+        elif self.bool_encoding and self.exactly_one is not ExactlyOneEncoding.DEFAULT:
+            # Every state is assigned exactly one observation, under the selected encoding
+            observable_states = [s for s in range(self.size) if s != self.goal]
+            groups.append(constraint
+                          for s, state_obs in zip(observable_states, self.Y)
+                          for constraint in exactly_one(state_obs, self.exactly_one, f'eoys{s}', self.ctx))
+        elif self.bool_encoding:
             # Every state is assigned some observation (at least one of them, total function)
-            constraints.extend([Or(*state_obs, self.ctx) for state_obs in self.Y])
+            groups.append(Or(*state_obs, self.ctx) for state_obs in self.Y)
             # For each state, assigned observations are mutually exclusive (if one is marked, others are refuted)
-            constraints.extend([
+            groups.append(
                 Implies(
                     self.Y[s][o1],
                     And(*[Not(self.Y[s][o2], self.ctx) for o2 in range(self.budget) if o2 != o1], self.ctx),
                     self.ctx)
                 for s in range(len(self.Y))
                 for o1 in range(self.budget)
-            ])
+            )
 
             # Try no. 2: ITE operators to perform the sum over booleans - function maps to a single observation
             # Decidability ensured if using 1.0 (z3.Real) instead of 1 (z3.Int)
-            # constraints.extend([Sum(state_obs) == 1.0 for state_obs in self.Y])
+            # groups.append(Sum(state_obs) == 1.0 for state_obs in self.Y)
 
             # Try no. 3: Pseudo-Boolean equality constraint - function maps to a single observation
-            constraints.extend([PbEq([(obs, 1) for obs in state_obs], 1, self.ctx) for state_obs in self.Y])
+            groups.append(PbEq([(obs, 1) for obs in state_obs], 1, self.ctx) for state_obs in self.Y)
         else:
             # Every state is assigned some observation (exactly one of them, total function property)
             # Observations are either assigned or not - bind to binary values
-            constraints.extend([Or(obs == 0, obs == 1, self.ctx)
-                                    for state_obs in self.Y
-                                    for obs in state_obs])
+            groups.append(Or(obs == 0, obs == 1, self.ctx)
+                          for state_obs in self.Y
+                          for obs in state_obs)
 
             # Degenerate categorical distributions (one-hot) of observation assignments for each state (only a single observation class can be assigned)
-            constraints.extend([Sum(state_obs) == 1 for state_obs in self.Y])
+            groups.append(Sum(state_obs) == 1 for state_obs in self.Y)
+
+        yield from self.stream_logged(chain.from_iterable(groups))
+
+    def build_class_symmetry_constraints(self) -> List[z3.BoolRef]:
+        """
+        Break the interchangeability of the observation classes with value precedence: class `o+1` may only be
+        observed in a state if class `o` is observed in some earlier state (the first state observes class 1).
+        Auxiliary variables `us{s}o{o}` mark that class `o` is observed in some state before `s`.
+        """
+        if not self.class_symmetry_breaking:
+            return []
+
+        self.console.print("\n# Observation class symmetry breaking - classes are claimed in the order of the states")
+        observable_states = [s for s in range(self.size) if s != self.goal]
+        observed = [[self.observes(i, o) for o in range(self.budget)] for i in range(len(self.Y))]
+        used_before = [[Bool(f'us{s}o{o+1}', self.ctx) for o in range(self.budget)] for s in observable_states]
+
+        constraints = []
+        for i in range(len(self.Y)):
+            for o in range(self.budget):
+                # A class is used before a state only if it is used before or in the previous state
+                constraints.append(
+                    Not(used_before[i][o], self.ctx) if i == 0
+                    else Implies(used_before[i][o], Or(used_before[i-1][o], observed[i-1][o], self.ctx), self.ctx))
+                if o > 0:
+                    constraints.append(Implies(observed[i][o], used_before[i][o-1], self.ctx))
 
         self.console.print(constraints)
         return constraints
 
-    def collect_constraints(self, threshold: str) -> List[z3.BoolRef]:
+    def collect_constraints(self, threshold: Optional[str]) -> Iterator[z3.BoolRef]:
         self.console.print("\n  🛠️  Building constraints...", justify="center")
 
         if self.order_constraints is not None:
             builders = [
                 lambda: [*self.build_fully_observable_constraints(), self.build_threshold_constraint(threshold)],
                 lambda: self.build_bellman_equations(),
-                lambda: [*self.build_strategy_constraints(), *self.build_observation_constraints()],
-                lambda: [],
+                lambda: chain(self.build_strategy_constraints(), self.build_observation_constraints(),
+                              self.build_symmetry_breaking_constraints(), self.build_class_symmetry_constraints()),
+                lambda: self.build_budget_selectors() if self.budget_sweep else [],
             ]
             self.console.print("\nApplying order of constraints:")
             self.console.print(", ".join(f"{i} <- {order}" for (i, order) in enumerate(self.order_constraints)))
-            constraints = [builders[i]() for i in self.order_constraints]
 
-            # Flatten constraints for solver loading
-            return list(chain.from_iterable(constraints))
+            # Stream the constraint groups in the given order
+            for i in self.order_constraints:
+                yield from builders[i]()
+            return
 
-        constraints = [
-            *self.build_fully_observable_constraints(),
-            *self.build_bellman_equations(),
-            self.build_threshold_constraint(threshold),
-            *self.build_strategy_constraints(),
-            *self.build_observation_constraints(),
-        ]
+        yield from self.build_fully_observable_constraints()
+        yield from self.build_bellman_equations()
+        yield self.build_threshold_constraint(threshold)
+        yield from self.build_strategy_constraints()
+        yield from self.build_observation_constraints()
+        yield from self.build_symmetry_breaking_constraints()
+        yield from self.build_class_symmetry_constraints()
+        if self.budget_sweep:
+            yield from self.build_budget_selectors()
 
-        return constraints
+    @override
+    def _observation_vars(self, state: int) -> List[z3.ExprRef]:
+        if self.observation_encoding is ObservationEncoding.ONE_HOT:
+            return super()._observation_vars(state)
+        # Reversed class indices: the lex-greatest leader then prefers the smaller classes, like one-hot rows do
+        return [self.budget - 1 - self.Y[state - 1 if state > self.goal else state]]
 
     @override
     def repair_constraints(self) -> List[z3.BoolRef]:
         return []
 
+    @property
+    @override
+    def min_budget(self) -> int:
+        # A single observation class (every state looks alike)
+        return 1
+
+    @override
+    def build_budget_selectors(self) -> List[z3.BoolRef]:
+        # Budget sweep - selector literals `unusedo<o>` leave class `o` unobserved (any budget below `o` activates them)
+        self.console.print("\n# Budget sweep - observation classes left unobserved under selector literals `unusedo<o>`")
+        constraints = [Implies(Bool(f'unusedo{o+1}', self.ctx),
+                               And(*[Not(self.observes(i, o), self.ctx) for i in range(len(self.Y))], self.ctx),
+                               self.ctx)
+                       for o in range(self.min_budget, self.budget)]
+        self.console.print(constraints)
+        return constraints
+
+    @override
+    def budget_assumptions(self, budget: int) -> List[z3.BoolRef]:
+        return [Bool(f'unusedo{o+1}', self.ctx) for o in range(budget, self.budget)]
+
+    @override
+    def build_cubes(self, depth: int) -> List[List[z3.BoolRef]]:
+        # Splitting states - the state nearest the goal in each atomic group, the groups nearest the goal first
+        goal_dist = self.goal_distances()
+        representatives = sorted((int(states[np.argmin(goal_dist[states])]) for states in self.clusters.values()),
+                                 key=lambda s: (goal_dist[s], s))[:depth]
+        indices = [s - 1 if s > self.goal else s for s in representatives]
+        if self.symmetry_breaking or self.class_symmetry_breaking or self.budget_sweep:
+            # The classes are no longer interchangeable: split on every class of each splitting state
+            labellings = product(range(self.budget), repeat=len(indices))
+        else:
+            # Interchangeable classes: one cube per partition of the splitting states into at most `budget` classes
+            labellings = restricted_growth_strings(len(indices), self.budget)
+        return [[self.observes(i, o) for i, o in zip(indices, labelling)] for labelling in labellings]
+
     @override
     def extract_obs_solution(self, obs_function: list[int]) -> dict[str, int]:
+        if self.observation_encoding is not ObservationEncoding.ONE_HOT:
+            return {f"ys{s}": obs_function[s] for s in range(self.size) if s != self.goal}
         return {f"ys{s}o{o+1}": obs_function[s] == o for s in range(self.size) for o in range(self.budget)}
 
     @override
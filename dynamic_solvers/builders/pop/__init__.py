@@ -1,5 +1,6 @@
 from .LineTPMC import LineTPMC
 from .GridTPMC import GridTPMC
 from .MazeTPMC import MazeTPMC
+from .GraphTPMC import GraphTPMC
 
-__all__ = ['LineTPMC', 'GridTPMC', 'MazeTPMC']
+__all__ = ['LineTPMC', 'GridTPMC', 'MazeTPMC', 'GraphTPMC']
@@ -0,0 +1,64 @@
+from typing import Unpack
+
+import numpy as np
+
+from builders.ssp.SSPSpec import SSPSpec
+from builders.worlds import GraphWorld, load_csr_adjacency
+from builders.typedicts import OperationKWArgs
+from utils import get_observation_marker
+
+
+class GraphTPMC(GraphWorld, SSPSpec):
+    def __init__(self, budget: int, goal: int, adjacency: str | tuple[np.ndarray, ...],
+                 determinism: bool = False, **kwargs: Unpack[OperationKWArgs]):
+        """Create a Graph SSP instance.
+
+        Args:
+            budget: Budget constraint (number of sensors allowed).
+            goal: Goal state index.
+            adjacency: Path to a `.npz` CSR adjacency, or a tuple (indptr, indices[, action_ids[, actions]]).
+                See GraphWorld for details.
+            determinism: Use deterministic strategies (default: False).
+            **kwargs: Additional parameters (ctx, verbose, bellman_format).
+                See OOPSpec.__init__ for details.
+        """
+        if isinstance(adjacency, str):
+            adjacency = load_csr_adjacency(adjacency)
+        GraphWorld.__init__(self, *adjacency[:2], goal, *adjacency[2:])
+        SSPSpec.__init__(self, budget, goal, determinism, **kwargs)
+
+    def draw_model(self, model: dict, goal_state: int, budget: int, use_color: bool = True,
+                   row_length: int = 20) -> str:
+        """Draw graph world states in rows of `row_length` with sensor placements marked in the SSP setting."""
+        lines = []
+        lines.append(f"Graph World ({self.size} states) (SSP):")
+        lines.append("")
+
+        # Calculate width needed for state numbers
+        max_state = self.size - 1
+        num_width = len(str(max_state))
+        cell_width = num_width + 2  # Add padding
+
+        for row_start in range(0, self.size, row_length):
+            state_line = ""
+            sensor_line = ""
+
+            for state in range(row_start, min(row_start + row_length, self.size)):
+                state_line += f" {state:{num_width}}  "
+                padding = (cell_width - 1) // 2
+                if state == goal_state:
+                    sensor_line += " " * padding + "✓" + " " * (cell_width - padding)
+                else:
+                    sensor_on = self.is_obs_selected(model, f'ys{state}')
+                    symbol = get_observation_marker(1 if sensor_on else 0, use_color, binary=True)
+                    sensor_line += " " * padding + symbol + " " * (cell_width - padding)
+
+            lines.append(state_line)
+            lines.append(sensor_line)
+            lines.append("")
+
+        lines.append(f"Legend: ✓=goal, "
+                     f"{get_observation_marker(0, use_color, binary=True)}=sensor off, "
+                     f"{get_observation_marker(1, use_color, binary=True)}=sensor on")
+
+        return "\n".join(lines)
@@ -79,4 +79,4 @@ if __name__ == "__main__":
         tpMC = GridTPMC(budget, goal, size_x, size_y, determinism=det == 1)
 
         tpMC.declare_variables()
-        tpMC.collect_constraints(threshold)
+        list(tpMC.collect_constraints(threshold))
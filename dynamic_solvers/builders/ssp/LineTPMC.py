@@ -72,4 +72,4 @@ if __name__ == "__main__":
         tpMC = LineTPMC(budget, goal, size, determinism=det == 1)
 
         tpMC.declare_variables()
-        tpMC.collect_constraints(threshold)
+        list(tpMC.collect_constraints(threshold))
@@ -117,4 +117,4 @@ if __name__ == "__main__":
         tpMC = MazeTPMC(budget, goal, width, depth, determinism=det == 1)
 
         tpMC.declare_variables()
-        tpMC.collect_constraints(threshold)
+        list(tpMC.collect_constraints(threshold))
@@ -1,8 +1,9 @@
 from abc import ABC
-from itertools import chain
-from typing import List, override
+from itertools import product
+from typing import List, Iterator, Optional, override
 
-from z3 import z3, Or, Sum, And, Implies, Not, PbEq, PbLe
+import numpy as np
+from z3 import z3, Or, Sum, And, Implies, Not, PbEq, PbLe, Bool, If
 
 from builders.OOPSpec import OOPSpec
 from builders.enums import Precision, BellmanFormat, OOPVariant
@@ -51,13 +52,10 @@ class SSPSpec(OOPSpec, ABC):
 
     @override
     def _compute_state_bellman_bool_det(self, state: int, sensor: int) -> List[z3.BoolRef]:
-        is_relaxed = (self.precision is Precision.RELAXED)
         equations = []
 
-        for a in range(len(self.actions)):
-            next_state = self.navigate(state, a)
-            reward_relation = (self.ExpRew[state] >= 1 + self.ExpRew[next_state] if is_relaxed
-                                else self.ExpRew[state] == 1 + self.ExpRew[next_state])
+        for a, next_state in enumerate(self.succ[state].tolist()):
+            reward_relation = self.build_step_relation(state, next_state)
 
             # Next state activation -> reward computation with next state expected reward
             # TODO!: Disjunction of activations in implication lhs. for streamlining
@@ -75,9 +73,10 @@ class SSPSpec(OOPSpec, ABC):
     def _compute_state_bellman_bool_rand(self, state: int, sensor: int) -> List[z3.BoolRef]:
         is_relaxed = (self.precision is Precision.RELAXED)
         equations = []
+        successors = self.succ[state].tolist()
 
         # Weighted next-state rewards for activated sensor
-        weighted_rewards_on = Sum([self.X[sensor][a] * self.ExpRew[self.navigate(state, a)]
+        weighted_rewards_on = Sum([self.X[sensor][a] * self.ExpRew[successors[a]]
                                    for a in range(len(self.actions))])
         equations.append(Implies(self.Y[sensor],
                                 self.ExpRew[state] >= 1 + weighted_rewards_on if is_relaxed
@@ -85,7 +84,7 @@ class SSPSpec(OOPSpec, ABC):
                                 self.ctx))
 
         # Weighted next-state rewards for deactivated sensor (default observation)
-        weighted_rewards_off = Sum([self.X[-1][a] * self.ExpRew[self.navigate(state, a)]
+        weighted_rewards_off = Sum([self.X[-1][a] * self.ExpRew[successors[a]]
                                     for a in range(len(self.actions))])
         equations.append(Implies(Not(self.Y[sensor], self.ctx),
                                 self.ExpRew[state] >= 1 + weighted_rewards_off if is_relaxed
@@ -98,6 +97,9 @@ class SSPSpec(OOPSpec, ABC):
         return ((1 - self.Y[state_idx]) * self.X[-1][action_idx] +
                 self.Y[state_idx] * self.X[state_idx][action_idx])
 
+    def build_action_condition(self, action_idx: int, state_idx: int) -> z3.BoolRef:
+        return If(self.Y[state_idx] == 1, self.X[state_idx][action_idx] == 1, self.X[-1][action_idx] == 1, self.ctx)
+
     @override
     def initialize_terms(self) -> list[int]:
         """For SSP instances w/o determinism use adapted Bellman equation format."""
@@ -125,11 +127,12 @@ class SSPSpec(OOPSpec, ABC):
             self.console.print(constraints)
         return constraints
 
-    def build_budget_constraint(self):
+    def build_budget_constraint(self, budget: Optional[int] = None):
         # Budget constraint - total sensors used <= budget
         self.console.print("\n# Budget constraint - total no. of sensors activated <= budget")
 
         is_relaxed = (self.precision is Precision.RELAXED)
+        budget = self.budget if budget is None else budget
 
         if self.bool_encoding:
             # When working with the pseudo-boolean dedicated solver, we should enforce reward monotonicity
@@ -137,46 +140,65 @@ class SSPSpec(OOPSpec, ABC):
             # constraint = PbLe([(y, 1) for y in self.Y], self.budget) # ❌ worse performance
 
             # Cardinality constraint equal B w/ pseudo-booleans (more performant than If(y,1,0) summation)
-            constraint = PbEq([(y, 1) for y in self.Y], self.budget, self.ctx)
+            constraint = PbEq([(y, 1) for y in self.Y], budget, self.ctx)
         else:
             if is_relaxed:
                 # Relax budget in combination with Bellman-Invariance relaxation
                 # Not enforcing information monotonicity for rewards - ignore the distinguishability power of obs. functions
-                constraint = Sum(self.Y) <= self.budget
+                constraint = Sum(self.Y) <= budget
             else:
-                constraint = Sum(self.Y) == self.budget
+                constraint = Sum(self.Y) == budget
 
         self.console.print(constraint)
         return constraint
 
-    def collect_constraints(self, threshold: str) -> List[z3.BoolRef]:
+    @property
+    @override
+    def min_budget(self) -> int:
+        # No sensor at all (every state follows the default strategy)
+        return 0
+
+    @override
+    def build_budget_selectors(self) -> List[z3.BoolRef]:
+        # Budget sweep - one selector literal per budget, guarding the budget constraint of that budget
+        self.console.print("\n# Budget sweep - budget constraints guarded by selector literals `budget<b>`")
+        return [Implies(Bool(f'budget{b}', self.ctx), self.build_budget_constraint(b), self.ctx)
+                for b in range(self.min_budget, self.budget + 1)]
+
+    @override
+    def budget_assumptions(self, budget: int) -> List[z3.BoolRef]:
+        return [Bool(f'budget{budget}', self.ctx)]
+
+    def collect_constraints(self, threshold: Optional[str]) -> Iterator[z3.BoolRef]:
         self.console.print("\n  🛠️  Building constraints...", justify="center")
 
         if self.order_constraints is not None:
             builders = [
                 lambda: [*self.build_fully_observable_constraints(), self.build_threshold_constraint(threshold)],
                 lambda: self.build_bellman_equations(),
-                lambda: [*self.build_strategy_constraints(), *self.build_observation_constraints()],
-                lambda: [self.build_budget_constraint()],
+                lambda: [*self.build_strategy_constraints(), *self.build_observation_constraints(),
+                         *self.build_symmetry_breaking_constraints()],
+                lambda: self.build_budget_selectors() if self.budget_sweep else [self.build_budget_constraint()],
             ]
 
             self.console.print("\nApplying order of constraints:")
             self.console.print(", ".join(f"{i} <- {order}" for (i, order) in enumerate(self.order_constraints)))
 
-            constraints = [builders[i]() for i in self.order_constraints]
-
-            # Flatten constraints for solver loading
-            return list(chain.from_iterable(constraints))
-
-        constraints = [
-            * self.build_fully_observable_constraints(),
-            * self.build_bellman_equations(),
-            self.build_threshold_constraint(threshold),
-            * self.build_strategy_constraints(),
-            * self.build_observation_constraints(),
-            self.build_budget_constraint() if not self.budget_repair else True,
-        ]
-        return constraints
+            # Stream the constraint groups in the given order
+            for i in self.order_constraints:
+                yield from builders[i]()
+            return
+
+        yield from self.build_fully_observable_constraints()
+        yield from self.build_bellman_equations()
+        yield self.build_threshold_constraint(threshold)
+        yield from self.build_strategy_constraints()
+        yield from self.build_observation_constraints()
+        yield from self.build_symmetry_breaking_constraints()
+        if self.budget_sweep:
+            yield from self.build_budget_selectors()
+        else:
+            yield self.build_budget_constraint() if not self.budget_repair else True
 
     @override
     def repair_constraints(self) -> List[z3.BoolRef]:
@@ -184,6 +206,21 @@ class SSPSpec(OOPSpec, ABC):
             return [self.build_budget_constraint()]
         return []
 
+    @override
+    def build_cubes(self, depth: int) -> List[List[z3.BoolRef]]:
+        # Splitting states - the state of highest degree in each atomic group (nearest the goal on ties)
+        goal_dist = self.goal_distances()
+        degree = np.array([len(set(successors) - {s}) for s, successors in enumerate(self.succ.tolist())])
+        rank = lambda s: (-degree[s], goal_dist[s], s)
+        representatives = sorted((min(states.tolist(), key=rank) for states in self.clusters.values()),
+                                 key=rank)[:depth]
+        sensors = [self.Y[s - 1 if s > self.goal else s] for s in representatives]
+        on = [sensor if z3.is_bool(sensor) else sensor == 1 for sensor in sensors]
+        return [[literal if bit else Not(literal, self.ctx) for literal, bit in zip(on, bits)]
+                for bits in product((True, False), repeat=len(on))
+                # No cube activates more sensors than the budget
+                if sum(bits) <= self.budget]
+
     @override
     def extract_obs_solution(self, obs_function: list[int]) -> dict[str, int]:
         return {f"ys{i}": obs_function[i] for i in range(self.size)}
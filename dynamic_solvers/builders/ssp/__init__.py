@@ -1,5 +1,6 @@
 from .LineTPMC import LineTPMC
 from .GridTPMC import GridTPMC
 from .MazeTPMC import MazeTPMC
+from .GraphTPMC import GraphTPMC
 
-__all__ = ['LineTPMC', 'GridTPMC', 'MazeTPMC']
\ No newline at end of file
+__all__ = ['LineTPMC', 'GridTPMC', 'MazeTPMC', 'GraphTPMC']
\ No newline at end of file
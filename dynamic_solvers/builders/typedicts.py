@@ -9,7 +9,7 @@ Internal API (OperationKWArgs): Uses enums after Factory conversion
 from typing import TypedDict, Optional, Required, NotRequired, List, Literal
 from z3 import Context
 
-from builders.enums import BellmanFormat, Precision
+from builders.enums import BellmanFormat, Precision, ExactlyOneEncoding, RewardEncoding, ObservationEncoding
 
 
 class DimensionKWArgs(TypedDict, total=False):
@@ -20,11 +20,13 @@ class DimensionKWArgs(TypedDict, total=False):
         width (int): Width of the world (Grid/Maze).
         height (int): Height of the world (Grid, mapped to 'depth' for Maze internally).
         depth (int): Depth of the world (Maze, mapped from 'height' for Maze internally).
+        adjacency (str | tuple): CSR adjacency of the world (Graph), as a `.npz` path or (indptr, indices[, action_ids]).
     """
     length: Optional[int]
     width: Optional[int]
     height: Optional[int]
     depth: Optional[int]
+    adjacency: Optional[str | tuple]
 
 
 class OperationKWArgs(TypedDict, total=False):
@@ -36,16 +38,28 @@ class OperationKWArgs(TypedDict, total=False):
         verbose (bool): Enable verbose output (default: False).
         bellman_format (Optional[BellmanFormat]): Format for Bellman equations (enum)
         precision (Optional[Precision]): Constraint precision mode (enum)
+        exactly_one (Optional[ExactlyOneEncoding]): Encoding of the one-hot observation/strategy rows (enum)
+        reward_encoding (Optional[RewardEncoding]): Sort of the expected reward variables (enum)
+        observation_encoding (Optional[ObservationEncoding]): Encoding of the POP observation classes (enum)
         bool_encoding (Optional[bool]): Activate boolean encoding (`bitblast`) rather than real encoding
         order_constraints (Optional[List[int]]): Order of assertion of constraints for TPMC solver.
+        symmetry_breaking (bool): Add lex-leader constraints over the observations of symmetric states.
+        class_symmetry_breaking (bool): Order the interchangeable observation classes of POP instances.
+        budget_sweep (bool): Guard the budget by selector literals, to search the smallest sufficient budget.
     """
     ctx: Optional[Context]
     verbose: bool
     bellman_format: Optional[BellmanFormat]
     precision: Optional[Precision]
+    exactly_one: Optional[ExactlyOneEncoding]
+    reward_encoding: Optional[RewardEncoding]
+    observation_encoding: Optional[ObservationEncoding]
     bool_encoding: Optional[bool]
     order_constraints: Optional[List[int]]
     budget_repair: bool
+    budget_sweep: bool
+    symmetry_breaking: bool
+    class_symmetry_breaking: bool
 
 
 class ExtOperationParams(TypedDict, total=False):
@@ -57,18 +71,49 @@ class ExtOperationParams(TypedDict, total=False):
         verbose (bool): Enable verbose output (default: False).
         bellman_format (str): Format for Bellman equations ('default', 'common', 'adapted')
         precision (str): Constraint precision mode ('strict', 'relaxed')
+        exactly_one (str): Encoding of the one-hot rows ('default', 'pairwise', 'pbeq', 'sequential', 'commander', 'bimander')
+        reward_encoding (str): Sort of the expected reward variables ('real', 'int', 'bitvec')
+        observation_encoding (str): Encoding of the POP observation classes ('one-hot', 'int', 'bitvec')
         bool_encoding (Optional[bool]): Activate boolean encoding (`bitblast`) rather than real encoding
         order_constraints (Optional[List[int]]): Order of assertion of constraints for TPMC solver
         cluster: (Optional[bool]): Whether to use a clustering algorithm as the solver (only applicable to POP instances)
+        cache_dir (Optional[str]): Directory of the on-disk cache of built tpMC instances (not passed to constructors)
+        optimize (Optional[str]): Precision of the threshold bisection for the optimal reward (not passed to constructors)
+        backend (str): Z3 engine of the executor ('solver', 'optimize'; not passed to constructors)
+        profile (str): Tactic pipeline and parameters of the Z3 solver ('default', 'lra-simplex', 'sat-bitblast',
+            'nlsat', 'pb-solver'; not passed to constructors)
+        portfolio (Optional[int]): Number of configurations raced in separate processes (0 for all; not passed to
+            constructors)
+        seed (Optional[int]): Random seed of the SMT, arithmetic and SAT heuristics of Z3 (not passed to constructors)
+        seed_race (Optional[int]): Number of seeds raced in separate processes (not passed to constructors)
+        cube_and_conquer (Optional[int]): Number of worker processes conquering the cubes of each instance (not passed
+            to constructors)
+        symmetry_breaking (bool): Add lex-leader constraints over the observations of symmetric states.
+        class_symmetry_breaking (bool): Order the interchangeable observation classes of POP instances.
+        budget_sweep (bool): Search the smallest sufficient budget (up to `budget`) on one incremental solver.
     """
     ctx: Optional[Context]
     verbose: bool
     bellman_format: Optional[Literal['default', 'common', 'adapted']]
     precision: Optional[Literal['strict', 'relaxed']]
+    exactly_one: Optional[Literal['default', 'pairwise', 'pbeq', 'sequential', 'commander', 'bimander']]
+    reward_encoding: Optional[Literal['real', 'int', 'bitvec']]
+    observation_encoding: Optional[Literal['one-hot', 'int', 'bitvec']]
     bool_encoding: Optional[bool]
     order_constraints: Optional[List[int]]
     cluster: Optional[bool]
+    cache_dir: Optional[str]
+    optimize: Optional[str]
+    backend: Optional[Literal['solver', 'optimize']]
+    profile: Optional[Literal['default', 'lra-simplex', 'sat-bitblast', 'nlsat', 'pb-solver']]
+    portfolio: Optional[int]
+    cube_and_conquer: Optional[int]
+    seed: Optional[int]
+    seed_race: Optional[int]
     budget_repair: bool
+    budget_sweep: bool
+    symmetry_breaking: bool
+    class_symmetry_breaking: bool
 
 
 class TPMCParams(DimensionKWArgs, ExtOperationParams):
@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
+from itertools import permutations
 from typing import List, Optional, Set
 
+import numpy as np
+
 from builders.enums import PuzzleType
-from direction import Direction
+from direction import Direction, minimal_action_cover
 
 
 class World(ABC):
@@ -10,12 +13,19 @@ class World(ABC):
     actions: List[str]
     puzzle_type: PuzzleType
     goal: int
-    clusters: dict[Direction, Set[int]]
+    succ: np.ndarray  # Successor table `succ[state, action]` (built once at construction)
+    atomic_labels: np.ndarray  # Atomic group index of each state (-1 for the goal), in the key order of `clusters`
+    clusters: dict[Direction, np.ndarray]  # Sorted state indices of each atomic group
 
     @abstractmethod
-    def navigate(self, state: int, action: int) -> int:
+    def _build_successors(self) -> np.ndarray:
+        """Build the successor table of shape (size, |actions|), with columns ordered as `self.actions`."""
         raise NotImplementedError()
 
+    def navigate(self, state: int, action: int) -> int:
+        """Successor of `state` under the action with index `action` (table lookup)."""
+        return int(self.succ[state, action])
+
     @abstractmethod
     def dist(self, source: int, target: int) -> int:
         raise NotImplementedError()
@@ -24,13 +34,107 @@ class World(ABC):
     def get_dimensions(self) -> tuple[int, int]:
         raise NotImplementedError()
 
-    @abstractmethod
-    def cluster(self) -> dict[Direction, List[int]]:
-        raise NotImplementedError()
+    def goal_distances(self) -> np.ndarray:
+        """Shortest-path distances from every state to the goal state."""
+        return np.fromiter((self.dist(s, self.goal) for s in range(self.size)),
+                           dtype=np.int64, count=self.size)
+
+    def optimal_actions(self) -> np.ndarray:
+        """
+        Boolean mask `opt[state, action]` marking the actions that are optimal in the underlying MDP,
+        i.e. the actions leading one step closer to the goal state.
+        """
+        goal_dist = self.goal_distances()
+        return goal_dist[self.succ] == goal_dist[:, None] - 1
+
+    def label_atomic_groups(self) -> tuple[np.ndarray, List[Direction]]:
+        """
+        Label the non-goal states with atomic groups, keyed by their set of optimal actions.
+
+        Action sets without a matching `Direction` (e.g. going either way around an obstacle in graph worlds)
+        are narrowed to their first optimal action in the order of `self.actions`.
+
+        Returns:
+            Tuple (labels, directions): `labels[state]` indexes `directions` (-1 for the goal state),
+            with groups numbered by order of first appearance.
+        """
+        optimal = self.optimal_actions()
+        # Encode the optimal action set of each state as a bitmask over the action indices
+        codes = optimal.astype(np.int64) @ (1 << np.arange(len(self.actions)))
+        codes[self.goal] = 0
+
+        # Narrow the bitmasks without a matching direction to their lowest action (at most 2^|actions| bitmasks)
+        for code in np.unique(codes).tolist():
+            if code > 0 and self._direction_of(code) is None:
+                codes[codes == code] = code & -code
+
+        # Number the atomic groups by order of first appearance
+        present, first_state, inverse = np.unique(codes, return_index=True, return_inverse=True)
+        group_ids = [i for i in np.argsort(first_state).tolist() if present[i] > 0]
+        rank = np.full(len(present), -1, dtype=np.int64)
+        rank[group_ids] = np.arange(len(group_ids))
+
+        return rank[inverse], [self._direction_of(int(present[i])) for i in group_ids]
+
+    def _direction_of(self, code: int) -> Optional[Direction]:
+        """Direction matching the set of actions encoded by the bitmask `code`."""
+        return Direction.action_to_dir({action for a, action in enumerate(self.actions) if code >> a & 1})
+
+    def cluster(self) -> dict[Direction, np.ndarray]:
+        """Group the non-goal states into atomic groups (labels kept in `self.atomic_labels`)."""
+        self.atomic_labels, directions = self.label_atomic_groups()
+
+        order = np.argsort(self.atomic_labels, kind='stable')
+        order = order[self.atomic_labels[order] >= 0]
+        counts = np.bincount(self.atomic_labels[order], minlength=len(directions))
+        return dict(zip(directions, np.split(order, np.cumsum(counts)[:-1])))
 
-    @abstractmethod
     def minimal_pos_budget(self) -> int:
-        raise NotImplementedError()
+        """Minimal Positional Budget: the fewest observation classes able to keep every state optimal."""
+        return minimal_action_cover(self.clusters.keys())
+
+    def automorphisms(self) -> List[tuple[np.ndarray, np.ndarray]]:
+        """
+        Automorphisms of the world fixing the goal state, e.g. the reflections of a line with a centred goal.
+
+        An automorphism is a pair (perm, sigma) of a state permutation and an action permutation that commutes
+        with the transition function: `succ[perm[s], sigma[a]] == perm[succ[s, a]]`. Since the goal is fixed,
+        each candidate `sigma` determines `perm` by propagation along a breadth-first tree rooted at the goal,
+        so all |actions|! candidates are checked at once. Worlds with states unreachable from the goal only
+        report the identity.
+
+        Returns:
+            List of (perm, sigma) pairs, starting with the identity.
+        """
+        n_actions = len(self.actions)
+        identity = (np.arange(self.size), np.arange(n_actions))
+        sigmas = np.array(list(permutations(range(n_actions))), dtype=np.int64)
+
+        # Breadth-first tree from the goal: each newly reached state keeps its (parent, action) edge
+        tree_levels = []
+        seen = np.zeros(self.size, dtype=bool)
+        seen[self.goal] = True
+        frontier = np.array([self.goal])
+        while frontier.size:
+            parents = np.repeat(frontier, n_actions)
+            via = np.tile(np.arange(n_actions), frontier.size)
+            reached = self.succ[frontier].ravel()
+            is_new = ~seen[reached]
+            frontier, first = np.unique(reached[is_new], return_index=True)
+            seen[frontier] = True
+            tree_levels.append((frontier, parents[is_new][first], via[is_new][first]))
+        if not seen.all():
+            return [identity]
+
+        # Propagate the candidate state permutations (one row per action permutation) level by level
+        perms = np.empty((len(sigmas), self.size), dtype=np.int64)
+        perms[:, self.goal] = self.goal
+        for states, parents, via in tree_levels:
+            perms[:, states] = self.succ[perms[:, parents], sigmas[:, via]]
+
+        is_bijective = (np.sort(perms, axis=1) == np.arange(self.size)).all(axis=1)
+        commutes = (self.succ[perms[:, :, None], sigmas[:, None, :]] == perms[:, self.succ]).all(axis=(1, 2))
+        return [(perm, sigma) for perm, sigma, valid in zip(perms, sigmas, is_bijective & commutes) if valid]
 
 
 class Line(World):
@@ -42,14 +146,16 @@ class Line(World):
         self.actions = ['l', 'r']
 
         self.goal = goal
+        self.succ = self._build_successors()
         self.clusters = self.cluster()
 
-    def navigate(self, state: int, action_idx: int) -> int:
-        action = self.actions[action_idx]
-        if action == 'l':
-            return max(state - 1, 0)
-        else:  # action == 'r'
-            return min(state + 1, self.length - 1)
+    def _build_successors(self) -> np.ndarray:
+        states = np.arange(self.size)
+        moves = {
+            'l': np.maximum(states - 1, 0),
+            'r': np.minimum(states + 1, self.length - 1),
+        }
+        return np.column_stack([moves[action] for action in self.actions])
 
     def dist(self, source: int, target: int) -> int:
         return abs(source - target)
@@ -57,19 +163,6 @@ class Line(World):
     def get_dimensions(self) -> tuple[int, Optional[int]]:
         return self.length, None
 
-    def cluster(self) -> dict[Direction, List[int]]:
-        clusters = {}
-
-        for state in range(self.size):
-            if state < self.goal:
-                clusters.setdefault(Direction.E, set()).add(state)
-            elif state > self.goal:
-                clusters.setdefault(Direction.W, set()).add(state)
-        return clusters
-
-    def minimal_pos_budget(self) -> int:
-        return len(self.clusters)
-
 
 class Grid(World):
     def __init__(self, width: int, height: int, goal: int):
@@ -81,28 +174,11 @@ class Grid(World):
         self.actions = ['l', 'r', 'u', 'd']
 
         self.goal = goal
+        self.succ = self._build_successors()
         self.clusters = self.cluster()
 
-    def navigate(self, state: int, action_idx: int) -> int:
-        """Navigate in 2D grid based on action"""
-        action = self.actions[action_idx]
-        x = state % self.width
-        y = state // self.width
-
-        if action == 'l':  # left
-            if x != 0:
-                return state - 1
-        elif action == 'r':  # right
-            if x != self.width - 1:
-                return state + 1
-        elif action == 'u':  # up
-            if y != 0:
-                return state - self.width
-        else:  # action == 'd' (down)
-            if y != self.height - 1:
-                return state + self.width
-        return state
-
+    def _build_successors(self) -> np.ndarray:
+        """Navigate in 2D grid based on action (bumping into the walls keeps the agent in place)"""
         # size_x = 4; size_y = 3; column = 11 % 4 = 3
         # 3 -> 3 % 4 == 3 -> (11 - 3) // 4 == 2
         # 5 -> 5 % 4 == 1 -> (3 - 1) + 6 // 4 = 2 + 1 = 3
@@ -110,6 +186,17 @@ class Grid(World):
         # 0 1 2 3          v  5 4 3 2
         # 4 5 6 7             4 3 2 1
         # 8 9 10 11           3 2 1 0
+        states = np.arange(self.size)
+        x = states % self.width
+        y = states // self.width
+
+        moves = {
+            'l': np.where(x != 0, states - 1, states),
+            'r': np.where(x != self.width - 1, states + 1, states),
+            'u': np.where(y != 0, states - self.width, states),
+            'd': np.where(y != self.height - 1, states + self.width, states),
+        }
+        return np.column_stack([moves[action] for action in self.actions])
 
     def dist(self, source: int, target: int) -> int:
         """
@@ -126,45 +213,6 @@ class Grid(World):
     def get_dimensions(self) -> tuple[int, Optional[int]]:
         return self.width, self.height
 
-    def cluster(self) -> dict[Direction, List[int]]:
-        clusters = {}
-
-        goal_x = self.goal % self.width
-        goal_y = self.goal // self.width
-
-        for state in range(self.size):
-            state_x = state % self.width
-            state_y = state // self.width
-            if state_x < goal_x and state_y == goal_y:
-                clusters.setdefault(Direction.E, set()).add(state)
-            elif state_x > goal_x and state_y == goal_y:
-                clusters.setdefault(Direction.W, set()).add(state)
-            elif state_x == goal_x and state_y < goal_y:
-                clusters.setdefault(Direction.S, set()).add(state)
-            elif state_x == goal_x and state_y > goal_y:
-                clusters.setdefault(Direction.N, set()).add(state)
-            elif state_x < goal_x and state_y < goal_y:
-                clusters.setdefault(Direction.SE, set()).add(state)
-            elif state_x > goal_x and state_y < goal_y:
-                clusters.setdefault(Direction.SW, set()).add(state)
-            elif state_x < goal_x and state_y > goal_y:
-                clusters.setdefault(Direction.NE, set()).add(state)
-            elif state_x > goal_x and state_y > goal_y:
-                clusters.setdefault(Direction.NW, set()).add(state)
-        return clusters
-
-    def minimal_pos_budget(self) -> int:
-        goal_column = self.goal % self.width
-        goal_row = self.goal // self.width
-        is_row_edge = goal_row in [0, self.size - 1]
-        is_col_edge = goal_column in [0, self.width - 1]
-        if is_row_edge and is_col_edge:
-            return 2
-        elif is_row_edge or is_col_edge:
-            return 3
-        else:
-            return 4
-
 
 class Maze(World):
     def __init__(self, width: int, depth: int, goal: int):
@@ -179,32 +227,23 @@ class Maze(World):
         self.actions = ['l', 'r', 'u', 'd']
 
         self.goal = goal
+        self.succ = self._build_successors()
         self.clusters = self.cluster()
 
-    def navigate(self, state: int, action_index: int) -> int:
-        """Navigate in 2D maze based on action"""
-        action = self.actions[action_index]
-        if action == 'l':
-            if 0 < state < self.width:
-                return state - 1
-        elif action == 'r':
-            if 0 <= state < self.width - 1:
-                return state + 1
-        elif action == 'u':
-            if state == self.width:
-                return 0
-            elif state == self.width + 1:
-                return (self.width - 1) // 2
-            elif state >= self.width + 2:
-                return state - 3
-        else:  # action == 'd'
-            if state == 0:
-                return self.width
-            elif state == (self.width - 1) // 2:
-                return self.width + 1
-            elif self.width - 1 <= state < self.size - 3:
-                return state + 3
-        return state
+    def _build_successors(self) -> np.ndarray:
+        """Navigate in 2D maze based on action (top corridor and three pillars hanging from it)"""
+        states = np.arange(self.size)
+        middle = (self.width - 1) // 2
+
+        moves = {
+            'l': np.where((0 < states) & (states < self.width), states - 1, states),
+            'r': np.where(states < self.width - 1, states + 1, states),
+            'u': np.select([states == self.width, states == self.width + 1, states >= self.width + 2],
+                           [0, middle, states - 3], default=states),
+            'd': np.select([states == 0, states == middle, (self.width - 1 <= states) & (states < self.size - 3)],
+                           [self.width, self.width + 1, states + 3], default=states),
+        }
+        return np.column_stack([moves[action] for action in self.actions])
 
     def dist(self, source: int, target: int) -> int:
         """
@@ -226,29 +265,103 @@ class Maze(World):
     def get_dimensions(self) -> tuple[int, int]:
         return self.width, self.depth
 
-    def cluster(self) -> dict[Direction, List[int]]:
-        clusters = {}
-
-        goal_x = self.goal if self.goal < self.width \
-            else (self.goal - self.width) % 3 * (self.width // 2)
-        goal_y = 0 if self.goal < self.width \
-            else (self.goal - self.width) // 3 + 1
-
-        for state in range(self.size):
-            state_x = state if state < self.width \
-                else (state - self.width) % 3 * (self.width // 2)
-            state_y = 0 if state < self.width \
-                else (state - self.width) // 3 + 1
-
-            if state_x < goal_x and state_y == 0:
-                clusters.setdefault(Direction.E, set()).add(state)
-            elif state_x > goal_x and state_y == 0:
-                clusters.setdefault(Direction.W, set()).add(state)
-            elif state_x == goal_x and state_y < goal_y:
-                clusters.setdefault(Direction.S, set()).add(state)
-            elif (state_x != goal_x and state_y > 0) or (state_x == goal_x and state_y > goal_y):
-                clusters.setdefault(Direction.N, set()).add(state)
-        return clusters
 
-    def minimal_pos_budget(self) -> int:
-        return len(self.clusters)
+def load_csr_adjacency(path: str) -> tuple[np.ndarray, np.ndarray, Optional[np.ndarray], Optional[List[str]]]:
+    """
+    Load a CSR adjacency from a NumPy `.npz` archive with arrays `indptr`, `indices`,
+    and optionally `action_ids` and `actions`.
+
+    Returns:
+        Tuple (indptr, indices, action_ids, actions), with None for the missing optional arrays.
+    """
+    with np.load(path) as archive:
+        return (archive['indptr'], archive['indices'],
+                archive['action_ids'] if 'action_ids' in archive else None,
+                archive['actions'].tolist() if 'actions' in archive else None)
+
+
+class GraphWorld(World):
+    """
+    World with an arbitrary topology given as a compressed-sparse-row (CSR) adjacency.
+
+    Row `s` of the adjacency lists the transitions available in state `s`:
+    `indices[indptr[s]:indptr[s+1]]` are the successor states and `action_ids[indptr[s]:indptr[s+1]]`
+    the indices (in `actions`) of the actions leading to them. Actions missing from a row keep the
+    agent in place, as bumping into a wall does in the grid worlds.
+    """
+    DEFAULT_ACTIONS = ['l', 'r', 'u', 'd']
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, goal: int,
+                 action_ids: Optional[np.ndarray] = None, actions: Optional[List[str]] = None):
+        self.actions = list(actions) if actions is not None else list(self.DEFAULT_ACTIONS)
+        if not set(self.actions) <= set(self.DEFAULT_ACTIONS):
+            raise ValueError(f"Graph actions must be a subset of {self.DEFAULT_ACTIONS}, got {self.actions}")
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.puzzle_type = PuzzleType.GRAPH
+
+        self.size = len(self.indptr) - 1
+        if action_ids is None:
+            # Dense rows: every state lists one successor per action, in action order
+            if len(self.indices) != self.size * len(self.actions):
+                raise ValueError("Adjacency without action ids must list a successor for every action of every state")
+            action_ids = np.tile(np.arange(len(self.actions)), self.size)
+        self.action_ids = np.asarray(action_ids, dtype=np.int64)
+
+        if not 0 <= goal < self.size:
+            raise ValueError(f"Goal state {goal} is out of bounds for a graph with {self.size} states")
+        self.goal = goal
+        self.succ = self._build_successors()
+        self._goal_dist = self._bfs_distances(goal)
+        if (self._goal_dist < 0).any():
+            unreachable = np.flatnonzero(self._goal_dist < 0)
+            raise ValueError(f"{len(unreachable)} state(s) cannot reach the goal (e.g. state {unreachable[0]})")
+        self.clusters = self.cluster()
+
+    @classmethod
+    def from_file(cls, path: str, goal: int) -> 'GraphWorld':
+        """Load a graph world from a CSR adjacency archive (see `load_csr_adjacency`)."""
+        indptr, indices, action_ids, actions = load_csr_adjacency(path)
+        return cls(indptr, indices, goal, action_ids, actions)
+
+    def _build_successors(self) -> np.ndarray:
+        rows = np.repeat(np.arange(self.size), np.diff(self.indptr))
+        succ = np.repeat(np.arange(self.size)[:, None], len(self.actions), axis=1)
+        succ[rows, self.action_ids] = self.indices
+        return succ
+
+    def _bfs_distances(self, target: int) -> np.ndarray:
+        """Level-synchronous BFS on the reversed successor table (-1 marks states that cannot reach `target`)."""
+        sources = np.repeat(np.arange(self.size), len(self.actions))
+        targets = self.succ.ravel()
+        # Reverse adjacency in CSR form: predecessors of `t` are `rev_sources[rev_indptr[t]:rev_indptr[t+1]]`
+        order = np.argsort(targets, kind='stable')
+        rev_sources = sources[order]
+        rev_indptr = np.concatenate(([0], np.cumsum(np.bincount(targets, minlength=self.size))))
+
+        dist = np.full(self.size, -1, dtype=np.int64)
+        dist[target] = 0
+        frontier = np.array([target])
+        level = 0
+        while frontier.size > 0:
+            level += 1
+            starts = rev_indptr[frontier]
+            counts = rev_indptr[frontier + 1] - starts
+            # Gather all predecessor slices of the frontier at once
+            offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            predecessors = np.unique(rev_sources[offsets])
+            frontier = predecessors[dist[predecessors] < 0]
+            dist[frontier] = level
+        return dist
+
+    def goal_distances(self) -> np.ndarray:
+        return self._goal_dist
+
+    def dist(self, source: int, target: int) -> int:
+        if target == self.goal:
+            return int(self._goal_dist[source])
+        return int(self._bfs_distances(target)[source])
+
+    def get_dimensions(self) -> tuple[int, Optional[int]]:
+        return self.size, None
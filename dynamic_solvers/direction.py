@@ -1,5 +1,6 @@
 from enum import Enum
-from typing import Optional, Set
+from itertools import combinations
+from typing import Iterable, Optional, Set
 
 
 class Direction(Enum):
@@ -43,3 +44,23 @@ class Direction(Enum):
             case "NW": return self.SE
             case "SE": return self.NW
         return None
+
+
+def minimal_action_cover(directions: Iterable[Direction]) -> int:
+    """
+    Minimum number of actions hitting the action set of every given direction (atomic group).
+
+    Atomic groups can share an observation class iff they share a common optimal action, so a cover of k actions
+    induces a valid grouping into k classes (each group joins the class of a covering action it contains), and vice versa.
+    There are at most 8 directions over 4 actions, hence at most 2^4 candidate covers to check.
+
+    Returns:
+        int: The size of a minimum action cover (0 for no directions).
+    """
+    action_sets = [direction.actions for direction in set(directions)]
+    actions = sorted(set().union(*action_sets))
+    for k in range(len(actions) + 1):
+        for cover in combinations(actions, k):
+            if all(not action_set.isdisjoint(cover) for action_set in action_sets):
+                return k
+    return len(actions)
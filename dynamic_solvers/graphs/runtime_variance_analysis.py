@@ -41,12 +41,39 @@ def output_variance_results(file_pattern: str):
     # stats_df = pd.DataFrame(stats)
     # print(stats_df)
 
+def output_seed_results(seeds_csv: str):
+    """Runtime tail of each instance over the seeds of a seeded benchmark run (`benchmark.py --seed`)."""
+    df = pd.read_csv(seeds_csv)
+    print(f"Found {df['Seed'].nunique()} seeds in {seeds_csv}.")
+
+    print("| ID |   Instance   |   Threshold    | Median Solve Time | Max Solve Time | Max / Median | # Timeouts |")
+    print("|----|--------------|----------------|-------------------|----------------|--------------|------------|")
+
+    for idx, (key, group) in enumerate(df.groupby(['Variant', 'Model', 'Threshold', 'Budget'], sort=False)):
+        times = np.array([parse_time(t) for t in group['Time (s)']], dtype=np.float64)
+        # Only 'solving' runtimes, without the timeouts
+        valid_times = times[(group['Status'] != 'UNKNOWN').to_numpy() & (times > 0)]
+        timeout_count = str(times.size - valid_times.size).rjust(10)
+        median, worst, ratio = "-".rjust(17), "-".rjust(14), "-".rjust(12)
+        if valid_times.size > 0:
+            median = f"{np.median(valid_times):.4f}".rjust(17)
+            worst = f"{np.max(valid_times):.4f}".rjust(14)
+            ratio = f"{np.max(valid_times) / np.median(valid_times):.2f}".rjust(12)
+
+        id = str(idx + 1).rjust(2)
+        instance = f"{key[0]}-{key[1]}".ljust(12)
+        print(f"| {id} | {instance} | {str(key[2]).ljust(14)} | {median} | {worst} | {ratio} | {timeout_count} |")
+
 if '__main__' == __name__:
     import sys
 
     if len(sys.argv) < 2:
         print("Usage: python dynamic_solvers/runtime_variance_results.py '<file_pattern>'")
+        print("       python dynamic_solvers/runtime_variance_results.py --seeds <results-seeds.csv>")
         print("Note: This assumes all result files contain the benchmark for the same list of OOP instances.")
         sys.exit(1)
 
-    output_variance_results(sys.argv[1])
+    if sys.argv[1] == '--seeds':
+        output_seed_results(sys.argv[2])
+    else:
+        output_variance_results(sys.argv[1])
@@ -1,3 +1,5 @@
+import numpy as np
+
 from ClusterPOPSolver import rank_partitions
 from builders.enums import OOPVariant
 from builders.pop.POPSpec import POPSpec
@@ -70,24 +72,22 @@ def activate_sensors(tpmc: SSPSpec, partition: list[list[int]], budget: int) ->
                 break
 
     # print(active)
-    observation_function = [0] * tpmc.size
+    observation_function = np.zeros(tpmc.size, dtype=int)
+    observation_function[np.asarray(active, dtype=int)] = 1
     observation_function[tpmc.goal] = -1
-    for state in active:
-        observation_function[state] = 1
 
-    return observation_function
+    return observation_function.tolist()
 
 
 def apply_partition(tpmc: POPSpec | SSPSpec, partition: list[list[int]]):
-    observation_function = [-1] * tpmc.size
+    observation_function = np.full(tpmc.size, -1)
     atomic_groups = list(tpmc.clusters.keys())
 
     for b, block in enumerate(partition):
         for atomic_group_idx in block:
-            for state in tpmc.clusters[atomic_groups[atomic_group_idx]]:
-                observation_function[state] = b
+            observation_function[tpmc.clusters[atomic_groups[atomic_group_idx]]] = b
 
-    return observation_function
+    return observation_function.tolist()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 import numpy as np
 from z3 import sat, unsat
 
+from BatchPOMDPEvaluator import BatchPOMDPEvaluator
+from MemoisedOracle import MemoisedOracle
 from StormExecutor import StormExecutor
 from builders.pop.POPSpec import POPSpec
 from builders.ssp import LineTPMC
@@ -41,14 +43,12 @@ class CEMAgent:
         if strategy == "atomic":
             # Perform initial guess based on merging of atomic groups
             mpb = tpmc.minimal_pos_budget()
-            obs_function = start_observation_function(tpmc, mpb)
-            print(obs_function)
+            obs_function = np.asarray(start_observation_function(tpmc, mpb))
+            print(obs_function.tolist())
             beta = 2.5
-            for i in range(len(obs_function)):
-                if obs_function[i] == -1:
-                    continue
-                theta[i, :] = -beta
-                theta[i][obs_function[i]] = beta
+            observed = np.flatnonzero(obs_function != -1)
+            theta[observed, :] = -beta
+            theta[observed, obs_function[observed]] = beta
         return theta
 
     def softmax(self, logits):
@@ -113,9 +113,9 @@ class CEMAgent:
         self.theta = (1 - self.smoothing) * new_theta + self.smoothing * self.theta
 
 
-def train_cem(agent: CEMAgent, oracle: Z3Executor | StormExecutor, pomdp: POMDPAdapter,
-              iterations: int = 50, batch_size: int = 20, timeout: int = 10000,
-              penalty_unsat: float = -50, penalty_timeout: float = -100):
+def train_cem(agent: CEMAgent, oracle: Z3Executor | StormExecutor | MemoisedOracle | BatchPOMDPEvaluator,
+              pomdp: POMDPAdapter, iterations: int = 50, batch_size: int = 20, timeout: int = 10000,
+              penalty_unsat: float = -50, penalty_timeout: float = -100, cancel_outliers: bool = False):
     """
     Train CEM agent with batched oracle evaluation.
 
@@ -128,6 +128,7 @@ def train_cem(agent: CEMAgent, oracle: Z3Executor | StormExecutor, pomdp: POMDPA
         timeout: Oracle timeout in milliseconds
         penalty_unsat: Penalty for UNSAT
         penalty_timeout: Penalty for timeout
+        cancel_outliers: Cancel the rest of a batch once as many SAT samples as elites are known (batch oracle only)
 
     Returns:
         Trained agent and statistics
@@ -139,7 +140,10 @@ def train_cem(agent: CEMAgent, oracle: Z3Executor | StormExecutor, pomdp: POMDPA
         'best_reward': float('-inf'), 'best_Y': None,
         'history': []
     }
+    # Samples actually evaluated (cancelled ones are not)
+    evaluations = 0
 
+    backend = oracle.oracle if isinstance(oracle, MemoisedOracle) else oracle
     for iteration in range(iterations):
         # Sample batch
         samples = agent.sample_batch(batch_size)
@@ -147,15 +151,25 @@ def train_cem(agent: CEMAgent, oracle: Z3Executor | StormExecutor, pomdp: POMDPA
         rewards = []
 
         # Evaluate all samples
-        for Y in samples:
-            result = None
-            if isinstance(oracle, Z3Executor):
-                result = oracle.evaluate_pomdp(pomdp, Y, timeout)
-            elif isinstance(oracle, StormExecutor):
-                # Call for finite-state controller through `storm-pomdp` subprocess calls (using Sparse Exact POMDP)
-                storm_res = oracle.evaluate_pomdp_fsc_cli(pomdp, Y, timeout)
-                result = oracle.convert_storm_z3_result(storm_res)
-
+        if isinstance(oracle, BatchPOMDPEvaluator):
+            # In parallel: samples cancelled once the elites are known were never evaluated, and are left out
+            evaluated = dict(oracle.evaluate_pomdp_batch(samples, timeout, n_elites if cancel_outliers else None))
+            samples = [samples[index] for index in sorted(evaluated)]
+            results = [evaluated[index] for index in sorted(evaluated)]
+        else:
+            results = []
+            for Y in samples:
+                result = None
+                if isinstance(backend, Z3Executor):
+                    result = oracle.evaluate_pomdp(pomdp, Y, timeout)
+                elif isinstance(backend, StormExecutor):
+                    # Call for finite-state controller through `storm-pomdp` subprocess calls (using Sparse Exact POMDP)
+                    storm_oracle = oracle if isinstance(oracle, MemoisedOracle) else backend
+                    storm_res = storm_oracle.evaluate_pomdp_fsc_cli(pomdp, Y, timeout)
+                    result = backend.convert_storm_z3_result(storm_res)
+                results.append(result)
+
+        for Y, result in zip(samples, results):
             if result.result == sat:
                 reward = float(result.reward)
                 stats['sat'] += 1
@@ -170,6 +184,7 @@ def train_cem(agent: CEMAgent, oracle: Z3Executor | StormExecutor, pomdp: POMDPA
                 stats['timeout'] += 1
 
             rewards.append(reward)
+        evaluations += len(rewards)
         print(rewards)
 
         # Select elite samples (top performers)
@@ -198,10 +213,10 @@ def train_cem(agent: CEMAgent, oracle: Z3Executor | StormExecutor, pomdp: POMDPA
     # Final summary
     print("\n" + "="*80)
     print("CEM Training Complete")
-    print(f"Total evaluations: {iterations * batch_size}")
-    print(f"SAT:     {stats['sat']:4d} ({stats['sat']/(iterations*batch_size)*100:.1f}%)")
-    print(f"UNSAT:   {stats['unsat']:4d} ({stats['unsat']/(iterations*batch_size)*100:.1f}%)")
-    print(f"TIMEOUT: {stats['timeout']:4d} ({stats['timeout']/(iterations*batch_size)*100:.1f}%)")
+    print(f"Total evaluations: {evaluations}")
+    print(f"SAT:     {stats['sat']:4d} ({stats['sat']/evaluations*100:.1f}%)")
+    print(f"UNSAT:   {stats['unsat']:4d} ({stats['unsat']/evaluations*100:.1f}%)")
+    print(f"TIMEOUT: {stats['timeout']:4d} ({stats['timeout']/evaluations*100:.1f}%)")
     stats['best_reward'] = stats['history'][-1]['best_reward']
     print(f"Best reward: {stats['best_reward']:.3f}")
     print("="*80)
@@ -227,7 +242,7 @@ if __name__ == "__main__":
     threshold = f"<= Q({tau * threshold_q}, 2)"
     tpmc = LineTPMC(budget, goal, size, determinism=False, verbose=False)
     context = tpmc.ctx
-    pomdp = POMDPAdapter(tpmc)
+    pomdp = POMDPAdapter(tpmc, assumptions=True)
 
     z3_solver = Z3Executor(context, verbose=True)
     storm_solver = StormExecutor(verbose=False, puzzle_type=tpmc.puzzle_type)
@@ -237,8 +252,11 @@ if __name__ == "__main__":
     agent = CEMAgent(tpmc, goal, n_states=size, n_classes=2, budget=budget)
 
     # Training: soft guidance toward budget
-    trained_agent, stats = train_cem(agent, z3_solver, pomdp, iterations=10, batch_size=10,
+    # Re-sampled observation functions are answered from the memo
+    oracle = MemoisedOracle(z3_solver, pomdp)
+    trained_agent, stats = train_cem(agent, oracle, pomdp, iterations=10, batch_size=10,
                                      timeout=10000, penalty_timeout=50, penalty_unsat=100)
+    print(f"Oracle memo: {oracle.hits} hits, {oracle.misses} misses")
 
     # Inference: enforce exact budget via top-k
     final_Y = trained_agent.sample()
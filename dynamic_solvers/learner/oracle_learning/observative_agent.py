@@ -3,6 +3,7 @@ from z3 import sat, unsat, unknown
 
 from builders.pop import LineTPMC, GridTPMC
 from builders.pop.POPSpec import POPSpec
+from MemoisedOracle import MemoisedOracle
 from dynamic_solvers.Z3Executor import Z3Executor
 from dynamic_solvers.builders.POMDPAdapter import POMDPAdapter
 from guess import start_observation_function
@@ -112,7 +113,7 @@ class ObservativeAgent:
             self.theta[i] -= self.lr * advantage * grad
 
 
-def train(agent: ObservativeAgent, oracle: Z3Executor, pomdp: POMDPAdapter,
+def train(agent: ObservativeAgent, oracle: Z3Executor | MemoisedOracle, pomdp: POMDPAdapter,
               episodes: int = 200, timeout: int = 10000,
               penalty_unsat: float = 1000, penalty_timeout: float = 500):
     """Train observative agent (POP) with oracle feedback as black-box optimization."""
@@ -154,14 +155,17 @@ if __name__ == "__main__":
     threshold = f"<= {tau}"
     tpmc = GridTPMC(budget, goal, width, height, determinism=False, verbose=False)
     context = tpmc.ctx
-    pomdp = POMDPAdapter(tpmc)
+    pomdp = POMDPAdapter(tpmc, assumptions=True)
 
     solver = Z3Executor(context, verbose=True)
     solver.prepare_constraints(pomdp, threshold)
 
     agent = ObservativeAgent(tpmc, goal, n_states=tpmc.size, n_classes=budget)
 
-    trained_agent, stats = train(agent, solver, pomdp, episodes=20, timeout=10000)
+    # Re-sampled observation functions (up to a relabelling of the classes) are answered from the memo
+    oracle = MemoisedOracle(solver, pomdp)
+    trained_agent, stats = train(agent, oracle, pomdp, episodes=20, timeout=10000)
+    print(f"Oracle memo: {oracle.hits} hits, {oracle.misses} misses")
     final_Y, _ = trained_agent.sample()
     print(f"\nBest Y: {stats['best_Y']}")
     print(f"Best reward: {stats['best_reward']}")
@@ -1,6 +1,7 @@
 import numpy as np
 from z3 import sat, unsat, CheckSatResult
 
+from MemoisedOracle import MemoisedOracle
 from StormExecutor import StormExecutor
 from builders.ssp import LineTPMC
 from builders.ssp.SSPSpec import SSPSpec
@@ -135,7 +136,7 @@ class SensorSelectionAgent:
             self.theta[i] -= self.lr * advantage * grad
 
 
-def train(agent: SensorSelectionAgent, oracle: Z3Executor | StormExecutor, pomdp: POMDPAdapter,
+def train(agent: SensorSelectionAgent, oracle: Z3Executor | StormExecutor | MemoisedOracle, pomdp: POMDPAdapter,
           episodes: int = 200, budget: int | None = None, timeout: int = 10000,
           penalty_unsat: float = 20, penalty_timeout: float = 50, budget_penalty: float = 0.0):
     """
@@ -154,17 +155,19 @@ def train(agent: SensorSelectionAgent, oracle: Z3Executor | StormExecutor, pomdp
 
     stats = {'sat': 0, 'unsat': 0, 'timeout': 0, 'best_reward': float('inf'), 'best_Y': None}
 
+    backend = oracle.oracle if isinstance(oracle, MemoisedOracle) else oracle
     for ep in range(episodes):
         Y, probs = agent.sample()
         print(f"Sample: {Y}")
         n_active = sum(1 for y in Y if y == 1)
         result = None
-        if isinstance(oracle, Z3Executor):
+        if isinstance(backend, Z3Executor):
             result = oracle.evaluate_pomdp(pomdp, Y, timeout)
-        elif isinstance(oracle, StormExecutor):
+        elif isinstance(backend, StormExecutor):
             # Call for finite-state controllers through `storm-pomdp` subprocess calls (using Sparse Exact POMDP)
-            storm_res = oracle.evaluate_pomdp_fsc_cli(pomdp, Y, timeout)
-            result = oracle.convert_storm_z3_result(storm_res)
+            storm_oracle = oracle if isinstance(oracle, MemoisedOracle) else backend
+            storm_res = storm_oracle.evaluate_pomdp_fsc_cli(pomdp, Y, timeout)
+            result = backend.convert_storm_z3_result(storm_res)
 
         if result.result == sat:
             reward = float(result.reward)
@@ -202,7 +205,7 @@ if __name__ == "__main__":
     threshold = f"<= Q({tau * threshold_q}, 2)"
     tpmc = LineTPMC(budget, goal, size, determinism=False, verbose=False)
     context = tpmc.ctx
-    pomdp = POMDPAdapter(tpmc)
+    pomdp = POMDPAdapter(tpmc, assumptions=True)
 
     z3_solver = Z3Executor(context, verbose=True)
     storm_solver = StormExecutor(verbose=False, puzzle_type=tpmc.puzzle_type)
@@ -212,8 +215,11 @@ if __name__ == "__main__":
     agent = SensorSelectionAgent(tpmc, goal, n_states=size)
 
     # Training: soft guidance toward budget
-    trained_agent, stats = train(agent, z3_solver, pomdp, episodes=40, budget=budget,
+    # Re-sampled observation functions are answered from the memo
+    oracle = MemoisedOracle(z3_solver, pomdp)
+    trained_agent, stats = train(agent, oracle, pomdp, episodes=40, budget=budget,
                                  timeout=10000, budget_penalty=0.5)
+    print(f"Oracle memo: {oracle.hits} hits, {oracle.misses} misses")
 
     # Inference: enforce exact budget via top-k
     final_Y, _ = trained_agent.sample(budget=budget, enforce_budget=True)
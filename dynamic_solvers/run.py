@@ -9,6 +9,7 @@ import argparse
 import sys
 import os
 from collections import defaultdict
+from fractions import Fraction
 from typing import List, Tuple
 
 import z3
@@ -16,15 +17,19 @@ from z3 import sat, CheckSatResult
 
 from ClusterPOPSolver import ClusterPOPSolver
 from StormExecutor import StormExecutor
+from CubeAndConquerSolver import CubeAndConquerSolver
+from PortfolioSolver import PortfolioSolver, CONFIGURATIONS, applicable_configurations, seed_configurations
 from Z3SolverResult import Z3SolverResult
+from builders.InstanceCache import InstanceCache
 from builders.POMDPAdapter import POMDPAdapter
 from builders.pop.POPSpec import POPSpec
 from utils import convert_text_to_html
 from Z3Executor import Z3Executor
 from builders.TPMCFactory import TPMCFactory
+from builders.enums import SolverBackend, SolverProfile
 
 VARIANT_CHOICES = ['ssp', 'pop']
-PUZZLE_CHOICES = ['line', 'grid', 'maze']
+PUZZLE_CHOICES = ['line', 'grid', 'maze', 'graph']
 
 
 def create_arg_parser() -> argparse.ArgumentParser:
@@ -43,6 +48,10 @@ Examples:
   # Maze SSP problem with deterministic strategies
   python solve_oop.py ssp maze --budget 2 --goal 8 --width 5 --height 3 --deterministic --threshold "<=2/3"
 
+  # Optimal reward of a deterministic Grid POP problem, up to a precision of 1/100
+  python solve_oop.py pop grid --budget 4 --goal 4 --width 3 --height 3 --deterministic --optimize 1/100
+  python solve_oop.py pop maze --budget 4 --goal 8 --width 7 --height 4 --threshold "<= 84/15" --portfolio 4
+
   # With custom output files and timeout
   python solve_oop.py ssp line --budget 1 --goal 3 --size 5 --threshold "<=1/2" \\
                       --results custom_results.txt --rewards custom_rewards.txt --timeout 60000
@@ -60,7 +69,7 @@ Examples:
     parser.add_argument(
         'world',
         choices=PUZZLE_CHOICES,
-        help='Type of world selected for the problem (Line, Grid, Maze)'
+        help='Type of world selected for the problem (Line, Grid, Maze, Graph)'
     )
 
     # Core problem parameters
@@ -81,8 +90,7 @@ Examples:
     parser.add_argument(
         '--threshold', '-t',
         type=str,
-        required=True,
-        help='Threshold constraint (e.g., "<=3/4", "< 2", "<=Q(2,3)", "<Q(4/7))'
+        help='Threshold constraint (e.g., "<=3/4", "< 2", "<=Q(2,3)", "<Q(4/7)). Required unless --optimize is given'
     )
 
     # World-specific dimensions
@@ -105,6 +113,12 @@ Examples:
         help='Height for grid/maze worlds (required for grid/maze)'
     )
 
+    dimension_group.add_argument(
+        '--adjacency', '-adj',
+        type=str,
+        help='Path to a .npz CSR adjacency (indptr, indices[, action_ids, actions]) for graph worlds (required for graph)'
+    )
+
     # Solver options
     solver_group = parser.add_argument_group('Solver Options')
     solver_group.add_argument(
@@ -131,6 +145,36 @@ Examples:
         help='Constraint precision mode: "strict" (equality == for optimal solutions), "relaxed" (inequality >= for Bellman, <= for budget, finding invariants)'
     )
 
+    solver_group.add_argument(
+        '--exactly-one', '-eo',
+        type=str,
+        choices=['default', 'pairwise', 'pbeq', 'sequential', 'commander', 'bimander'],
+        required=False,
+        default='default',
+        help='Encoding of the exactly-one constraints over boolean observation/strategy rows: "default" (variant-specific), '
+             '"pairwise", "pbeq" (pseudo-boolean), "sequential" (counter), "commander", "bimander"'
+    )
+
+    solver_group.add_argument(
+        '--observation-encoding', '-oe',
+        type=str,
+        choices=['one-hot', 'int', 'bitvec'],
+        required=False,
+        default='one-hot',
+        help='Encoding of the observation class of each state: "one-hot" (one boolean per class), "int" or "bitvec" '
+             '(single class index). Only applicable for POP variant.'
+    )
+
+    solver_group.add_argument(
+        '--reward-encoding', '-rw',
+        type=str,
+        choices=['real', 'int', 'bitvec'],
+        required=False,
+        default='real',
+        help='Sort of the expected reward variables: "real" (LRA), "int" (LIA) or "bitvec" (saturating bit-vectors, '
+             'bit-blasted). Integral sorts require deterministic strategies with the boolean encoding'
+    )
+
     solver_group.add_argument(
         '--real-encoding', '-re',
         action='store_true',
@@ -149,6 +193,95 @@ Examples:
         help='Budget repair mode for SSP (solve with no budget constraint, then repair the solution to fit the budget)'
     )
 
+    solver_group.add_argument(
+        '--budget-sweep', '-bs',
+        action='store_true',
+        help='Search the smallest budget (up to --budget) meeting the threshold, on one incremental solver'
+    )
+
+    solver_group.add_argument(
+        '--symmetry-breaking', '-sb',
+        action='store_true',
+        help='Add lex-leader constraints breaking the symmetries (reflections/rotations) of the world around the goal'
+    )
+
+    solver_group.add_argument(
+        '--class-symmetry-breaking', '-csb',
+        action='store_true',
+        help='Order the interchangeable observation classes by the first state observing them. Only applicable for POP variant.'
+    )
+
+    solver_group.add_argument(
+        '--cache-dir',
+        type=str,
+        help='Directory of the on-disk cache of built tpMC instances (compressed SMT-LIB2), reused across runs'
+    )
+
+    solver_group.add_argument(
+        '--backend',
+        type=str,
+        choices=['solver', 'optimize'],
+        default='solver',
+        help='Z3 engine: "solver" (feasibility against the threshold) or "optimize" (minimise the expected reward, '
+             'reporting the anytime incumbents and the best one on timeout). --threshold is optional with "optimize"'
+    )
+
+    solver_group.add_argument(
+        '--profile',
+        type=str,
+        choices=['default', 'lra-simplex', 'sat-bitblast', 'nlsat', 'pb-solver'],
+        default='default',
+        help='Z3 tactic pipeline and parameters: "lra-simplex" (deterministic, linear), "sat-bitblast" (bit-vector '
+             'rewards), "nlsat" (randomised, nonlinear real), "pb-solver" (pseudo-boolean tuning) or "default"'
+    )
+
+    solver_group.add_argument(
+        '--optimize',
+        type=str,
+        nargs='?',
+        const='1/1000',
+        metavar='PRECISION',
+        help='Bisect the threshold to the optimal reward on one incremental solver, up to a rational precision '
+             '(default: 1/1000). Replaces --threshold.'
+    )
+
+    solver_group.add_argument(
+        '--portfolio',
+        type=int,
+        nargs='?',
+        const=len(CONFIGURATIONS),
+        metavar='N',
+        help='Race the first N configurations (encodings, orders, Bellman formats, profiles) of the instance in '
+             f'separate processes, keeping the first SAT/UNSAT answer (default: all {len(CONFIGURATIONS)})'
+    )
+
+    solver_group.add_argument(
+        '--seed',
+        type=int,
+        help='Random seed of the SMT, arithmetic and SAT heuristics of Z3 (first seed of a --seed-race)'
+    )
+
+    solver_group.add_argument(
+        '--seed-race',
+        type=int,
+        nargs='?',
+        const=os.cpu_count(),
+        metavar='K',
+        help='Race K random seeds of the same configuration in separate processes, keeping the first SAT/UNSAT '
+             'answer (default: one per core)'
+    )
+
+    solver_group.add_argument(
+        '--cube-and-conquer', '-cc',
+        type=int,
+        nargs='?',
+        const=os.cpu_count(),
+        metavar='WORKERS',
+        help='Split the instance into cubes over the observations of the states nearest the goal (POP) or of '
+             'high-degree states (SSP), one per atomic group, and solve them in a pool of WORKERS processes '
+             '(default: one per core) until the first SAT cube'
+    )
+
     solver_group.add_argument(
         '--timeout',
         type=int,
@@ -230,12 +363,31 @@ def validate_arguments(args: argparse.Namespace) -> None:
         if total_states <= args.goal:
             raise ValueError("Goal state must be within world bounds")
 
+    elif args.world == 'graph':
+        if args.adjacency is None:
+            raise ValueError("Graph world requires --adjacency parameter")
+        if not os.path.exists(args.adjacency):
+            raise ValueError(f"Adjacency file not found: {args.adjacency}")
+
     # Validate budget
     if args.budget < 0:
         raise ValueError("Budget must be non-negative")
 
     # Validate threshold format
-    if not any(op in args.threshold for op in ['<=', '<']):
+    if args.optimize is not None:
+        try:
+            if Fraction(args.optimize) <= 0:
+                raise ValueError
+        except ValueError:
+            raise ValueError(f"Invalid --optimize precision: {args.optimize}. Must be a positive rational (e.g., 1/100).")
+        if args.pomdp is not None or args.cluster or args.budget_repair:
+            raise ValueError("--optimize cannot be combined with --pomdp, --cluster or --budget-repair")
+        if args.budget_sweep:
+            raise ValueError("--optimize cannot be combined with --budget-sweep")
+    elif args.threshold is None:
+        if args.backend != 'optimize':
+            raise ValueError("--threshold is required unless --optimize or --backend optimize is given")
+    elif not any(op in args.threshold for op in ['<=', '<']):
         raise ValueError("Threshold must contain an upper bound comparison operator (<=, <)")
 
     # Validate order of constraints
@@ -248,26 +400,90 @@ def validate_arguments(args: argparse.Namespace) -> None:
         raise ValueError(
             f"Invalid order_constraints format: {args.order_constraints}. Must be a comma-separated permutation of 0,1,2,3.")
 
+    if args.backend == 'optimize' and (args.pomdp is not None or args.cluster or args.optimize is not None
+                                       or args.budget_sweep):
+        raise ValueError("--backend optimize cannot be combined with --pomdp, --cluster, --optimize or --budget-sweep")
+
+    if args.backend == 'optimize' and args.profile in ['lra-simplex', 'sat-bitblast', 'nlsat']:
+        raise ValueError(f"--profile {args.profile} builds a tactic pipeline, not available to --backend optimize")
+
+    if args.reward_encoding != 'real' and (not args.deterministic or args.real_encoding):
+        raise ValueError(f"--reward-encoding {args.reward_encoding} requires --deterministic strategies with the boolean encoding")
+
+    if args.budget_sweep and (args.pomdp is not None or args.cluster or args.budget_repair):
+        raise ValueError("--budget-sweep cannot be combined with --pomdp, --cluster or --budget-repair")
+
+    if args.portfolio is not None:
+        if args.portfolio < 1:
+            raise ValueError("--portfolio requires at least one configuration")
+        if (args.pomdp is not None or args.cluster or args.optimize is not None or args.budget_sweep
+                or args.backend == 'optimize'):
+            raise ValueError("--portfolio cannot be combined with --pomdp, --cluster, --optimize, --budget-sweep "
+                             "or --backend optimize")
+
+    if args.cube_and_conquer is not None:
+        if args.cube_and_conquer < 1:
+            raise ValueError("--cube-and-conquer requires at least one worker")
+        if (args.pomdp is not None or args.cluster or args.optimize is not None or args.budget_sweep
+                or args.budget_repair or args.backend == 'optimize' or args.portfolio is not None):
+            raise ValueError("--cube-and-conquer cannot be combined with --pomdp, --cluster, --optimize, "
+                             "--budget-sweep, --budget-repair, --backend optimize or --portfolio")
+
+    if args.seed is not None and args.seed < 0:
+        raise ValueError("--seed must be non-negative")
+
+    if args.seed_race is not None:
+        if args.seed_race < 1:
+            raise ValueError("--seed-race requires at least one seed")
+        if (args.pomdp is not None or args.cluster or args.optimize is not None or args.budget_sweep
+                or args.backend == 'optimize' or args.portfolio is not None or args.cube_and_conquer is not None):
+            raise ValueError("--seed-race cannot be combined with --pomdp, --cluster, --optimize, --budget-sweep, "
+                             "--backend optimize, --portfolio or --cube-and-conquer")
+
     # Validate clustering requirements
     if args.cluster and args.variant != 'pop':
         raise ValueError("--cluster is only applicable when the variant is 'pop'")
 
+    if args.observation_encoding != 'one-hot' and args.variant != 'pop':
+        raise ValueError("--observation-encoding is only applicable when the variant is 'pop'")
+
+    if args.class_symmetry_breaking and args.variant != 'pop':
+        raise ValueError("--class-symmetry-breaking is only applicable when the variant is 'pop'")
+
 def solve_problem(args: argparse.Namespace, benchmark=False) -> None:
     """Main solving logic."""
 
     if not benchmark:
         print(f" 🚀 Starting {args.variant.upper()} {args.world.capitalize()} problem...")
-        dim_print = f"Length: {args.length}" if args.world == 'line' \
-                                                 else f"Dimensions: {args.width}x{args.height}"
+        if args.world == 'line':
+            dim_print = f"Length: {args.length}"
+        elif args.world == 'graph':
+            dim_print = f"Adjacency: {args.adjacency}"
+        else:
+            dim_print = f"Dimensions: {args.width}x{args.height}"
         print(f"    Budget: {args.budget}, Goal: {args.goal}, {dim_print}")
-        print(f"    Strategy: {'Deterministic' if args.deterministic else 'Randomized'}, Threshold: {args.threshold}")
+        print(f"    Strategy: {'Deterministic' if args.deterministic else 'Randomized'}, Threshold: {args.threshold if args.optimize is None else f"optimised (precision {args.optimize})"}")
+        print(f"    Backend: {args.backend}, Profile: {args.profile}, Seed: {args.seed if args.seed is not None else "default"}")
+        if args.seed_race is not None:
+            print(f"    Seed race: {args.seed_race} seeds")
+        if args.cube_and_conquer is not None:
+            print(f"    Cube-and-conquer: {args.cube_and_conquer} workers")
+        if args.portfolio is not None:
+            print(f"    Portfolio: {", ".join(applicable_configurations(args.variant, args.portfolio))}")
         print(f"    Operation mode (add-ons): \n"
               f"        Bellman format       -> {args.bellman_format}\n"
               f"        Optimality Precision -> {args.precision}\n"
+              f"        Exactly-One Encoding -> {args.exactly_one}\n"
+              f"        Observation Encoding -> {args.observation_encoding}\n"
+              f"        Reward Encoding      -> {args.reward_encoding}\n"
               f"        Encoding             -> {"Real" if args.real_encoding else "Boolean"}\n"
               f"        Budget Repair        -> {"✅" if args.budget_repair else "❌"}\n"
+              f"        Budget Sweep         -> {"✅" if args.budget_sweep else "❌"}\n"
               f"        Verbose output       -> {"✅" if args.verbose else "❌"}\n"
               f"        Ordering             -> {args.order_constraints if args.order_constraints else "default"}\n"
+              f"        Symmetry Breaking    -> {"✅" if args.symmetry_breaking else "❌"}\n"
+              f"        Class Symmetry       -> {"✅" if args.class_symmetry_breaking else "❌"}\n"
+              f"        Instance Cache       -> {args.cache_dir if args.cache_dir else "❌"}\n"
               f"        POMDP Back-end       -> {"Z3 (SMT, memory-less) " if not args.storm else "Storm (PMC, finite-state)"}"
               f"\n"
         )
@@ -280,22 +496,35 @@ def solve_problem(args: argparse.Namespace, benchmark=False) -> None:
                                        length=args.length,
                                        width=args.width,
                                        height=args.height,
+                                       adjacency=args.adjacency,
                                        goal=args.goal,
                                        budget=args.budget,
                                        determinism=args.deterministic,
                                        bellman_format=args.bellman_format,
                                        precision=args.precision,
+                                       exactly_one=args.exactly_one,
+                                       reward_encoding=args.reward_encoding,
+                                       observation_encoding=args.observation_encoding,
                                        bool_encoding=not args.real_encoding,
                                        budget_repair=args.budget_repair,
+                                       budget_sweep=args.budget_sweep,
                                        order_constraints=args.order_constraints,
+                                       symmetry_breaking=args.symmetry_breaking,
+                                       class_symmetry_breaking=args.class_symmetry_breaking,
                                        verbose=args.verbose)
-    solver = Z3Executor(tpmc_instance.ctx, verbose=not benchmark)
+    profile = SolverProfile.from_string(args.profile)
+    if not Z3Executor.profile_fits(profile, tpmc_instance):
+        raise ValueError(f"--profile {args.profile} does not fit the logical fragment of the instance")
+    solver = Z3Executor(tpmc_instance.ctx, verbose=not benchmark, backend=SolverBackend.from_string(args.backend),
+                        profile=profile, seed=args.seed)
+    cache = InstanceCache(args.cache_dir) if args.cache_dir else None
     # Configure solver timeout
     solver.set_timeout(args.timeout)
 
     # Solve and get results
     if args.pomdp is not None:
-        adapter = POMDPAdapter(tpmc_instance)
+        # A single observation function is evaluated: only its Bellman equations are built
+        adapter = POMDPAdapter(tpmc_instance, lazy=True)
 
         if args.storm:
             storm_solver = StormExecutor(verbose=True, puzzle_type=tpmc_instance.puzzle_type)
@@ -315,12 +544,56 @@ def solve_problem(args: argparse.Namespace, benchmark=False) -> None:
     elif isinstance(tpmc_instance, POPSpec) and args.cluster:
         cluster_solver = ClusterPOPSolver(solver, tpmc_instance, True, args.threshold)
         result = cluster_solver.solve(args.timeout)
+    elif args.optimize is not None:
+        result = solver.optimize(tpmc_instance, args.timeout, Fraction(args.optimize), cache)
+        solver.cleanup()
+    elif args.portfolio is not None or args.seed_race is not None:
+        # Every racer builds its own instance: pass the problem definition and the common operational options
+        instance_params = dict(length=args.length, width=args.width, height=args.height, adjacency=args.adjacency,
+                               goal=args.goal, budget=args.budget, determinism=args.deterministic)
+        configurations = (applicable_configurations(args.variant, args.portfolio) if args.portfolio is not None
+                          else seed_configurations(args.seed_race, args.seed or 0))
+        portfolio = PortfolioSolver(args.variant, args.world, instance_params, args.threshold, configurations,
+                                    verbose=not benchmark,
+                                    bellman_format=args.bellman_format,
+                                    precision=args.precision,
+                                    exactly_one=args.exactly_one,
+                                    reward_encoding=args.reward_encoding,
+                                    observation_encoding=args.observation_encoding,
+                                    bool_encoding=not args.real_encoding,
+                                    budget_repair=args.budget_repair,
+                                    order_constraints=args.order_constraints,
+                                    symmetry_breaking=args.symmetry_breaking,
+                                    class_symmetry_breaking=args.class_symmetry_breaking,
+                                    profile=args.profile,
+                                    seed=args.seed)
+        result = portfolio.solve(args.timeout)
+    elif args.cube_and_conquer is not None:
+        instance_params = dict(length=args.length, width=args.width, height=args.height, adjacency=args.adjacency,
+                               goal=args.goal, budget=args.budget, determinism=args.deterministic)
+        cube_solver = CubeAndConquerSolver(args.variant, args.world, instance_params, args.threshold,
+                                           args.cube_and_conquer,
+                                           verbose=not benchmark,
+                                           bellman_format=args.bellman_format,
+                                           precision=args.precision,
+                                           exactly_one=args.exactly_one,
+                                           reward_encoding=args.reward_encoding,
+                                           observation_encoding=args.observation_encoding,
+                                           bool_encoding=not args.real_encoding,
+                                           order_constraints=args.order_constraints,
+                                           symmetry_breaking=args.symmetry_breaking,
+                                           class_symmetry_breaking=args.class_symmetry_breaking,
+                                           seed=args.seed)
+        result = cube_solver.solve(args.timeout)
+    elif args.budget_sweep:
+        result = solver.sweep_budget(tpmc_instance, args.threshold, args.timeout, cache)
+        solver.cleanup()
     elif args.budget_repair:
-        solver.prepare_constraints(tpmc_instance, args.threshold)
+        solver.prepare_constraints(tpmc_instance, args.threshold, cache)
         result = solver.solve_2_shot_repair(tpmc_instance, args.timeout)
         solver.cleanup()
     else:
-        solver.prepare_constraints(tpmc_instance, args.threshold)
+        solver.prepare_constraints(tpmc_instance, args.threshold, cache)
         result = solver.solve(args.timeout)
         solver.cleanup()
 
@@ -330,6 +603,16 @@ def solve_problem(args: argparse.Namespace, benchmark=False) -> None:
         print(f"    Status: {result.result}")
         reward_str = f" ⭐  Reward: {result.reward}" if result.reward is not None else ""
         print(reward_str)
+        if result.reward_lower_bound is not None:
+            print(f"    Optimal reward in [{result.reward_lower_bound}, {result.reward}]")
+        if result.portfolio_winner is not None:
+            print(f" 🏆  Portfolio winner: {result.portfolio_winner}")
+        if result.cubes is not None:
+            print(f"    Cubes: {result.cubes}")
+        if result.budget is not None:
+            print(f" 💰  Smallest sufficient budget: {result.budget}")
+        if result.incumbents:
+            print(f"    Incumbents: {", ".join(f"{reward} @ {at:.3f}s" for at, reward in result.incumbents)}")
 
         file_res = open(args.results, 'w')
         if result.model is None:
@@ -338,7 +621,7 @@ def solve_problem(args: argparse.Namespace, benchmark=False) -> None:
         else:
             model_groups = group_model_vars(result.model)
             if result.obs is not None:
-                model_groups.update({ "ys": [(k, bool(v)) for k, v in result.obs.items()] })
+                model_groups.update({ "ys": list(result.obs.items()) })
             sorted_prefixes = sorted(set(model_groups.keys()))
 
             file_res = open(args.results, 'w')
@@ -351,7 +634,7 @@ def solve_problem(args: argparse.Namespace, benchmark=False) -> None:
         file_res.close()
 
         file_rew = open(args.rewards, 'w')
-        file_rew.write(f"{result.reward if result.result == sat else "N/A"}\n")
+        file_rew.write(f"{result.reward if result.result == sat or result.incumbents else "N/A"}\n")
         file_rew.close()
 
         if args.draw and (result.model is not None or result.obs is not None):
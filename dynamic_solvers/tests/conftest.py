@@ -0,0 +1,80 @@
+"""
+Fixtures shared by the unit tests: reference tpMC instances with the optimal reward of their deterministic
+strategies, and a one-shot solve of a tpMC instance.
+
+Run from the `dynamic_solvers` directory:
+    python -m pytest tests
+"""
+
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Any, Callable
+
+import pytest
+
+from Z3Executor import Z3Executor
+from Z3SolverResult import Z3SolverResult
+from builders.TPMCFactory import TPMCFactory
+from builders.enums import SolverProfile
+
+
+@dataclass(frozen=True)
+class ReferenceInstance:
+    """A tpMC problem and the optimal expected reward of its deterministic strategies."""
+    variant: str
+    world: str
+    params: dict[str, Any]
+    reward: Fraction
+
+    @property
+    def thresholds(self) -> tuple[str, str]:
+        """The optimal threshold (SAT) and the strictly better one (UNSAT)."""
+        return f'<= {self.reward}', f'< {self.reward}'
+
+
+REFERENCE_INSTANCES = {
+    'pop-line': ReferenceInstance('pop', 'line', dict(length=7, goal=3, budget=2), Fraction(2)),
+    'pop-grid': ReferenceInstance('pop', 'grid', dict(width=3, height=3, goal=4, budget=4), Fraction(3, 2)),
+    'pop-maze': ReferenceInstance('pop', 'maze', dict(width=5, height=3, goal=8, budget=3), Fraction(47, 10)),
+    'ssp-line': ReferenceInstance('ssp', 'line', dict(length=6, goal=2, budget=2), Fraction(9, 5)),
+    'ssp-grid': ReferenceInstance('ssp', 'grid', dict(width=3, height=3, goal=4, budget=4), Fraction(2)),
+}
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', "instances(*names): reference instances ranged over by the `instance` "
+                                       "argument of a test (all of them by default)")
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrize the `instance` argument of a test over the reference instances (see the `instances` marker)."""
+    if 'instance' in metafunc.fixturenames:
+        marker = metafunc.definition.get_closest_marker('instances')
+        names = list(marker.args if marker is not None else REFERENCE_INSTANCES)
+        metafunc.parametrize('instance', [REFERENCE_INSTANCES[name] for name in names], ids=names)
+
+
+@pytest.fixture
+def reference_instances() -> dict[str, ReferenceInstance]:
+    return REFERENCE_INSTANCES
+
+
+@pytest.fixture
+def solve() -> Callable[..., Z3SolverResult]:
+    """
+    Solve a tpMC instance on a fresh solver (within 30s), as `solve(instance, threshold, **options)`: the options
+    `determinism` (deterministic strategies by default), `seed` and `profile` configure the strategies and the
+    solver, the others are passed to `TPMCFactory.create`.
+    """
+    def solve_instance(instance: ReferenceInstance, threshold: str, determinism: bool = True, seed=None,
+                       profile: SolverProfile = SolverProfile.DEFAULT, **options) -> Z3SolverResult:
+        tpmc = TPMCFactory.create(instance.variant, instance.world, determinism=determinism, **instance.params,
+                                  **options)
+        assert Z3Executor.profile_fits(profile, tpmc)
+        solver = Z3Executor(tpmc.ctx, verbose=False, profile=profile, seed=seed)
+        solver.prepare_constraints(tpmc, threshold)
+        result = solver.solve(30000)
+        solver.cleanup()
+        return result
+
+    return solve_instance
@@ -0,0 +1,55 @@
+"""
+Unit tests for the Optimize backend minimising the expected reward of tpMC instances.
+"""
+
+import pytest
+from z3 import sat, unknown
+
+from Z3Executor import Z3Executor
+from builders.TPMCFactory import TPMCFactory
+from builders.enums import SolverBackend
+
+
+def _minimise(instance, timeout_ms=30000, threshold=None, **options):
+    tpmc = TPMCFactory.create(instance.variant, instance.world, **instance.params, **options)
+    solver = Z3Executor(tpmc.ctx, verbose=False, backend=SolverBackend.OPTIMIZE)
+    solver.set_timeout(timeout_ms)
+    solver.prepare_constraints(tpmc, threshold)
+    if tpmc.budget_repair:
+        result = solver.solve_2_shot_repair(tpmc, timeout_ms)
+    else:
+        result = solver.solve(timeout_ms)
+    solver.cleanup()
+    return result
+
+
+@pytest.mark.parametrize("bool_encoding", [True, False])
+@pytest.mark.instances('pop-line', 'pop-grid', 'ssp-line', 'ssp-grid')
+def test_optimize_backend_minimises_reward(instance, bool_encoding):
+    result = _minimise(instance, determinism=True, bool_encoding=bool_encoding)
+    assert result.result == sat
+    assert result.reward == result.reward_lower_bound == instance.reward
+    # Incumbents improve monotonically up to the optimum
+    rewards = [reward for _, reward in result.incumbents]
+    assert rewards == sorted(rewards, reverse=True) and rewards[-1] == instance.reward
+
+
+@pytest.mark.instances('ssp-grid')
+def test_optimize_backend_with_budget_repair(instance):
+    result = _minimise(instance, determinism=True, budget_repair=True)
+    assert result.result == sat and result.reward == instance.reward
+
+
+@pytest.mark.instances('pop-line')
+def test_optimize_backend_keeps_threshold(instance):
+    result = _minimise(instance, threshold='<= 5/2', determinism=True)
+    assert result.result == sat and result.reward == instance.reward
+
+
+@pytest.mark.instances('pop-line')
+def test_optimize_backend_reports_incumbent_on_timeout(instance):
+    # Randomised strategies (nonlinear) are not minimised within a second, but incumbents are found early
+    result = _minimise(instance, timeout_ms=1000, determinism=False)
+    assert result.result == unknown
+    assert result.incumbents and result.reward == result.incumbents[-1][1]
+    assert result.model is not None
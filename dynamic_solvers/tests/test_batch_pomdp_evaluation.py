@@ -0,0 +1,76 @@
+"""
+Unit tests for batch POMDP evaluation over a pool of pre-warmed workers (same results, streaming, cancellation).
+"""
+
+import threading
+import time
+
+import pytest
+from z3 import sat, unsat, unknown
+
+from BatchPOMDPEvaluator import BatchPOMDPEvaluator
+from Z3Executor import Z3Executor
+from builders.POMDPAdapter import POMDPAdapter
+from builders.TPMCFactory import TPMCFactory
+
+INSTANCES = [
+    # (variant, world, parameters, threshold, determinism, observation functions)
+    ('ssp', 'line', dict(length=5, goal=2, budget=2), '<= 2', True,
+     [[1, 0, -1, 0, 1], [0, 0, -1, 0, 0], [1, 1, -1, 1, 1], [0, 1, -1, 1, 0]]),
+    ('pop', 'line', dict(length=9, goal=4, budget=2), '<= 3', False,
+     [[0, 0, 0, 0, -1, 1, 1, 1, 1], [1, 1, 1, 1, -1, 0, 0, 0, 0], [1, 0, 1, 1, -1, 1, 0, 0, 1],
+      [0, 0, 1, 1, -1, 0, 0, 1, 1]]),
+]
+
+
+def _evaluate(variant, world, params, threshold, determinism, obs_function):
+    """Evaluate one observation function with a fresh solver (outside of a scope, like the tpMC solving)."""
+    pomdp = POMDPAdapter(TPMCFactory.create(variant, world, determinism=determinism, **params))
+    solver = Z3Executor(pomdp.ctx, verbose=False)
+    solver.prepare_constraints(pomdp, threshold)
+    solver.solver.add(pomdp.collect_bellman_constraints(obs_function))
+    result = solver.solve(30000)
+    result.obs = pomdp.extract_obs_solution(obs_function)
+    return result
+
+
+@pytest.mark.parametrize("variant, world, params, threshold, determinism, obs_functions", INSTANCES)
+def test_batch_matches_serial_evaluation(variant, world, params, threshold, determinism, obs_functions):
+    expected = [_evaluate(variant, world, params, threshold, determinism, obs_function)
+                for obs_function in obs_functions]
+    # Every function is decided, so that the batch is compared against verdicts rather than timeouts
+    assert all(r.result in (sat, unsat) for r in expected)
+
+    with BatchPOMDPEvaluator(variant, world, {**params, 'determinism': determinism}, threshold, 2) as evaluator:
+        # The workers stay warm across batches
+        for _ in range(2):
+            results = dict(evaluator.evaluate_pomdp_batch(obs_functions, 30000))
+            assert sorted(results) == list(range(len(obs_functions)))
+            assert [(results[i].result, results[i].reward) for i in range(len(obs_functions))] == \
+                   [(result.result, result.reward) for result in expected]
+            assert [results[i].obs for i in range(len(obs_functions))] == [result.obs for result in expected]
+
+
+def test_batch_cancelled_once_enough_results():
+    params = dict(length=5, goal=2, budget=2, determinism=True)
+    with BatchPOMDPEvaluator('ssp', 'line', params, '<= 2', 1) as evaluator:
+        # A single SAT function among UNSAT ones: nothing after it is yielded
+        obs_functions = [[0, 0, -1, 0, 0], [1, 1, -1, 1, 1]] + [[0, 1, -1, 1, 0]] * 20
+        results = list(evaluator.evaluate_pomdp_batch(obs_functions, 30000, enough=1))
+        assert results[-1][1].result == sat and len(results) < len(obs_functions)
+        # The next batch is evaluated in full
+        assert len(list(evaluator.evaluate_pomdp_batch(obs_functions[:3], 30000))) == 3
+
+
+def test_cancellation_interrupts_running_checks():
+    params = dict(width=4, height=4, goal=5, budget=2, determinism=False)
+    with BatchPOMDPEvaluator('pop', 'grid', params, '<= 3', 1) as evaluator:
+        hard = [0, 1, 0, 1, 1, -1, 0, 1, 0, 0, 1, 1, 0, 1, 0, 1]
+        # Cancel the batch (as closing its generator does) while its first check runs
+        timer = threading.Timer(1.0, lambda: setattr(evaluator.cancelled, 'value', evaluator.batches))
+        timer.start()
+        start = time.monotonic()
+        results = list(evaluator.evaluate_pomdp_batch([hard, hard], 60000))
+        timer.join()
+        assert [result.result for _, result in results] == [unknown, unknown]
+        assert time.monotonic() - start < 30
@@ -0,0 +1,57 @@
+"""
+Unit tests for the incremental search of the smallest budget meeting a threshold.
+"""
+
+import pytest
+from z3 import sat, unsat
+
+from Z3Executor import Z3Executor
+from builders.TPMCFactory import TPMCFactory
+
+INSTANCES = [
+    # (variant, world, parameters, threshold, maximal budget, smallest sufficient budget)
+    ('pop', 'line', dict(length=7, goal=3), '<= 2', 4, 2),
+    ('pop', 'grid', dict(width=3, height=3, goal=4), '<= 3/2', 6, 4),
+    ('ssp', 'line', dict(length=6, goal=2), '<= 9/5', 5, 2),
+    ('ssp', 'grid', dict(width=3, height=3, goal=4), '<= 2', 8, 4),
+]
+
+
+def _sweep(variant, world, params, threshold, budget, **options):
+    tpmc = TPMCFactory.create(variant, world, budget=budget, determinism=True, budget_sweep=True, **params, **options)
+    solver = Z3Executor(tpmc.ctx, verbose=False)
+    result = solver.sweep_budget(tpmc, threshold, 30000)
+    solver.cleanup()
+    return result
+
+
+def _solve(variant, world, params, threshold, budget):
+    tpmc = TPMCFactory.create(variant, world, budget=budget, determinism=True, **params)
+    solver = Z3Executor(tpmc.ctx, verbose=False)
+    solver.prepare_constraints(tpmc, threshold)
+    result = solver.solve(30000)
+    solver.cleanup()
+    return result
+
+
+@pytest.mark.parametrize("variant, world, params, threshold, budget, smallest", INSTANCES)
+def test_sweep_finds_smallest_budget(variant, world, params, threshold, budget, smallest):
+    result = _sweep(variant, world, params, threshold, budget)
+    assert result.result == sat and result.budget == smallest
+    # Independent solves agree on the boundary of the budget axis
+    assert _solve(variant, world, params, threshold, smallest).result == sat
+    assert _solve(variant, world, params, threshold, smallest - 1).result == unsat
+
+
+@pytest.mark.parametrize("observation_encoding", ['int', 'bitvec'])
+def test_sweep_index_observations(observation_encoding):
+    variant, world, params, threshold, budget, smallest = INSTANCES[1]
+    result = _sweep(variant, world, params, threshold, budget, observation_encoding=observation_encoding,
+                    class_symmetry_breaking=True)
+    assert result.result == sat and result.budget == smallest
+
+
+def test_sweep_unsat_at_maximal_budget():
+    variant, world, params, threshold, budget, smallest = INSTANCES[2]
+    result = _sweep(variant, world, params, '< 9/5', budget)
+    assert result.result == unsat and result.budget is None
@@ -0,0 +1,41 @@
+"""
+Unit tests for the on-disk cache of built tpMC instances.
+"""
+
+import os
+
+import pytest
+
+from Z3Executor import Z3Executor
+from builders.InstanceCache import InstanceCache
+from builders.TPMCFactory import TPMCFactory
+
+
+def _solve(cache, variant, threshold, **params):
+    tpmc = TPMCFactory.create(variant, 'grid', width=3, height=3, goal=4, budget=4, determinism=True, **params)
+    solver = Z3Executor(tpmc.ctx, verbose=False)
+    solver.prepare_constraints(tpmc, threshold, cache)
+    result = solver.solve(30000)
+    solver.cleanup()
+    return tpmc, result
+
+
+@pytest.mark.parametrize("variant, threshold", [('pop', '<= 3/2'), ('ssp', '<= 2'), ('ssp', '< 2')])
+def test_cache_hit_matches_build(tmp_path, variant, threshold):
+    cache = InstanceCache(str(tmp_path))
+    tpmc, built = _solve(cache, variant, threshold)
+    assert os.path.exists(cache.path(cache.key(tpmc, threshold)))
+
+    _, loaded = _solve(cache, variant, threshold)
+    assert loaded.result == built.result
+    assert loaded.reward == built.reward
+
+
+def test_cache_key_covers_parameters(tmp_path):
+    def key(threshold='<= 2', **params):
+        tpmc = TPMCFactory.create('pop', 'grid', **{'width': 3, 'height': 3, 'goal': 4, 'budget': 4, **params})
+        return InstanceCache.key(tpmc, threshold)
+
+    assert key() == key(threshold='<=2')
+    assert len({key(), key(threshold='< 2'), key(goal=3), key(budget=3), key(width=4), key(determinism=True),
+                key(precision='strict'), key(bellman_format='adapted'), key(order_constraints=[1, 0, 2, 3])}) == 9
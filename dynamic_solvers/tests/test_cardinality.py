@@ -0,0 +1,32 @@
+"""
+Unit tests for the exactly-one encodings of one-hot Boolean rows.
+"""
+
+import pytest
+from z3 import Bool, Context, Solver, Or, Not, sat, is_true
+
+from builders.cardinality import exactly_one
+from builders.enums import ExactlyOneEncoding
+
+
+def _models(n: int, encoding: ExactlyOneEncoding) -> set[tuple[bool, ...]]:
+    """All assignments of the row literals allowed by the encoding (auxiliary variables projected away)."""
+    ctx = Context()
+    literals = [Bool(f'x{i}', ctx) for i in range(n)]
+    solver = Solver(ctx=ctx)
+    solver.add(exactly_one(literals, encoding, 'row', ctx))
+
+    models = set()
+    while solver.check() == sat:
+        model = solver.model()
+        values = tuple(is_true(model.eval(lit, model_completion=True)) for lit in literals)
+        models.add(values)
+        solver.add(Or(*[Not(lit, ctx) if value else lit for lit, value in zip(literals, values)], ctx))
+    return models
+
+
+@pytest.mark.parametrize("encoding", list(ExactlyOneEncoding))
+@pytest.mark.parametrize("n", [1, 2, 3, 5, 8, 13])
+def test_exactly_one_models(encoding, n):
+    one_hot = {tuple(i == j for j in range(n)) for i in range(n)}
+    assert _models(n, encoding) == one_hot
@@ -0,0 +1,53 @@
+"""
+Unit tests for cube-and-conquer solving (cubes over the observations of splitting states, same verdicts).
+"""
+
+import pytest
+from z3 import sat, unsat, Solver, And, Or
+
+from CubeAndConquerSolver import CubeAndConquerSolver
+from builders.TPMCFactory import TPMCFactory
+from utils import restricted_growth_strings
+
+
+def test_restricted_growth_strings_enumerate_partitions():
+    # Bell numbers, capped by the number of labels
+    assert [len(list(restricted_growth_strings(n, n))) for n in range(1, 6)] == [1, 2, 5, 15, 52]
+    assert list(restricted_growth_strings(3, 2)) == [[0, 0, 0], [0, 0, 1], [0, 1, 0], [0, 1, 1]]
+
+
+@pytest.mark.parametrize("variant, world, params", [
+    ('pop', 'grid', dict(width=4, height=4, goal=5, budget=3)),
+    ('pop', 'maze', dict(width=5, height=3, goal=8, budget=3)),
+    ('ssp', 'grid', dict(width=4, height=4, goal=5, budget=2)),
+])
+def test_cubes_are_disjoint_splits(variant, world, params):
+    tpmc = TPMCFactory.create(variant, world, determinism=True, **params)
+    tpmc.declare_variables()
+    cubes = tpmc.build_cubes(3)
+    assert len(cubes) > 1 and all(len(cube) == 3 for cube in cubes)
+    # No two cubes overlap under the observation constraints
+    solver = Solver(ctx=tpmc.ctx)
+    solver.add(*tpmc.build_observation_constraints())
+    for i, cube in enumerate(cubes):
+        solver.push()
+        solver.add(*cube, Or(*[And(*other, tpmc.ctx) for other in cubes[i + 1:]], False, tpmc.ctx))
+        assert solver.check() == unsat
+        solver.pop()
+
+
+@pytest.mark.instances('pop-grid', 'ssp-line', 'ssp-grid')
+def test_cube_and_conquer_matches_reference_verdicts(instance):
+    results = [CubeAndConquerSolver(instance.variant, instance.world, {**instance.params, 'determinism': True},
+                                    threshold, 2).solve(30000)
+               for threshold in instance.thresholds]
+    assert [r.result for r in results] == [sat, unsat]
+    assert results[0].reward == instance.reward and results[0].cubes > 1
+    assert results[0].obs and all(name.startswith('ys') for name in results[0].obs)
+
+
+def test_cube_and_conquer_randomised_strategies():
+    # Nonlinear instances assert each cube instead of assuming it
+    result = CubeAndConquerSolver('pop', 'line', dict(length=7, goal=3, budget=2, determinism=False), '<= 2',
+                                  2).solve(30000)
+    assert result.result == sat and result.reward <= 2
@@ -0,0 +1,64 @@
+"""
+Unit tests for the alternative encodings of tpMC instances (same verdicts as the reference encoding).
+"""
+
+import pytest
+from z3 import sat, unsat
+
+from Z3Executor import Z3Executor
+from builders.TPMCFactory import TPMCFactory
+
+# Reference instances of the POP variant, the only one with observation classes to encode
+POP_INSTANCES = ('pop-line', 'pop-grid', 'pop-maze')
+
+
+@pytest.mark.parametrize("reward_encoding", ['int', 'bitvec'])
+def test_integral_rewards_match_real_rewards(solve, instance, reward_encoding):
+    real = [solve(instance, threshold) for threshold in instance.thresholds]
+    integral = [solve(instance, threshold, reward_encoding=reward_encoding) for threshold in instance.thresholds]
+    assert [r.result for r in real] == [r.result for r in integral] == [sat, unsat]
+    assert integral[0].reward == real[0].reward
+
+
+@pytest.mark.parametrize("reward_encoding", ['int', 'bitvec'])
+def test_integral_rewards_require_deterministic_strategies(reward_encoding):
+    with pytest.raises(ValueError):
+        TPMCFactory.create('pop', 'line', length=5, goal=2, budget=2, determinism=False, reward_encoding=reward_encoding)
+
+
+@pytest.mark.instances(*POP_INSTANCES)
+@pytest.mark.parametrize("observation_encoding", ['int', 'bitvec'])
+def test_index_observations_match_one_hot(solve, instance, observation_encoding):
+    one_hot = [solve(instance, threshold).result for threshold in instance.thresholds]
+    index = [solve(instance, threshold, observation_encoding=observation_encoding, symmetry_breaking=True,
+                   class_symmetry_breaking=True).result
+             for threshold in instance.thresholds]
+    assert one_hot == index == [sat, unsat]
+
+
+@pytest.mark.parametrize("breaking", [
+    dict(class_symmetry_breaking=True),
+    dict(class_symmetry_breaking=True, symmetry_breaking=True),
+    dict(class_symmetry_breaking=True, observation_encoding='int'),
+])
+@pytest.mark.instances(*POP_INSTANCES)
+def test_class_symmetry_breaking_is_equisatisfiable(solve, instance, breaking):
+    reference = [solve(instance, threshold).result for threshold in instance.thresholds]
+    ordered = [solve(instance, threshold, **breaking).result for threshold in instance.thresholds]
+    assert reference == ordered == [sat, unsat]
+
+
+@pytest.mark.parametrize("observation_encoding", ['int', 'bitvec'])
+def test_index_observations_draw_model(observation_encoding):
+    tpmc = TPMCFactory.create('pop', 'line', length=7, goal=3, budget=2, determinism=True,
+                              observation_encoding=observation_encoding)
+    solver = Z3Executor(tpmc.ctx, verbose=False)
+    solver.prepare_constraints(tpmc, '<= 2')
+    result = solver.solve(30000)
+    model = {decl.name(): result.model[decl] for decl in result.model.decls()}
+    # States left of the goal share a class, and so do the states right of it
+    classes = [tpmc.observation_class(model, s) for s in range(7)]
+    assert classes[3] == 0 and len(set(classes[:3])) == len(set(classes[4:])) == 1
+    assert classes[0] != classes[4]
+    assert tpmc.draw_model(model, 3, 2, use_color=False).splitlines()[2].split() == [*map(str, classes[:3]), '✓',
+                                                                                     *map(str, classes[4:])]
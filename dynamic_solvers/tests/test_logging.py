@@ -0,0 +1,41 @@
+"""
+Unit tests for the lazy builder log (no formatting of constraints unless verbose).
+"""
+
+import pytest
+from z3 import AstRef
+
+from builders.POMDPAdapter import POMDPAdapter
+from builders.TPMCFactory import TPMCFactory
+
+
+@pytest.fixture
+def formatting_calls(monkeypatch):
+    """Count the stringifications of Z3 ASTs."""
+    calls = []
+    monkeypatch.setattr(AstRef, '__repr__', lambda ast: calls.append(ast) or 'ast')
+    monkeypatch.setattr(AstRef, '__str__', lambda ast: calls.append(ast) or 'ast')
+    return calls
+
+
+@pytest.mark.parametrize("variant", ['pop', 'ssp'])
+def test_quiet_building_does_not_format(formatting_calls, variant):
+    tpmc = TPMCFactory.create(variant, 'grid', width=3, height=3, goal=4, budget=2, determinism=True)
+    tpmc.declare_variables()
+    list(tpmc.collect_constraints('<= 2'))
+
+    adapter = POMDPAdapter(TPMCFactory.create(variant, 'grid', width=3, height=3, goal=4, budget=2))
+    adapter.build_y_independent_constraints('<= 2')
+    adapter.collect_bellman_constraints([0, 1, 0, 1, -1, 1, 0, 1, 0])
+
+    assert formatting_calls == []
+    assert tpmc.console.export_text() == ""
+
+
+def test_verbose_building_records(formatting_calls):
+    tpmc = TPMCFactory.create('pop', 'line', length=5, goal=2, budget=2, verbose=True)
+    tpmc.declare_variables()
+    list(tpmc.collect_constraints('<= 2'))
+
+    assert len(formatting_calls) > 0
+    assert "Bellman equations" in tpmc.console.export_text()
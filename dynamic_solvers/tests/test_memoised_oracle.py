@@ -0,0 +1,82 @@
+"""
+Unit tests for the memoised POMDP oracle (canonical keys, LRU bound, timeouts and persistence).
+"""
+
+from z3 import sat, unsat, unknown
+
+from MemoisedOracle import MemoisedOracle
+from Z3Executor import Z3Executor
+from Z3SolverResult import Z3SolverResult
+from builders.POMDPAdapter import POMDPAdapter
+from builders.TPMCFactory import TPMCFactory
+
+
+def _oracle(variant, world, params, threshold, **memo):
+    pomdp = POMDPAdapter(TPMCFactory.create(variant, world, determinism=True, **params), assumptions=True)
+    solver = Z3Executor(pomdp.ctx, verbose=False)
+    solver.prepare_constraints(pomdp, threshold)
+    return MemoisedOracle(solver, pomdp, **memo)
+
+
+class _TimeoutOracle:
+    """Z3-like oracle timing out on every evaluation."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def evaluate_pomdp(self, pomdp, obs_function, timeout_ms):
+        self.calls += 1
+        return Z3SolverResult(timeout_ms / 1000, unknown)
+
+
+def test_canonical_keys():
+    pop = _oracle('pop', 'line', dict(length=5, goal=2, budget=3), '<= 2')
+    assert pop.key([2, 2, -1, 0, 1]) == pop.key([0, 0, -1, 1, 2]) == '0,0,-1,1,2'
+    assert pop.key([0, 1, -1, 1, 0]) != pop.key([0, 0, -1, 1, 1])
+    ssp = _oracle('ssp', 'line', dict(length=5, goal=2, budget=2), '<= 2')
+    assert ssp.key([1, 0, -1, 0, 1]) == '11'
+
+
+def test_relabelled_observation_functions_hit():
+    oracle = _oracle('pop', 'line', dict(length=5, goal=2, budget=2), '<= 2')
+    first = oracle.evaluate_pomdp(oracle.pomdp, [0, 0, -1, 1, 1], 30000)
+    relabelled = oracle.evaluate_pomdp(oracle.pomdp, [1, 1, -1, 0, 0], 30000)
+    assert (oracle.hits, oracle.misses) == (1, 1)
+    assert first.result == relabelled.result == sat and first.reward == relabelled.reward
+    assert first.model is not None and relabelled.model is None
+    assert relabelled.obs == oracle.pomdp.extract_obs_solution([1, 1, -1, 0, 0])
+    assert oracle.evaluate_pomdp(oracle.pomdp, [0, 1, -1, 1, 0], 30000).result == unsat
+    assert (oracle.hits, oracle.misses) == (1, 2)
+
+
+def test_lru_bound():
+    oracle = _oracle('ssp', 'line', dict(length=5, goal=2, budget=2), '<= 2', max_size=2)
+    for obs_function in ([1, 0, -1, 0, 1], [1, 1, -1, 1, 1], [1, 0, -1, 0, 1], [0, 1, -1, 1, 0]):
+        oracle.evaluate(obs_function, 30000)
+    # The least recently used function was evicted, the re-evaluated one kept
+    assert list(oracle.entries) == [oracle.key([1, 0, -1, 0, 1]), oracle.key([0, 1, -1, 1, 0])]
+    assert (oracle.hits, oracle.misses) == (1, 3)
+
+
+def test_timeouts_are_retried_under_longer_timeouts():
+    pomdp = POMDPAdapter(TPMCFactory.create('ssp', 'line', length=5, goal=2, budget=2, determinism=True))
+    stub = _TimeoutOracle()
+    oracle = MemoisedOracle(stub, pomdp)
+    for timeout_ms in (1000, 500, 1000, 2000):
+        assert oracle.evaluate([1, 0, -1, 0, 1], timeout_ms).result == unknown
+    assert stub.calls == 2 and oracle.entries[oracle.key([1, 0, -1, 0, 1])][1] == 2000
+
+
+def test_persistence(tmp_path):
+    path = str(tmp_path / 'memo.json')
+    params = dict(length=5, goal=2, budget=2)
+    oracle = _oracle('ssp', 'line', params, '<= 2', path=path)
+    results = [oracle.evaluate(obs_function, 30000) for obs_function in ([1, 0, -1, 0, 1], [0, 0, -1, 0, 0])]
+    oracle.save()
+
+    reloaded = _oracle('ssp', 'line', params, '<= 2', path=path)
+    assert [reloaded.evaluate(obs_function, 30000).reward for obs_function in ([1, 0, -1, 0, 1], [0, 0, -1, 0, 0])] \
+           == [result.reward for result in results]
+    assert (reloaded.hits, reloaded.misses) == (2, 0)
+    # Memos of another threshold are ignored
+    assert not _oracle('ssp', 'line', params, '<= 3', path=path).entries
@@ -0,0 +1,88 @@
+"""
+Unit tests for the numeric POMDP evaluator (against Z3 models, dense against banded, exact rationals).
+"""
+
+import math
+from fractions import Fraction
+
+import numpy as np
+import pytest
+from z3 import sat
+
+from NumericEvaluator import NumericEvaluator, strategy_from_model
+from Z3Executor import Z3Executor
+from builders.POMDPAdapter import POMDPAdapter
+from builders.TPMCFactory import TPMCFactory
+
+INSTANCES = [
+    # (variant, parameters, threshold, determinism, observation function, reward)
+    ('pop', dict(length=5, goal=2, budget=2), '<= 2', True, [0, 0, -1, 1, 1], Fraction(3, 2)),
+    ('ssp', dict(length=5, goal=2, budget=2), '<= 2', True, [1, 1, -1, 1, 1], Fraction(3, 2)),
+    ('ssp', dict(length=5, goal=2, budget=2), '<= 2', False, [0, 1, -1, 1, 0], Fraction(2)),
+]
+
+
+def _solve(variant, params, threshold, determinism, obs_function, precision):
+    pomdp = POMDPAdapter(TPMCFactory.create(variant, 'line', determinism=determinism, precision=precision, **params))
+    solver = Z3Executor(pomdp.ctx, verbose=False)
+    solver.prepare_constraints(pomdp, threshold)
+    solver.solver.add(pomdp.collect_bellman_constraints(obs_function))
+    result = solver.solve(30000)
+    assert result.result == sat
+    return pomdp, result
+
+
+@pytest.mark.parametrize("variant, params, threshold, determinism, obs_function, reward", INSTANCES)
+def test_strict_models(variant, params, threshold, determinism, obs_function, reward):
+    pomdp, result = _solve(variant, params, threshold, determinism, obs_function, 'strict')
+    strategy = strategy_from_model(pomdp, result.model)
+    evaluator = NumericEvaluator(pomdp)
+
+    exact = evaluator.evaluate(obs_function, strategy, exact=True)
+    assert exact.method == 'exact' and exact.reward == reward == result.reward
+    assert isinstance(exact.reward, Fraction)
+    assert evaluator.evaluate(obs_function, strategy).reward == pytest.approx(float(reward))
+
+
+@pytest.mark.parametrize("variant, params, threshold, determinism, obs_function, reward", INSTANCES)
+def test_relaxed_models_bound_the_rewards(variant, params, threshold, determinism, obs_function, reward):
+    pomdp, result = _solve(variant, params, threshold, determinism, obs_function, 'relaxed')
+    evaluation = NumericEvaluator(pomdp).evaluate(obs_function, strategy_from_model(pomdp, result.model), exact=True)
+    assert evaluation.reward <= result.reward
+
+
+def test_dense_matches_banded():
+    pomdp = POMDPAdapter(TPMCFactory.create('pop', 'grid', width=12, height=9, goal=50, budget=3))
+    rng = np.random.default_rng(0)
+    obs_function = rng.integers(0, 3, pomdp.size).tolist()
+    obs_function[pomdp.goal] = -1
+    strategy = rng.random((3, len(pomdp.actions))) + 1
+    strategy /= strategy.sum(axis=1, keepdims=True)
+
+    dense = NumericEvaluator(pomdp).evaluate(obs_function, strategy)
+    banded = NumericEvaluator(pomdp, dense_limit=0).evaluate(obs_function, strategy)
+    assert (dense.method, banded.method) == ('dense', 'banded')
+    assert np.allclose(dense.values, banded.values, rtol=1e-9)
+    assert banded.reward == pytest.approx(dense.reward, rel=1e-9)
+
+
+def test_exact_elimination():
+    pomdp = POMDPAdapter(TPMCFactory.create('pop', 'line', length=7, goal=3, budget=2))
+    # Values with large denominators are not reconstructed from the floats: they are eliminated
+    strategy = [[Fraction(1, 3), Fraction(2, 3)], [Fraction(9999991, 10000000), Fraction(9, 10000000)]]
+    evaluator = NumericEvaluator(pomdp, max_denominator=10)
+    obs_function = [0, 0, 0, -1, 1, 1, 1]
+    exact = evaluator.evaluate(obs_function, strategy, exact=True)
+    assert all(isinstance(value, Fraction) for value in exact.values)
+    assert float(exact.reward) == pytest.approx(evaluator.evaluate(obs_function, strategy).reward, rel=1e-9)
+
+
+def test_goal_not_reached():
+    pomdp = POMDPAdapter(TPMCFactory.create('pop', 'line', length=5, goal=2, budget=2))
+    # Class 1 always moves right: the states right of the goal get stuck at the wall, the others reach the goal
+    right = [Fraction(int(action == 'r')) for action in pomdp.actions]
+    left = [Fraction(int(action == 'l')) for action in pomdp.actions]
+    evaluation = NumericEvaluator(pomdp).evaluate([1, 1, -1, 1, 1], [left, right])
+    assert evaluation.reward == math.inf
+    assert evaluation.values[4] == math.inf and evaluation.values[3] == math.inf
+    assert evaluation.values[0] == 2 and evaluation.values[1] == 1
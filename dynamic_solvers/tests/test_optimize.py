@@ -0,0 +1,42 @@
+"""
+Unit tests for the threshold bisection of the optimal expected reward of tpMC instances.
+"""
+
+from fractions import Fraction
+
+import pytest
+from z3 import sat, unsat
+
+from Z3Executor import Z3Executor
+from builders.InstanceCache import InstanceCache
+from builders.TPMCFactory import TPMCFactory
+
+
+def _optimize(instance, precision, cache=None, **encoding):
+    tpmc = TPMCFactory.create(instance.variant, instance.world, determinism=True, **instance.params, **encoding)
+    solver = Z3Executor(tpmc.ctx, verbose=False)
+    result = solver.optimize(tpmc, 30000, precision, cache)
+    solver.cleanup()
+    return result
+
+
+@pytest.mark.parametrize("reward_encoding", ['real', 'int', 'bitvec'])
+def test_optimize_finds_optimal_reward(instance, reward_encoding):
+    result = _optimize(instance, Fraction(1, 1000), reward_encoding=reward_encoding)
+    assert result.result == sat
+    assert result.reward_lower_bound <= instance.reward == result.reward
+
+
+def test_optimize_unsat_without_deterministic_strategy():
+    # A single observation class cannot steer the agent towards a goal in the middle of the line
+    tpmc = TPMCFactory.create('pop', 'line', length=5, goal=2, budget=1, determinism=True)
+    solver = Z3Executor(tpmc.ctx, verbose=False)
+    result = solver.optimize(tpmc, 30000, Fraction(1, 1000))
+    assert result.result == unsat and result.reward_lower_bound is None
+
+
+def test_optimize_reuses_cached_instance(tmp_path, reference_instances):
+    cache = InstanceCache(str(tmp_path))
+    instance = reference_instances['pop-grid']
+    assert [_optimize(instance, Fraction(1, 100), cache).reward for _ in range(2)] == [instance.reward] * 2
+    assert len(list(tmp_path.iterdir())) == 1
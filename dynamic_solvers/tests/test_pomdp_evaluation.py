@@ -0,0 +1,142 @@
+"""
+Unit tests for POMDP evaluation under fixed observation functions (assumption mode against push/pop).
+"""
+
+import random
+
+import pytest
+from z3 import sat, unsat
+
+from Z3Executor import Z3Executor
+from builders.IndexStorage import IndexStorage
+from builders.POMDPAdapter import POMDPAdapter
+from builders.TPMCFactory import TPMCFactory
+
+INSTANCES = [
+    # (variant, world, parameters, threshold, determinism)
+    ('pop', 'grid', dict(width=4, height=4, goal=5, budget=3), '<= 3', True),
+    ('pop', 'line', dict(length=5, goal=2, budget=2), '<= 2', False),
+    ('ssp', 'grid', dict(width=4, height=4, goal=5, budget=4), '<= 3', True),
+    ('ssp', 'line', dict(length=5, goal=2, budget=2), '<= 2', False),
+]
+
+
+def _walk(adapter: POMDPAdapter, classes: int, steps: int, seed: int = 0) -> list[list[int]]:
+    """
+    Random walk over observation functions from the atomic groups of the world (one class per group, modulo the
+    number of classes), changing the observation of one state per step.
+    """
+    rnd = random.Random(seed)
+    obs_function = [int(label) % classes for label in adapter.atomic_labels]
+    obs_function[adapter.goal] = -1
+    walk = [list(obs_function)]
+    for _ in range(steps - 1):
+        state = rnd.randrange(adapter.size)
+        if state != adapter.goal:
+            obs_function[state] = rnd.randrange(classes)
+        walk.append(list(obs_function))
+    return walk
+
+
+def _evaluator(variant, world, params, threshold, determinism, assumptions, **storage):
+    adapter = POMDPAdapter(TPMCFactory.create(variant, world, determinism=determinism, **params),
+                           assumptions=assumptions, **storage)
+    solver = Z3Executor(adapter.ctx, verbose=False)
+    solver.prepare_constraints(adapter, threshold)
+    return adapter, solver
+
+
+@pytest.mark.parametrize("variant, world, params, threshold, determinism", INSTANCES)
+def test_assumptions_match_push_pop(variant, world, params, threshold, determinism):
+    evaluators = [_evaluator(variant, world, params, threshold, determinism, assumptions)
+                  for assumptions in (False, True)]
+    adapter = evaluators[0][0]
+    walk = _walk(adapter, 2 if variant == 'ssp' else adapter.budget, 30 if determinism else 8)
+
+    results = [[solver.evaluate_pomdp(pomdp, obs_function, 30000) for obs_function in walk]
+               for pomdp, solver in evaluators]
+    assert [r.result for r in results[0]] == [r.result for r in results[1]]
+    assert all(r.result in (sat, unsat) for r in results[1])
+
+
+def test_assumptions_scope_extra_constraints():
+    pomdp, solver = _evaluator('pop', 'line', dict(length=5, goal=2, budget=2), '<= 2', True, True)
+    obs_function = [0, 0, -1, 1, 1]
+    assert solver.evaluate_pomdp(pomdp, obs_function, 30000).result == sat
+    # Forbidding the only optimal action of class 1 (left) makes it UNSAT, for this evaluation only
+    left = pomdp.actions.index('l')
+    assert solver.evaluate_pomdp(pomdp, obs_function, 30000, [pomdp.X[1][left] == False]).result == unsat
+    assert solver.evaluate_pomdp(pomdp, obs_function, 30000).result == sat
+
+
+def test_assumptions_reject_unknown_observations():
+    pomdp, solver = _evaluator('ssp', 'line', dict(length=5, goal=2, budget=2), '<= 2', True, True)
+    with pytest.raises(KeyError):
+        solver.evaluate_pomdp(pomdp, [0, 2, -1, 1, 0], 30000)
+
+
+@pytest.mark.parametrize("assumptions", [False, True])
+@pytest.mark.parametrize("variant, world, params, threshold, determinism",
+                         [instance for instance in INSTANCES if instance[-1]])
+def test_delta_matches_full_evaluation(variant, world, params, threshold, determinism, assumptions):
+    pomdp, solver = _evaluator(variant, world, params, threshold, determinism, assumptions)
+    walk = _walk(pomdp, 2 if variant == 'ssp' else pomdp.budget, 20)
+    for base, obs_function in zip(walk, walk[1:]):
+        delta = {state: obs for state, obs in enumerate(obs_function) if base[state] != obs}
+        changed = solver.reevaluate_pomdp(pomdp, base, delta, 30000)
+        full = solver.evaluate_pomdp(pomdp, obs_function, 30000)
+        assert changed.result == full.result and changed.reward == full.reward
+        assert changed.obs == full.obs
+
+
+def test_delta_reuses_base_selectors(monkeypatch):
+    pomdp, solver = _evaluator('ssp', 'line', dict(length=5, goal=2, budget=2), '<= 2', True, True)
+    collected = []
+    monkeypatch.setattr(pomdp.storage, 'selectors', lambda *args: collected.append(args) or
+                        IndexStorage.selectors(pomdp.storage, *args))
+    base = [0, 0, -1, 0, 0]
+    # Neighbours of one base, then a chain of changes: the base alone is collected in full
+    assert solver.reevaluate_pomdp(pomdp, base, {1: 1}, 30000).obs == {'ys0': 0, 'ys1': 1, 'ys2': -1, 'ys3': 0,
+                                                                        'ys4': 0}
+    solver.reevaluate_pomdp(pomdp, base, {3: 1}, 30000)
+    result = solver.reevaluate_pomdp(pomdp, [0, 0, -1, 1, 0], {1: 1}, 30000)
+    assert len(collected) == 1
+    assert result.result == solver.evaluate_pomdp(pomdp, [0, 1, -1, 1, 0], 30000).result
+    assert len(collected) == 2
+
+    with pytest.raises(ValueError):
+        solver.reevaluate_pomdp(pomdp, base, {2: 0}, 30000)
+    with pytest.raises(KeyError):
+        solver.reevaluate_pomdp(pomdp, base, {1: 2}, 30000)
+
+
+@pytest.mark.parametrize("assumptions", [False, True])
+@pytest.mark.parametrize("variant, world, params, threshold, determinism",
+                         [instance for instance in INSTANCES if instance[-1]])
+def test_lazy_storage_matches_eager(variant, world, params, threshold, determinism, assumptions):
+    evaluators = [_evaluator(variant, world, params, threshold, determinism, assumptions, **storage)
+                  for storage in ({}, dict(lazy=True), dict(lazy=True, max_groups=8))]
+    walk = _walk(evaluators[0][0], 2 if variant == 'ssp' else evaluators[0][0].budget, 20)
+    results = [[(r.result, r.reward) for r in (solver.evaluate_pomdp(pomdp, obs_function, 30000)
+                                               for obs_function in walk)]
+               for pomdp, solver in evaluators]
+    assert results[0] == results[1] == results[2]
+    # The bounded store holds at most its bound (every group of the eager one was pre-computed)
+    eager, lazy, bounded = (pomdp.storage.stats() for pomdp, _ in evaluators)
+    assert eager['misses'] == 0 and bounded['groups'] <= 8
+    assert lazy['groups'] <= eager['groups'] and lazy['misses'] == lazy['groups']
+    if not assumptions:
+        assert bounded['evictions'] > 0 and bounded['misses'] > lazy['misses']
+
+
+def test_lazy_storage_builds_used_groups_only():
+    pomdp, solver = _evaluator('pop', 'grid', dict(width=4, height=4, goal=5, budget=3), '<= 3', True, False,
+                               lazy=True)
+    assert pomdp.storage.stats()['groups'] == 0
+    obs_function = [0] * 5 + [-1] + [1] * 10
+    solver.evaluate_pomdp(pomdp, obs_function, 30000)
+    assert pomdp.storage.stats() == {'groups': 15, 'hits': 0, 'misses': 15, 'evictions': 0, 'hit_rate': 0.0}
+    solver.evaluate_pomdp(pomdp, obs_function, 30000)
+    assert pomdp.storage.hit_rate() == 0.5
+    with pytest.raises(KeyError):
+        solver.evaluate_pomdp(pomdp, [0] * 5 + [-1] + [3] * 10, 30000)
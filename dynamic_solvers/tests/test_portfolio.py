@@ -0,0 +1,34 @@
+"""
+Unit tests for the parallel solver portfolio (same verdicts as the reference configuration, winner recorded).
+"""
+
+import pytest
+from z3 import sat, unsat, unknown
+
+from PortfolioSolver import PortfolioSolver, CONFIGURATIONS, applicable_configurations
+
+
+def test_budget_repair_only_races_ssp():
+    assert 'budget-repair' not in applicable_configurations('pop')
+    assert 'budget-repair' in applicable_configurations('ssp')
+    assert len(applicable_configurations('ssp')) == len(CONFIGURATIONS)
+    assert list(applicable_configurations('pop', 3)) == ['default', 'real-encoding', 'strict']
+
+
+@pytest.mark.instances('pop-grid', 'ssp-line')
+def test_portfolio_matches_reference_verdicts(instance):
+    configurations = applicable_configurations(instance.variant, 3)
+    results = [PortfolioSolver(instance.variant, instance.world, {**instance.params, 'determinism': True}, threshold,
+                               configurations).solve(30000) for threshold in instance.thresholds]
+    assert [r.result for r in results] == [sat, unsat]
+    assert all(r.portfolio_winner in configurations for r in results)
+    assert results[0].reward == instance.reward
+    # The observation function of the winning model is shipped back without the Z3 model
+    assert results[0].model is None and results[0].obs and all(k.startswith('ys') for k in results[0].obs)
+
+
+def test_portfolio_without_decisive_racer_is_unknown():
+    # Every racer fails (integral rewards with randomised strategies): no winner
+    result = PortfolioSolver('pop', 'line', dict(length=5, goal=2, budget=2, determinism=False), '<= 2',
+                             applicable_configurations('pop', 2), reward_encoding='int').solve(1000)
+    assert result.result == unknown and result.portfolio_winner is None
@@ -0,0 +1,43 @@
+"""
+Unit tests for the solver profiles (tactic pipelines and parameter sets per logical fragment).
+"""
+
+import pytest
+from z3 import sat, unsat
+
+from Z3Executor import Z3Executor
+from builders.TPMCFactory import TPMCFactory
+from builders.enums import SolverProfile
+
+# Encoding options placing deterministic instances in the fragment of each profile
+FRAGMENTS = {
+    SolverProfile.DEFAULT: dict(),
+    SolverProfile.LRA_SIMPLEX: dict(),
+    SolverProfile.SAT_BITBLAST: dict(reward_encoding='bitvec'),
+    SolverProfile.NLSAT: dict(bool_encoding=False),
+    SolverProfile.PB_SOLVER: dict(),
+}
+
+
+@pytest.mark.instances('pop-grid', 'ssp-line')
+@pytest.mark.parametrize("profile", list(SolverProfile))
+def test_profiles_match_default_verdicts(solve, instance, profile):
+    results = [solve(instance, threshold, profile=profile, **FRAGMENTS[profile]) for threshold in instance.thresholds]
+    assert [r.result for r in results] == [sat, unsat]
+
+
+@pytest.mark.instances('pop-line')
+def test_nlsat_profile_on_randomised_strategies(solve, instance):
+    result = solve(instance, '<= 3', determinism=False, profile=SolverProfile.NLSAT, bool_encoding=False)
+    assert result.result == sat and result.reward <= 3
+
+
+def test_profile_fits_fragment():
+    randomised = TPMCFactory.create('pop', 'line', length=7, goal=3, budget=2, determinism=False)
+    index = TPMCFactory.create('pop', 'line', length=7, goal=3, budget=2, determinism=True,
+                               reward_encoding='bitvec', observation_encoding='int')
+    assert not Z3Executor.profile_fits(SolverProfile.LRA_SIMPLEX, randomised)
+    assert not Z3Executor.profile_fits(SolverProfile.SAT_BITBLAST, randomised)
+    assert not Z3Executor.profile_fits(SolverProfile.SAT_BITBLAST, index)
+    assert not Z3Executor.profile_fits(SolverProfile.NLSAT, index)
+    assert Z3Executor.profile_fits(SolverProfile.NLSAT, randomised)
@@ -0,0 +1,48 @@
+"""
+Unit tests for seeded solving and the seed race (same verdicts under every seed, reproducible runs).
+"""
+
+import pytest
+from z3 import sat, unsat, get_param
+
+from PortfolioSolver import PortfolioSolver, seed_configurations
+from Z3Executor import Z3Executor
+from builders.TPMCFactory import TPMCFactory
+
+
+def _observations(result):
+    return {decl.name(): str(result.model[decl]) for decl in result.model.decls() if decl.name().startswith('ys')}
+
+
+@pytest.mark.instances('pop-grid', 'ssp-line')
+@pytest.mark.parametrize("seed", [0, 1, 7])
+def test_seeds_keep_verdicts(solve, instance, seed):
+    results = [solve(instance, threshold, seed=seed) for threshold in instance.thresholds]
+    assert [r.result for r in results] == [sat, unsat]
+    assert results[0].reward == instance.reward
+
+
+@pytest.mark.instances('pop-grid', 'ssp-line')
+def test_seeded_runs_are_reproducible(solve, instance):
+    first, second = [solve(instance, instance.thresholds[0], seed=3) for _ in range(2)]
+    assert first.result == second.result == sat
+    assert _observations(first) == _observations(second)
+
+
+def test_cleanup_restores_global_seeds():
+    tpmc = TPMCFactory.create('ssp', 'line', length=6, goal=2, budget=2, determinism=True)
+    before = get_param('sat.random_seed'), get_param('smt.random_seed')
+    solver = Z3Executor(tpmc.ctx, verbose=False, seed=11)
+    assert get_param('sat.random_seed') == get_param('smt.random_seed') == '11'
+    solver.cleanup()
+    # Later unseeded executors do not inherit the seed
+    assert (get_param('sat.random_seed'), get_param('smt.random_seed')) == before
+
+
+def test_seed_race(reference_instances):
+    assert list(seed_configurations(3, 5)) == ['seed-5', 'seed-6', 'seed-7']
+    instance = reference_instances['pop-grid']
+    result = PortfolioSolver(instance.variant, instance.world, {**instance.params, 'determinism': True},
+                             instance.thresholds[0], seed_configurations(3)).solve(30000)
+    assert result.result == sat and result.reward == instance.reward
+    assert result.portfolio_winner in ('seed-0', 'seed-1', 'seed-2')
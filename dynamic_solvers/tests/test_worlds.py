@@ -0,0 +1,148 @@
+"""
+Unit tests for the world topologies (successor tables, atomic groups).
+"""
+
+import numpy as np
+import pytest
+
+from builders.worlds import Line, Grid, Maze, GraphWorld
+from direction import Direction
+
+
+def _as_sets(clusters):
+    return {direction: set(states.tolist()) for direction, states in clusters.items()}
+
+
+def test_line_successors():
+    line = Line(length=5, goal=2)
+    assert line.succ.shape == (5, 2)
+    # Moving left/right saturates at the boundaries of the line
+    assert line.succ[:, 0].tolist() == [0, 0, 1, 2, 3]
+    assert line.succ[:, 1].tolist() == [1, 2, 3, 4, 4]
+    assert line.navigate(0, 0) == 0
+    assert line.navigate(4, 1) == 4
+
+
+def test_grid_successors():
+    grid = Grid(width=4, height=3, goal=5)
+    assert grid.succ.shape == (12, 4)
+    # Corner state 0 bumps into the left and upper walls
+    assert grid.succ[0].tolist() == [0, 1, 0, 4]
+    # Corner state 11 bumps into the right and lower walls
+    assert grid.succ[11].tolist() == [10, 11, 7, 11]
+    # Interior state moves freely in every direction
+    assert grid.succ[5].tolist() == [4, 6, 1, 9]
+
+
+def test_maze_successors():
+    maze = Maze(width=5, depth=3, goal=6)
+    # Top corridor 0..4, pillars hanging below states 0, 2 and 4
+    assert maze.size == 11
+    assert [maze.navigate(0, a) for a in range(4)] == [0, 1, 0, 5]
+    assert [maze.navigate(2, a) for a in range(4)] == [1, 3, 2, 6]
+    assert [maze.navigate(4, a) for a in range(4)] == [3, 4, 4, 7]
+    assert [maze.navigate(7, a) for a in range(4)] == [7, 7, 4, 10]
+    assert [maze.navigate(10, a) for a in range(4)] == [10, 10, 7, 10]
+
+
+def test_successors_agree_with_distances():
+    # Every optimal action decreases the distance to the goal by exactly one step
+    for world in [Line(9, 4), Grid(5, 4, 7), Maze(7, 4, 9)]:
+        optimal = world.optimal_actions()
+        assert not optimal[world.goal].any()
+        for state in range(world.size):
+            if state == world.goal:
+                continue
+            assert optimal[state].any()
+            for a in np.flatnonzero(optimal[state]):
+                assert world.dist(world.navigate(state, int(a)), world.goal) == world.dist(state, world.goal) - 1
+
+
+def test_grid_clusters():
+    grid = Grid(width=3, height=3, goal=4)
+    assert _as_sets(grid.clusters) == {
+        Direction.SE: {0}, Direction.S: {1}, Direction.SW: {2},
+        Direction.E: {3}, Direction.W: {5},
+        Direction.NE: {6}, Direction.N: {7}, Direction.NW: {8},
+    }
+
+
+def test_maze_clusters():
+    maze = Maze(width=5, depth=3, goal=6)
+    assert _as_sets(maze.clusters) == {
+        Direction.E: {0, 1}, Direction.W: {3, 4},
+        Direction.N: {5, 7, 8, 9, 10}, Direction.S: {2},
+    }
+
+
+def test_atomic_labels():
+    grid = Grid(width=4, height=3, goal=6)
+    directions = list(grid.clusters.keys())
+    assert grid.atomic_labels[grid.goal] == -1
+    for g, (direction, states) in enumerate(grid.clusters.items()):
+        assert np.all(grid.atomic_labels[states] == g)
+        assert directions[g] is direction
+    # Atomic groups are numbered by the first state they contain
+    assert directions[:3] == [Direction.SE, Direction.S, Direction.SW]
+
+
+@pytest.mark.parametrize("world, budget", [
+    (Line(9, 4), 2), (Line(9, 0), 1),
+    (Grid(5, 5, 12), 4), (Grid(5, 5, 2), 3), (Grid(5, 5, 22), 3), (Grid(5, 5, 24), 2),
+    (Maze(7, 4, 0), 2), (Maze(7, 4, 3), 3), (Maze(7, 4, 8), 4),
+])
+def test_minimal_pos_budget(world, budget):
+    assert world.minimal_pos_budget() == budget
+
+
+@pytest.mark.parametrize("world, count", [
+    (Line(9, 4), 2), (Line(9, 3), 1),
+    (Grid(5, 5, 12), 8), (Grid(5, 3, 7), 4), (Grid(5, 5, 6), 2), (Grid(5, 4, 6), 1),
+    (Maze(7, 4, 3), 2), (Maze(7, 4, 0), 1),
+])
+def test_automorphisms(world, count):
+    automorphisms = world.automorphisms()
+    assert len(automorphisms) == count
+    perm, sigma = automorphisms[0]
+    assert perm.tolist() == list(range(world.size)) and sigma.tolist() == list(range(len(world.actions)))
+    for perm, sigma in automorphisms:
+        assert perm[world.goal] == world.goal
+        assert np.array_equal(world.succ[perm][:, sigma], perm[world.succ])
+
+
+def _csr_from_world(world):
+    """Dense CSR adjacency (one successor per action in every row) of an existing world."""
+    indptr = np.arange(world.size + 1) * len(world.actions)
+    return indptr, world.succ.ravel()
+
+
+def test_graph_world_matches_grid():
+    grid = Grid(width=6, height=5, goal=13)
+    graph = GraphWorld(*_csr_from_world(grid), goal=13)
+    assert np.array_equal(graph.succ, grid.succ)
+    assert graph.goal_distances().tolist() == [grid.dist(s, 13) for s in range(grid.size)]
+    assert graph.dist(0, 29) == grid.dist(0, 29)
+    assert _as_sets(graph.clusters) == _as_sets(grid.clusters)
+
+
+def test_graph_world_sparse_rows(tmp_path):
+    # Corridor 0 - 1 - 2 - 3 with a dead end 4 below state 1; missing actions keep the agent in place
+    indptr = np.array([0, 1, 4, 6, 7, 8])
+    indices = np.array([1, 0, 2, 4, 1, 3, 2, 1])
+    action_ids = np.array([1, 0, 1, 3, 0, 1, 0, 2])
+    path = tmp_path / "corridor.npz"
+    np.savez(path, indptr=indptr, indices=indices, action_ids=action_ids)
+
+    graph = GraphWorld.from_file(str(path), goal=3)
+    assert graph.succ[4].tolist() == [4, 4, 1, 4]
+    assert graph.goal_distances().tolist() == [3, 2, 1, 0, 3]
+    assert _as_sets(graph.clusters) == {Direction.E: {0, 1, 2}, Direction.N: {4}}
+
+
+def test_graph_world_unreachable_goal():
+    # State 2 only loops on itself
+    indptr = np.array([0, 1, 2, 2])
+    indices = np.array([1, 0])
+    action_ids = np.array([1, 0])
+    with pytest.raises(ValueError):
+        GraphWorld(indptr, indices, goal=0, action_ids=action_ids)
@@ -1,10 +1,10 @@
 import re
 from typing import Tuple, Callable, List, Generator, Iterable
 
-from z3 import Bool, Real, Context, z3
+from z3 import Bool, Real, Context, z3, And, Implies, ZeroExt, ULE
 
 from builders.worlds import World
-from direction import Direction
+from direction import minimal_action_cover
 
 
 def parse_threshold(arg: str) -> Tuple[List[int], Callable[[int, int], bool]]:
@@ -23,6 +23,42 @@ def init_var_type(condition: bool) -> Callable[[str, Context], z3.ArithRef | z3.
     return Bool if condition else Real
 
 
+def lex_leq(lhs: List[z3.ExprRef], rhs: List[z3.ExprRef], prefix: str, ctx: Context) -> List[z3.BoolRef]:
+    """
+    Lexicographic order `lhs <= rhs` of two variable vectors, either Booleans (False < True), numbers or
+    unsigned bit-vectors.
+
+    Uses one auxiliary Boolean `<prefix><i>` per position, marking that the vectors agree before position `i`,
+    which keeps the encoding linear in the vector length (nesting the comparisons makes Z3 preprocessing blow up).
+    """
+    agree = [Bool(f'{prefix}{i}', ctx) for i in range(len(lhs))]
+    constraints = agree[:1]
+    for i, (a, b) in enumerate(zip(lhs, rhs)):
+        if z3.is_bool(a):
+            less_eq = Implies(a, b, ctx)
+        else:
+            less_eq = ULE(a, b) if z3.is_bv(a) else a <= b
+        constraints.append(Implies(agree[i], less_eq, ctx))
+        if i + 1 < len(agree):
+            constraints.append(Implies(And(agree[i], a == b, ctx), agree[i + 1], ctx))
+    return constraints
+
+
+def bv_sum(terms: List[z3.BitVecRef]) -> z3.BitVecRef:
+    """
+    Sum of unsigned bit-vectors as a balanced adder tree, zero-extending the operands by one bit at each level
+    so that no addition overflows (the width grows logarithmically with the number of terms).
+    """
+    level = list(terms)
+    while len(level) > 1:
+        summed = []
+        for a, b in zip(level[::2], level[1::2]):
+            width = max(a.size(), b.size()) + 1
+            summed.append(ZeroExt(width - a.size(), a) + ZeroExt(width - b.size(), b))
+        level = summed + level[len(summed) * 2:]
+    return level[0]
+
+
 def get_observation_marker(obs_class: int, use_color: bool = True, binary: bool = False) -> str:
     """Get colored circle or digit for observation class using ANSI colors when appropriate.
 
@@ -152,49 +188,36 @@ def stirling_partitions(n, k) -> Generator[list[list[int]]]:
     yield from backtrack(0, curr, 0)
 
 
+def restricted_growth_strings(n: int, k: int) -> Generator[list[int]]:
+    """
+    Generate the labellings of {0...n-1} with at most k labels, up to a renaming of the labels:
+    item `i` takes at most one more than the largest label of the items before it (the first takes 0).
+    """
+    def backtrack(curr: list[int], used: int):
+        if len(curr) == n:
+            yield list(curr)
+            return
+        for label in range(min(used + 1, k)):
+            curr.append(label)
+            yield from backtrack(curr, max(used, label + 1))
+            curr.pop()
+
+    yield from backtrack([], 0)
+
+
 def minimal_positional_budget(world: World) -> int:
     """
     Compute the Minimal Positional Budget (MPB) for the general (non-cardinal) world.
 
     The MPB is the minimum number of observation classes needed such that states
     can be grouped while maintaining optimality. States can be grouped together
-    if their atomic groups share at least one common optimal action.
+    if their atomic groups share at least one common optimal action, hence the MPB
+    is the size of a minimum set of actions covering all atomic groups.
 
     Returns:
         int: The minimal positional budget.
     """
-    n = len(world.clusters)
-    if n <= 1:
-        return n
-
-    def _partition_is_valid(partition: list[list[int]], atomic_groups: list[Direction]) -> bool:
-        """
-        Check if a partition is valid: each block must have atomic groups with strictly overlapping actions.
-
-        Args:
-            partition: List of blocks, where each block contains indices of atomic groups.
-            atomic_groups: List of Direction enum values representing the atomic groups.
-
-        Returns:
-            bool: True if all blocks have non-empty action intersection, False otherwise.
-        """
-        for block in partition:
-            action_sets = [atomic_groups[idx].actions for idx in block]
-            common_actions = set.intersection(*action_sets)
-            if len(common_actions) == 0:
-                return False
-        return True
-
-    atomic_groups = list(world.clusters.keys())
-
-    # Try partition sizes from 2 up to min(4, n)
-    for budget in range(2, n):
-        for partition in stirling_partitions(n, budget):
-            if _partition_is_valid(partition, atomic_groups):
-                return budget
-
-    # Fallback: each cluster needs its own observation class
-    return n
+    return minimal_action_cover(world.clusters.keys())
 
 
 def prettify(obj: object | Iterable, prefix: str):